@@ -0,0 +1,78 @@
+"""Compare COPY-based and executemany loads into stock_data.
+
+Run from the Homework1 directory against a local Postgres configured in .env:
+
+    python -m benchmarks.bench_bulk_load 10000 100000 1000000
+
+Synthetic rows use BENCH* symbols and are deleted after each run.
+"""
+import sys
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import text
+
+from src.database.db_manager import DatabaseManager
+
+BATCH_SIZE = 10000
+DAYS_PER_SYMBOL = 2500
+
+def synthetic_rows(count):
+    start = date(2010, 1, 1)
+    for i in range(count):
+        symbol = f"BENCH{i // DAYS_PER_SYMBOL:04d}"
+        price = 100.0 + (i % 97)
+        yield {
+            'symbol': symbol,
+            'date': start + timedelta(days=i % DAYS_PER_SYMBOL),
+            'last_trade_price': price,
+            'max_price': price + 1.5,
+            'min_price': price - 1.5,
+            'avg_price': price,
+            'change_percentage': (i % 11) - 5.0,
+            'volume': i % 5000,
+            'turnover_best': price * (i % 5000),
+            'total_turnover': price * (i % 5000)
+        }
+
+# save_stock_data also upserts latest_quote, and a pipeline run fills the
+# other read models, so BENCH* rows are removed from all of them
+BENCH_TABLES = ('stock_data', 'latest_quote', 'market_overview_snapshot', 'symbol_registry')
+
+def clean(db):
+    with db.engine.begin() as connection:
+        for table in BENCH_TABLES:
+            connection.execute(text(f"DELETE FROM {table} WHERE symbol LIKE 'BENCH%'"))
+    # Close the holes the synthetic symbols left in the ranking, and make the
+    # API drop any cached responses that included them
+    db.refresh_popularity()
+    db.bump_data_version()
+
+def load(db, count):
+    clean(db)
+    batch = []
+    start = time.perf_counter()
+    for row in synthetic_rows(count):
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            db.save_stock_data(batch)
+            batch = []
+    if batch:
+        db.save_stock_data(batch)
+    duration = time.perf_counter() - start
+    clean(db)
+    return duration
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10000, 100000, 1000000]
+    copy_db = DatabaseManager(use_copy=True)
+    insert_db = DatabaseManager(use_copy=False)
+
+    print(f"\n{'rows':>10} {'method':>12} {'seconds':>10} {'rows/s':>12}")
+    for count in sizes:
+        for name, db in (('copy', copy_db), ('executemany', insert_db)):
+            duration = load(db, count)
+            print(f"{count:>10} {name:>12} {duration:>10.2f} {count / duration:>12.0f}")
+
+if __name__ == "__main__":
+    main()
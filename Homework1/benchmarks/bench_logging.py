@@ -0,0 +1,78 @@
+"""Overhead of logging on the fetch loop at INFO versus DEBUG.
+
+Run from the Homework1 directory:
+
+    python -m benchmarks.bench_logging [chunks] [threads]
+
+Drives DataFetcherFilter.process over the ADIN fixture with an in-memory
+session from several threads, so the numbers are the fetch loop's own
+cost (request bookkeeping, parsing, log calls) without any network. Log
+output goes to /dev/null through the queue listener.
+"""
+import concurrent.futures
+import os
+import sys
+import time
+from datetime import date
+
+from src.filters.data_fetcher import DataFetcherFilter
+from src.sinks.artifact_sink import ArtifactSink
+from src.utils.logging_config import configure_logging, shutdown_logging
+
+FIXTURE = os.path.join('tests', 'fixtures', 'history', 'ADIN_20240101-20240131.html')
+
+class NullRateLimiter:
+    def acquire(self, url):
+        pass
+
+    def record_response(self, url, status_code, retry_after=None):
+        pass
+
+class FixtureResponse:
+    status_code = 200
+    headers = {}
+
+    def __init__(self, text):
+        self.text = text
+
+    def raise_for_status(self):
+        pass
+
+class FixtureSession:
+    def __init__(self, text):
+        self.response = FixtureResponse(text)
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        return self.response
+
+def run(level, json_output, chunks, threads, page):
+    with open(os.devnull, 'w') as devnull:
+        configure_logging(level=level, json_output=json_output, stream=devnull)
+        fetcher = DataFetcherFilter(rate_limiter=NullRateLimiter(), artifact_sink=ArtifactSink())
+        session = FixtureSession(page)
+        chunk = {'symbol': 'ADIN', 'start_date': date(2024, 1, 1), 'end_date': date(2024, 1, 31)}
+
+        start = time.perf_counter()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(lambda _: fetcher.process(chunk, session=session), range(chunks)))
+        duration = time.perf_counter() - start
+        shutdown_logging()
+    return duration
+
+def main():
+    chunks = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    with open(FIXTURE, encoding='utf-8') as f:
+        page = f.read()
+
+    print(f"{chunks} chunks on {threads} threads")
+    print(f"{'level':>14} {'seconds':>10} {'chunks/s':>10} {'us/chunk':>10}")
+    for label, level, json_output in (('WARNING', 'WARNING', False),
+                                      ('INFO', 'INFO', False),
+                                      ('DEBUG', 'DEBUG', False),
+                                      ('DEBUG (json)', 'DEBUG', True)):
+        duration = run(level, json_output, chunks, threads, page)
+        print(f"{label:>14} {duration:>10.2f} {chunks / duration:>10.0f} {duration / chunks * 1e6:>10.0f}")
+
+if __name__ == "__main__":
+    main()
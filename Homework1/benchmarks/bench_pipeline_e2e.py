@@ -0,0 +1,118 @@
+"""End-to-end ingestion benchmark against the local fake MSE server.
+
+Run from the Homework1 directory against a local Postgres configured in .env:
+
+    python -m benchmarks.bench_pipeline_e2e --symbols 20 --latency-ms 20,80 --burst-every 50 --burst-length 3
+
+Scrapes, plans, fetches, parses and loads the full ten-year backfill of
+synthetic BENCH* symbols, then reports records/s, p99 chunk latency and
+peak RSS. One JSON result line (tagged with the git commit) is printed and
+appended to --out so runs can be compared across commits. The symbols'
+rows are deleted before and after each run, from stock_data and from
+every table the run maintains for the API.
+"""
+import argparse
+import json
+import logging
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from sqlalchemy import text
+
+from benchmarks.bench_bulk_load import clean
+from benchmarks.fake_mse_server import FakeMSEServer, parse_latency, synthetic_symbols
+from src.core.pipeline import Pipeline
+from src.utils.performance_metrics import metrics
+from src.utils.rate_limiter import RateLimiter
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end pipeline benchmark")
+    parser.add_argument("--symbols", type=int, default=20)
+    parser.add_argument("--latency-ms", type=parse_latency, default=(20, 80))
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--burst-every", type=int, default=0)
+    parser.add_argument("--burst-length", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--engine", choices=['threads', 'async'], default='threads')
+    parser.add_argument("--parser", choices=['lxml', 'bs4'], default='lxml')
+    parser.add_argument("--rate", type=float, default=500.0, help="client request rate limit (requests/s)")
+    parser.add_argument("--out", default=None, help="append the JSON result line to this file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    server = FakeMSEServer(
+        symbols=synthetic_symbols(args.symbols), latency_ms=args.latency_ms,
+        error_rate=args.error_rate, burst_every=args.burst_every,
+        burst_length=args.burst_length, seed=args.seed
+    ).start()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        pipeline = Pipeline(
+            parser=args.parser, artifacts=('none',), http_cache_mb=0,
+            journal_path=os.path.join(workdir, 'journal.sqlite3'), base_url=server.url,
+            # Always scrape the fake server rather than reuse the real symbols in the registry
+            symbol_ttl_hours=0,
+            rate_limiter=RateLimiter(global_rate=args.rate, global_burst=args.rate,
+                                     host_rate=args.rate, max_host_rate=args.rate)
+        )
+        clean(pipeline.db)
+        try:
+            start = time.perf_counter()
+            ok = pipeline.run_async() if args.engine == 'async' else pipeline.run()
+            duration = time.perf_counter() - start
+            with pipeline.db.engine.connect() as connection:
+                records = connection.execute(
+                    text("SELECT COUNT(*) FROM stock_data WHERE symbol LIKE 'BENCH%'")
+                ).scalar()
+        finally:
+            clean(pipeline.db)
+            pipeline.journal.close()
+            server.stop()
+
+    chunks = metrics.get_summary().get('chunk_processing', {})
+    result = {
+        'commit': git_commit(),
+        'engine': args.engine,
+        'parser': args.parser,
+        'symbols': args.symbols,
+        'latency_ms': list(args.latency_ms),
+        'error_rate': args.error_rate,
+        'burst': [args.burst_every, args.burst_length],
+        'ok': ok,
+        'records': records,
+        'seconds': round(duration, 3),
+        'records_per_s': round(records / duration, 1),
+        'chunks': chunks.get('total_operations', 0),
+        'chunk_p99_s': round(chunks.get('p99_duration', 0.0), 4),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'server_statuses': {str(k): v for k, v in sorted(server.status_counts.items())}
+    }
+
+    print(f"\n{'records':>10} {'seconds':>10} {'records/s':>12} {'chunk p99':>10} {'peak RSS':>10}")
+    print(f"{records:>10} {duration:>10.2f} {result['records_per_s']:>12.0f} "
+          f"{result['chunk_p99_s']:>9.3f}s {result['peak_rss_mb']:>8.1f}MB")
+    line = json.dumps(result)
+    print(line)
+    if args.out:
+        with open(args.out, 'a', encoding='utf-8') as f:
+            f.write(line + "\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Bytes per row of the pipeline's row representations.
+
+Run from the Homework1 directory:
+
+    python -m benchmarks.bench_row_memory 1000000
+
+Builds a synthetic ten-year backfill of the given size (400 symbols x
+2500 trading days per million rows) as row dicts, StockRow tuples and
+StockBatch arrays, measuring the memory each holds with tracemalloc.
+"""
+import gc
+import sys
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+import numpy as np
+
+from src.models.stock_row import StockBatch, StockRow
+from src.parsers.history_table_parser import ROW_FIELDS
+
+DAYS_PER_SYMBOL = 2500
+BATCH_SIZE = 10000
+
+def synthetic_columns(symbol_index, days):
+    """Decoded columns, as decode_columns() returns them for one symbol"""
+    start = date(2015, 1, 1)
+    index = np.arange(days)
+    price = 100.0 + (index + symbol_index) % 97
+    return {
+        'date': np.array([start + timedelta(days=int(i)) for i in index], dtype=object),
+        'last_trade_price': price,
+        'max_price': price + 1.5,
+        'min_price': price - 1.5,
+        'avg_price': price.copy(),
+        'change_percentage': (index % 11) - 5.0,
+        'volume': (index % 5000).astype(np.int64),
+        'turnover_best': price * (index % 5000),
+        'total_turnover': price * (index % 5000)
+    }
+
+def as_dicts(symbol, columns):
+    return [
+        {'symbol': symbol, **dict(zip(ROW_FIELDS, row))}
+        for row in zip(*(columns[field].tolist() for field in ROW_FIELDS))
+    ]
+
+def as_stock_rows(symbol, columns):
+    return [StockRow(symbol, *row) for row in zip(*(columns[field].tolist() for field in ROW_FIELDS))]
+
+def as_batches(symbol, columns):
+    batch = StockBatch.from_columns(symbol, columns)
+    return [batch[i:i + BATCH_SIZE] for i in range(0, len(batch), BATCH_SIZE)]
+
+def measure(build, count):
+    """Build `count` rows with build(symbol, columns) and return (bytes held, seconds)"""
+    symbols = (count + DAYS_PER_SYMBOL - 1) // DAYS_PER_SYMBOL
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    held = []
+    remaining = count
+    for i in range(symbols):
+        days = min(DAYS_PER_SYMBOL, remaining)
+        columns = synthetic_columns(i, days)
+        held.append(build(f"S{i:04d}", columns))
+        # Only the built rows stay alive, as in the write queue
+        del columns
+        remaining -= days
+    duration = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del held
+    return current, duration
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000000]
+    print(f"\n{'rows':>10} {'representation':>16} {'MB':>10} {'bytes/row':>10} {'seconds':>8}")
+    for count in sizes:
+        for name, build in (('dict', as_dicts), ('StockRow', as_stock_rows), ('StockBatch', as_batches)):
+            held, duration = measure(build, count)
+            print(f"{count:>10} {name:>16} {held / 1024 / 1024:>10.1f} {held / count:>10.1f} {duration:>8.2f}")
+
+if __name__ == "__main__":
+    main()
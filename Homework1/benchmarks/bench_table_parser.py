@@ -0,0 +1,62 @@
+"""Parse-time benchmark for the lxml and BeautifulSoup history parsers.
+
+Run from the Homework1 directory:
+
+    python -m benchmarks.bench_table_parser [repeats]
+
+Uses the saved pages in data/raw (if any) plus a synthetic ten-year page
+built from the ADIN fixture.
+"""
+import glob
+import os
+import re
+import sys
+import time
+from datetime import date, timedelta
+
+from src.filters.data_fetcher import DataFetcherFilter
+
+FIXTURE = os.path.join('tests', 'fixtures', 'history', 'ADIN_20240101-20240131.html')
+
+def synthetic_page(days):
+    """Replace the fixture's rows with one row per weekday over `days` days"""
+    with open(FIXTURE, encoding='utf-8') as f:
+        template = f.read()
+    rows = []
+    day = date(2024, 1, 1)
+    for _ in range(days):
+        day -= timedelta(days=1)
+        if day.weekday() >= 5:
+            continue
+        rows.append(
+            f"<tr><td>{day.month}/{day.day}/{day.year}</td><td>21,600.00</td>"
+            "<td>21,800.00</td><td>21,400.00</td><td>21,600.00</td><td>1.50</td>"
+            "<td>100</td><td>2,160,000</td><td>2,160,000</td></tr>"
+        )
+    return re.sub(r"<tbody>.*</tbody>", "<tbody>" + "".join(rows) + "</tbody>",
+                  template, flags=re.S)
+
+def time_parser(parser, pages, repeats):
+    fetcher = DataFetcherFilter(parser=parser)
+    rows = 0
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for content in pages:
+            rows += len(fetcher.parse_page('ADIN', content))
+    return time.perf_counter() - start, rows
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    pages = [synthetic_page(3650)]
+    for path in sorted(glob.glob(os.path.join('data', 'raw', '*.html'))):
+        with open(path, encoding='utf-8') as f:
+            pages.append(f.read())
+
+    print(f"{len(pages)} pages x {repeats} repeats")
+    print(f"{'parser':>8} {'seconds':>10} {'rows/s':>12}")
+    for parser in DataFetcherFilter.PARSERS:
+        duration, rows = time_parser(parser, pages, repeats)
+        print(f"{parser:>8} {duration:>10.2f} {rows / duration:>12.0f}")
+
+if __name__ == "__main__":
+    main()
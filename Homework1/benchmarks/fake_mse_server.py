@@ -0,0 +1,287 @@
+"""Deterministic local stand-in for the mse.mk symbol history pages.
+
+Run from the Homework1 directory:
+
+    python -m benchmarks.fake_mse_server --port 8089 --symbols 50 --latency-ms 20,80
+
+then point the pipeline at it with --base-url http://127.0.0.1:8089.
+
+Serves /en/stats/symbolhistory/<SYMBOL>?fromDate=..&toDate=.. with the
+symbol dropdown and one row per trading day, newest first, in the site's
+number format. Rows are synthetic (a pure function of symbol and date, so
+every run and every chunking sees the same data) or replayed from JSON
+files as written by the pipeline's json artifact writer. Latency, random
+5xx errors and bursts of 429 responses with Retry-After are configurable.
+"""
+import argparse
+import glob
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="utf-8" />
+    <title>Symbol history - Macedonian Stock Exchange</title>
+</head>
+<body>
+<div class="container">
+    <form action="/en/stats/symbolhistory/{symbol}" method="get">
+        <select id="Code" name="Code">
+{options}
+        </select>
+    </form>
+    <div class="table-responsive">
+        <table id="resultsTable" class="table table-bordered table-condensed table-striped">
+            <thead>
+                <tr>
+                    <th>Date</th>
+                    <th>Last trade price</th>
+                    <th>Max</th>
+                    <th>Min</th>
+                    <th>Avg. Price</th>
+                    <th>%chg.</th>
+                    <th>Volume</th>
+                    <th>Turnover in BEST in denars</th>
+                    <th>Total turnover in denars</th>
+                </tr>
+            </thead>
+            <tbody>
+{rows}
+            </tbody>
+        </table>
+    </div>
+</div>
+</body>
+</html>
+"""
+
+DEFAULT_SYMBOLS = ('ADIN', 'ALK', 'KMB', 'MPT', 'TEL', 'GRNT', 'STIL', 'TNB', 'REPL', 'MAKP')
+DATE_FORMAT = '%m/%d/%Y'
+
+def synthetic_symbols(count, prefix='BENCH'):
+    """Letter-only symbols (the scraper skips symbols with digits)"""
+    symbols = []
+    for i in range(count):
+        letters = ''
+        for _ in range(3):
+            letters = chr(ord('A') + i % 26) + letters
+            i //= 26
+        symbols.append(prefix + letters)
+    return symbols
+
+def _unit(symbol, day, salt):
+    """Deterministic value in [0, 1) for a symbol, day and purpose"""
+    digest = hashlib.blake2b(f"{symbol}|{day.isoformat()}|{salt}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') / 2 ** 64
+
+def _money(value):
+    return f"{value:,.2f}"
+
+class SyntheticHistory:
+    """Price history that is a pure function of (symbol, date)"""
+    def __init__(self, listed_since=date(2005, 1, 1), trade_probability=0.85):
+        self.listed_since = listed_since
+        self.trade_probability = trade_probability
+
+    def rows(self, symbol, start, end):
+        rows = []
+        day = end
+        base = 500 + 30000 * _unit(symbol, date(2000, 1, 1), 'base')
+        while day >= max(start, self.listed_since):
+            if day.weekday() < 5 and _unit(symbol, day, 'trades') < self.trade_probability:
+                t = day.toordinal()
+                price = base * (1 + 0.2 * math.sin(t / 90 + base) + 0.02 * (_unit(symbol, day, 'noise') - 0.5))
+                spread = price * 0.01 * _unit(symbol, day, 'spread')
+                volume = int(1 + 2000 * _unit(symbol, day, 'volume'))
+                change = 4 * (_unit(symbol, day, 'change') - 0.5)
+                turnover = price * volume
+                rows.append((day, _money(price), _money(price + spread), _money(price - spread),
+                             _money(price), f"{change:.2f}", f"{volume:,}",
+                             f"{turnover:,.0f}", f"{turnover:,.0f}"))
+            day -= timedelta(days=1)
+        return rows
+
+class RecordedHistory:
+    """Rows replayed from JSON record files (data/processed/*.json)"""
+    FIELDS = ('last_trade_price', 'max_price', 'min_price', 'avg_price', 'change_percentage')
+
+    def __init__(self, directory):
+        self.by_symbol = {}
+        for path in glob.glob(os.path.join(directory, '*.json')):
+            with open(path, encoding='utf-8') as f:
+                for record in json.load(f):
+                    day = date.fromisoformat(str(record['date'])[:10])
+                    self.by_symbol.setdefault(record['symbol'], {})[day] = record
+
+    def symbols(self):
+        return sorted(self.by_symbol)
+
+    def rows(self, symbol, start, end):
+        rows = []
+        for day, record in sorted(self.by_symbol.get(symbol, {}).items(), reverse=True):
+            if start <= day <= end:
+                values = [_money(record[field] or 0) for field in self.FIELDS]
+                rows.append((day, *values, f"{int(record['volume'] or 0):,}",
+                             f"{record['turnover_best'] or 0:,.0f}", f"{record['total_turnover'] or 0:,.0f}"))
+        return rows
+
+class FakeMSEServer:
+    """Threaded HTTP server imitating the mse.mk history pages"""
+    def __init__(self, symbols=None, history=None, host='127.0.0.1', port=0,
+                 latency_ms=(0, 0), error_rate=0.0, burst_every=0, burst_length=0,
+                 retry_after=1, seed=0):
+        self.history = history or SyntheticHistory()
+        if symbols is None:
+            symbols = self.history.symbols() if hasattr(self.history, 'symbols') else DEFAULT_SYMBOLS
+        self.symbols = list(symbols)
+        self.host = host
+        self.port = port
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.burst_every = burst_every
+        self.burst_length = burst_length
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.status_counts = {}
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def _plan_response(self):
+        """Decide status and latency for the next request"""
+        with self._lock:
+            self.requests += 1
+            n = self.requests
+            delay = self.random.uniform(*self.latency_ms) / 1000
+            if self.burst_every and (n % self.burst_every) < self.burst_length:
+                status = 429
+            elif self.random.random() < self.error_rate:
+                status = 500
+            else:
+                status = 200
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+        return status, delay
+
+    def render(self, symbol, start, end):
+        options = "\n".join(
+            f'            <option value="{s}">{s}</option>' for s in self.symbols
+        )
+        rows = "\n".join(
+            "                <tr>" + "".join(
+                f"<td>{value}</td>" for value in (f"{day.month}/{day.day}/{day.year}", *values)
+            ) + "</tr>"
+            for day, *values in self.history.rows(symbol, start, end)
+        )
+        return PAGE_TEMPLATE.format(symbol=symbol, options=options, rows=rows)
+
+    def start(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                match = re.fullmatch(r'/en/stats/symbolhistory/([A-Za-z]+)', parsed.path)
+                if not match:
+                    self._send(404, 'not found')
+                    return
+                status, delay = server._plan_response()
+                time.sleep(delay)
+                if status == 429:
+                    self._send(429, 'slow down', {'Retry-After': str(server.retry_after)})
+                    return
+                if status != 200:
+                    self._send(status, 'error')
+                    return
+                query = parse_qs(parsed.query)
+                today = date.today()
+                try:
+                    start = datetime.strptime(query['fromDate'][0], DATE_FORMAT).date()
+                    end = datetime.strptime(query['toDate'][0], DATE_FORMAT).date()
+                except (KeyError, ValueError):
+                    # The dropdown page, as the symbol scraper requests it
+                    start = end = today
+                symbol = match.group(1).upper()
+                if symbol not in server.symbols:
+                    # Unlisted symbols get the page with an empty table
+                    start, end = today + timedelta(days=1), today
+                self._send(200, server.render(symbol, start, end))
+
+            def _send(self, status, body, headers=None):
+                payload = body.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(payload)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name='fake-mse', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+
+def parse_latency(value):
+    low, _, high = value.partition(',')
+    return float(low), float(high or low)
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the mse.mk history pages")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--symbols", type=int, default=0,
+                        help="serve this many synthetic BENCH* symbols instead of the default list")
+    parser.add_argument("--recorded", default=None,
+                        help="replay JSON record files from this directory instead of synthetic rows")
+    parser.add_argument("--latency-ms", type=parse_latency, default=(0, 0),
+                        help="per-request latency range, e.g. 20,80")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of 500 responses")
+    parser.add_argument("--burst-every", type=int, default=0, help="start a 429 burst every N requests")
+    parser.add_argument("--burst-length", type=int, default=0, help="requests per 429 burst")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    history = RecordedHistory(args.recorded) if args.recorded else SyntheticHistory()
+    symbols = synthetic_symbols(args.symbols) if args.symbols else None
+    server = FakeMSEServer(
+        symbols=symbols, history=history, port=args.port, latency_ms=args.latency_ms,
+        error_rate=args.error_rate, burst_every=args.burst_every,
+        burst_length=args.burst_length, seed=args.seed
+    ).start()
+    print(f"Fake MSE serving {len(server.symbols)} symbols at {server.url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,149 @@
 from src.core.pipeline import Pipeline
+from src.core.sharded_runner import ShardedRunner
+from src.utils.logging_config import configure_logging, parse_module_levels, shutdown_logging
+import argparse
+import logging
+import os
 import time
 
+logger = logging.getLogger(__name__)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Collect MSE stock market data")
+    parser.add_argument(
+        "--engine",
+        choices=["threads", "async"],
+        default="threads",
+        help="ingestion engine: nested thread pools or a single asyncio event loop"
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=1,
+        help="shard symbols across this many worker processes (threads engine in each)"
+    )
+    parser.add_argument(
+        "--parser",
+        choices=["lxml", "bs4"],
+        default="lxml",
+        help="history table parser: streaming lxml or the original BeautifulSoup"
+    )
+    parser.add_argument(
+        "--artifacts",
+        default="raw,json,csv",
+        help="comma-separated artifact writers: none, raw, json, csv, parquet"
+    )
+    parser.add_argument(
+        "--writers",
+        type=int,
+        default=2,
+        help="number of database writer threads, each with its own connection"
+    )
+    parser.add_argument(
+        "--write-buffer-mb",
+        type=int,
+        default=64,
+        help="memory budget for rows waiting to be written"
+    )
+    parser.add_argument(
+        "--http-cache-mb",
+        type=int,
+        default=512,
+        help="disk budget for cached history pages (0 disables the cache)"
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=9108,
+        help="serve OpenMetrics on localhost at this port during the run (0 disables)"
+    )
+    parser.add_argument(
+        "--base-url",
+        default=None,
+        help="MSE site root, e.g. http://127.0.0.1:8089 for benchmarks/fake_mse_server.py "
+             "(default: $MSE_BASE_URL or https://www.mse.mk)"
+    )
+    parser.add_argument(
+        "--symbol-ttl-hours",
+        type=float,
+        default=24,
+        help="re-scrape the symbol list when the registry is older than this (0 always scrapes)"
+    )
+    parser.add_argument(
+        "--delisted-after-days",
+        type=int,
+        default=90,
+        help="only probe the last this many days for listed symbols with no trades in that long (0 disables)"
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="fetch only the chunks earlier runs planned but never saved"
+    )
+    parser.add_argument(
+        "--journal",
+        default=os.path.join("data", "run_journal.sqlite3"),
+        help="SQLite run journal of planned chunks ('none' disables it)"
+    )
+    parser.add_argument(
+        "--log-level",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+        default="INFO",
+        help="level for all loggers; DEBUG adds per-request and per-chunk lines"
+    )
+    parser.add_argument(
+        "--log-module-levels",
+        default="",
+        help="per-module overrides, e.g. src.filters.data_fetcher=DEBUG,src.database=WARNING"
+    )
+    parser.add_argument(
+        "--log-json",
+        action="store_true",
+        help="write one JSON object per log line"
+    )
+    return parser.parse_args()
+
 def main():
+    args = parse_args()
+    configure_logging(
+        level=args.log_level,
+        json_output=args.log_json,
+        module_levels=parse_module_levels(args.log_module_levels)
+    )
     start_time = time.time()
-    print("Starting stock market data collection...")
+    logger.info("Starting stock market data collection (%s engine)...", args.engine)
     
-    pipeline = Pipeline()
-    success = pipeline.run()
+    pipeline_options = dict(
+        parser=args.parser,
+        artifacts=args.artifacts.split(','),
+        writer_threads=args.writers,
+        write_buffer_mb=args.write_buffer_mb,
+        http_cache_mb=args.http_cache_mb,
+        metrics_port=args.metrics_port,
+        journal_path=None if args.journal == 'none' else args.journal,
+        resume=args.resume,
+        base_url=args.base_url,
+        symbol_ttl_hours=args.symbol_ttl_hours,
+        delisted_after_days=args.delisted_after_days
+    )
+    if args.processes > 1:
+        log_options = dict(
+            level=args.log_level,
+            json_output=args.log_json,
+            module_levels=parse_module_levels(args.log_module_levels)
+        )
+        success = ShardedRunner(args.processes, pipeline_options, log_options).run()
+    elif args.engine == "async":
+        success = Pipeline(**pipeline_options).run_async()
+    else:
+        success = Pipeline(**pipeline_options).run()
     
     end_time = time.time()
     duration = end_time - start_time
     
-    print(f"\nExecution completed in {duration:.2f} seconds")
-    print(f"Status: {'Success' if success else 'Failed'}")
+    logger.info("Execution completed in %.2f seconds", duration)
+    logger.info("Status: %s", 'Success' if success else 'Failed')
+    shutdown_logging()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,88 @@
+from datetime import timedelta
+
+class ChunkPlanner:
+    """Turns missing date ranges into as few history requests as possible.
+
+    - ranges are trimmed to trading days (Mon-Fri, minus known holidays) and
+      ranges with no trading day are dropped, so a weekend run asks for nothing
+    - ranges closer than merge_gap_days are merged into one request
+    - chunk length follows the symbol's historical rows per calendar day so a
+      request returns about target_rows_per_request rows, capped at
+      max_chunk_days (the widest window mse.mk serves in one page)
+    - a range of at most calendar_max_days (the daily incremental case) is
+      fetched with one request covering exactly its trading dates
+    """
+    def __init__(self, max_chunk_days=365, min_chunk_days=30,
+                 target_rows_per_request=250, merge_gap_days=7,
+                 calendar_max_days=7, holidays=()):
+        self.max_chunk_days = max_chunk_days
+        self.min_chunk_days = min_chunk_days
+        self.target_rows_per_request = target_rows_per_request
+        self.merge_gap_days = merge_gap_days
+        self.calendar_max_days = calendar_max_days
+        self.holidays = set(holidays)
+
+    def is_trading_day(self, day):
+        return day.weekday() < 5 and day not in self.holidays
+
+    def _first_trading_day(self, start, end):
+        day = start
+        while day <= end and not self.is_trading_day(day):
+            day += timedelta(days=1)
+        return day
+
+    def _last_trading_day(self, start, end):
+        day = end
+        while day >= start and not self.is_trading_day(day):
+            day -= timedelta(days=1)
+        return day
+
+    def trim(self, start, end):
+        """Shrink a range to its first and last trading day, or None if it has none"""
+        first = self._first_trading_day(start, end)
+        if first > end:
+            return None
+        return first, self._last_trading_day(first, end)
+
+    def merge(self, ranges):
+        merged = []
+        for start, end in sorted(ranges):
+            if merged and (start - merged[-1][1]).days <= self.merge_gap_days:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        return merged
+
+    def chunk_days(self, rows_per_day=None):
+        """Window length in days for a symbol with the given row density"""
+        if not rows_per_day:
+            return self.max_chunk_days
+        days = int(self.target_rows_per_request / rows_per_day)
+        return max(self.min_chunk_days, min(self.max_chunk_days, days))
+
+    def plan(self, symbol, ranges, rows_per_day=None):
+        """Plan request chunks for a symbol's missing (start, end) ranges"""
+        trimmed = [r for r in (self.trim(start, end) for start, end in ranges) if r]
+        chunk_days = self.chunk_days(rows_per_day)
+
+        chunks = []
+        for start, end in self.merge(trimmed):
+            if (end - start).days < self.calendar_max_days:
+                chunks.append(self._chunk(symbol, start, end))
+                continue
+            chunk_start = start
+            while chunk_start <= end:
+                window = self.trim(chunk_start, min(chunk_start + timedelta(days=chunk_days), end))
+                if window is None:
+                    break
+                chunks.append(self._chunk(symbol, *window))
+                chunk_start = window[1] + timedelta(days=1)
+        return chunks
+
+    @staticmethod
+    def _chunk(symbol, start_date, end_date):
+        return {
+            'symbol': symbol,
+            'start_date': start_date,
+            'end_date': end_date
+        }
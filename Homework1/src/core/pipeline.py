@@ -1,71 +1,142 @@
+import asyncio
 import concurrent.futures
+import logging
 import time
 from requests.sessions import Session
-import queue
-from threading import Semaphore, Thread
-from datetime import datetime
 import multiprocessing
+import os
 import threading
 import psutil
 import requests
+import aiohttp
 
 from src.filters.symbol_scraper import SymbolScraperFilter
 from src.filters.date_checker import DateCheckerFilter
 from src.filters.data_fetcher import DataFetcherFilter
+from src.core.run_journal import RunJournal
+from src.core.write_stage import WriteStage
 from src.database.db_manager import DatabaseManager
+from src.database.engine_registry import pool_size_for
+from src.sinks.artifact_sink import ArtifactSink
+from src.utils.http_cache import HttpCache
+from src.utils.metrics_exporter import MetricsServer
 from src.utils.performance_metrics import metrics, time_this
+from src.utils.rate_limiter import rate_limiter as shared_rate_limiter
+
+logger = logging.getLogger(__name__)
 
 class Pipeline:
-    def __init__(self):
-        self.symbol_scraper = SymbolScraperFilter()
-        self.date_checker = DateCheckerFilter()
-        self.data_fetcher = DataFetcherFilter()
-        self.db = DatabaseManager()
-        
-        # Increased concurrent requests
-        self.request_semaphore = Semaphore(25)  # Further increased from 20 to 25
-        self.last_request_time = {}
-        self.min_request_interval = 0.02  # Further decreased from 0.03 to 0.02
+    def __init__(self, parser='lxml', artifacts=('raw', 'json', 'csv'),
+                 writer_threads=2, write_buffer_mb=64, http_cache_mb=512, metrics_port=None,
+                 journal_path=os.path.join('data', 'run_journal.sqlite3'), resume=False,
+                 rate_limiter=None, base_url=None, symbol_ttl_hours=24, delisted_after_days=90):
+        # Request pacing is owned by one RateLimiter shared by the filters
+        self.rate_limiter = rate_limiter or shared_rate_limiter
+        # Async engine: one event loop, a global cap on in-flight requests
+        # and a bounded pool for the CPU-bound HTML parsing
+        self.async_concurrency = 25
+        self.parse_workers = min(multiprocessing.cpu_count(), 8)
+        # One DatabaseManager on the process-wide engine, its pool sized for
+        # the writers rather than the fetchers
+        pool_size, max_overflow = pool_size_for(writer_threads, fetch_concurrency=self.async_concurrency)
+        self.db = DatabaseManager(pool_size=pool_size, max_overflow=max_overflow)
+        # Every planned chunk is journaled so an interrupted run can resume
+        self.journal = RunJournal(journal_path) if journal_path else None
+        self.resume = resume
+        self.date_checker = DateCheckerFilter(db=self.db, journal=self.journal)
+        self.chunk_plan = {}
+        self.artifact_sink = ArtifactSink.from_names(artifacts)
+        # Closed date ranges are served from disk; open ones are revalidated
+        self.http_cache = HttpCache(max_bytes=http_cache_mb * 1024 * 1024) if http_cache_mb > 0 else None
+        self.data_fetcher = DataFetcherFilter(
+            rate_limiter=self.rate_limiter, parser=parser,
+            artifact_sink=self.artifact_sink, http_cache=self.http_cache, base_url=base_url,
+            compact_rows=True
+        )
         
         # Increased batch sizes
         self.batch_size = 10000
-        self.save_queue = queue.Queue(maxsize=2000)
+        # Fetchers hand rows to N writer threads bounded by a byte budget
+        self.write_stage = WriteStage(
+            self.db,
+            writer_count=writer_threads,
+            max_bytes=write_buffer_mb * 1024 * 1024,
+            batch_size=self.batch_size
+        )
         
         # Initialize session with retry strategy
         self.session = Session()
         self.session.mount('http://', requests.adapters.HTTPAdapter(max_retries=3))
         self.session.mount('https://', requests.adapters.HTTPAdapter(max_retries=3))
 
-    def wait_for_rate_limit(self, symbol):
-        current_time = time.time()
-        with self.request_semaphore:
-            if symbol in self.last_request_time:
-                elapsed = current_time - self.last_request_time[symbol]
-                if elapsed < self.min_request_interval:
-                    time.sleep(self.min_request_interval - elapsed)
-            self.last_request_time[symbol] = time.time()
+        # Symbols come from the registry table, re-scraped at most once per TTL
+        self.symbol_scraper = SymbolScraperFilter(
+            rate_limiter=self.rate_limiter, base_url=base_url, db=self.db, session=self.session,
+            ttl_hours=symbol_ttl_hours, delisted_after_days=delisted_after_days
+        )
+
+        # Live OpenMetrics endpoint on localhost while a run is in progress
+        self.metrics_server = MetricsServer(port=metrics_port) if metrics_port else None
 
     def process_chunk(self, symbol, chunk, session):
-        """Process a single date chunk"""
+        """Fetch a single date chunk and hand its rows to the write stage"""
+        start = time.time()
         try:
-            self.wait_for_rate_limit(symbol)
-            return self.data_fetcher.process(chunk, session)
+            rows = self.data_fetcher.fetch(chunk, session)
         except Exception as e:
-            print(f"Chunk processing error for {symbol}: {e}")
+            logger.error("Chunk processing error for %s: %s", symbol, e)
+            self._journal_failed(chunk, e)
+            self._record_chunk(start, False)
             return []
+        self._record_chunk(start, True)
+        self._queue_chunk(chunk, rows)
+        return rows
+
+    @staticmethod
+    def _record_chunk(start, success):
+        metrics.record_metric(
+            category='chunk_processing',
+            operation='fetch_chunk',
+            duration=time.time() - start,
+            success=success
+        )
+
+    def _queue_chunk(self, chunk, rows):
+        """Put a chunk's rows on the write stage as soon as it is parsed; the
+        journal marks it done once they are saved.
+
+        Rows are a compact StockBatch and each chunk is released once written, so
+        a symbol holds at most its in-flight chunks in memory, never its
+        whole history. The write stage tracks that peak per symbol.
+        """
+        symbol = chunk['symbol']
+        batches = [rows[i:i + self.batch_size] for i in range(0, len(rows), self.batch_size)]
+        if self.journal is None:
+            for batch in batches:
+                self.write_stage.put(batch, key=symbol)
+            return
+        if not batches:
+            self.journal.mark_done(chunk, 0)
+            return
+        completion = self.journal.completion(chunk, len(rows), len(batches))
+        for batch in batches:
+            self.write_stage.put(batch, on_written=completion, key=symbol)
+
+    def _journal_failed(self, chunk, error):
+        if self.journal is not None:
+            self.journal.mark_failed(chunk, error)
 
     @time_this(category='symbol_processing')
     def process_symbol(self, symbol):
         try:
             start_time = time.time()
-            print(f"[{datetime.now().strftime('%H:%M:%S.%f')}] Starting {symbol}")
+            logger.debug("Starting %s", symbol)
             records = 0
             
-            date_chunks = self.date_checker.process(symbol)
+            date_chunks = self._date_chunks(symbol)
             if not date_chunks:
                 return 0
 
-            chunk_results = []
             # Create a dedicated thread pool for this symbol's chunks
             with concurrent.futures.ThreadPoolExecutor(max_workers=5) as chunk_executor:
                 futures = [
@@ -75,124 +146,325 @@ class Pipeline:
                 
                 for future in concurrent.futures.as_completed(futures):
                     try:
-                        chunk_data = future.result()
-                        if chunk_data:
-                            chunk_results.extend(chunk_data)
-                            records += len(chunk_data)
+                        # Each chunk's rows are already on the write stage
+                        records += len(future.result())
                     except Exception as e:
-                        print(f"Error processing chunk for {symbol}: {e}")
-
-            if chunk_results:
-                for i in range(0, len(chunk_results), self.batch_size):
-                    batch = chunk_results[i:i + self.batch_size]
-                    self.save_queue.put(batch)
+                        logger.error("Error processing chunk for %s: %s", symbol, e)
 
             duration = time.time() - start_time
-            print(f"[{datetime.now().strftime('%H:%M:%S.%f')}] {symbol}: {records} records in {duration:.2f}s")
+            logger.info("%s: %d records in %.2fs", symbol, records, duration,
+                        extra={'symbol': symbol, 'records': records, 'duration': duration})
             return records
             
         except Exception as e:
-            print(f"Error processing {symbol}: {e}")
+            logger.error("Error processing %s: %s", symbol, e)
             return 0
 
-    def batch_save_worker(self):
-        """Worker thread for batch saving data"""
-        batch = []
-        timeout_count = 0
-        max_timeouts = 3
-        
-        while timeout_count < max_timeouts:
-            try:
-                data = self.save_queue.get(timeout=10)
-                timeout_count = 0  # Reset timeout counter on successful get
-                
-                if data is None:  # Shutdown signal
-                    break
-                
-                batch.extend(data)
-                
-                # Process batch if it's full or queue is empty
-                if len(batch) >= self.batch_size or (self.save_queue.empty() and batch):
-                    self.db.save_stock_data(batch)
-                    batch = []
-                    
-            except queue.Empty:
-                timeout_count += 1
-                if batch:  # Save any remaining data
-                    self.db.save_stock_data(batch)
-                    batch = []
-            except Exception as e:
-                print(f"Batch save error: {e}")
-                if batch:  # Try to save what we can
+    async def process_symbol_async(self, symbol, http_session, fetch_semaphore, parse_executor):
+        """Fetch every date chunk of a symbol concurrently on the running event loop"""
+        start_time = time.time()
+        success = False
+        try:
+            logger.debug("Starting %s", symbol)
+            loop = asyncio.get_running_loop()
+            records = 0
+
+            date_chunks = await loop.run_in_executor(None, self._date_chunks, symbol)
+            if not date_chunks:
+                success = True
+                return 0
+
+            async def fetch_chunk(chunk):
+                async with fetch_semaphore:
+                    chunk_start = time.time()
                     try:
-                        self.db.save_stock_data(batch)
-                    except:
-                        pass
-                batch = []
+                        rows = await self.data_fetcher.fetch_async(chunk, http_session, parse_executor)
+                    except Exception as e:
+                        logger.error("Chunk processing error for %s: %s", symbol, e)
+                        self._record_chunk(chunk_start, False)
+                        await loop.run_in_executor(None, self._journal_failed, chunk, e)
+                        return 0
+                    self._record_chunk(chunk_start, True)
+                # write_stage.put blocks while the write buffer is full
+                await loop.run_in_executor(None, self._queue_chunk, chunk, rows)
+                return len(rows)
+
+            results = await asyncio.gather(
+                *(fetch_chunk(chunk) for chunk in date_chunks),
+                return_exceptions=True
+            )
+
+            for chunk_records in results:
+                if isinstance(chunk_records, Exception):
+                    logger.error("Error processing chunk for %s: %s", symbol, chunk_records)
+                    continue
+                records += chunk_records
+
+            duration = time.time() - start_time
+            logger.info("%s: %d records in %.2fs", symbol, records, duration,
+                        extra={'symbol': symbol, 'records': records, 'duration': duration})
+            success = True
+            return records
+
+        except Exception as e:
+            logger.error("Error processing %s: %s", symbol, e)
+            return 0
+        finally:
+            metrics.record_metric(
+                category='symbol_processing',
+                operation='process_symbol_async',
+                duration=time.time() - start_time,
+                success=success
+            )
+
+    def _date_chunks(self, symbol):
+        if symbol in self.chunk_plan:
+            return self.chunk_plan[symbol]
+        return self.date_checker.process(symbol)
+
+    def plan_chunks(self, symbols):
+        """Load all watermarks in one query and plan every symbol's chunks in memory"""
+        start = time.time()
+        round_trips_before = metrics.get_counters()['counters'].get('db.round_trips', 0)
+        if self.resume and self.journal is not None:
+            # Exactly the chunks earlier runs planned but never saved
+            unfinished = self.journal.unfinished_chunks(symbols)
+            self.chunk_plan = {symbol: unfinished.get(symbol) for symbol in symbols}
+            logger.info("Resuming %d unfinished chunks from %s",
+                        sum(len(chunks) for chunks in unfinished.values()), self.journal.path)
+        elif self.date_checker.load_watermarks():
+            self.date_checker.probe_starts = dict(self.symbol_scraper.dormant)
+            self.chunk_plan = self.date_checker.plan(symbols)
+        else:
+            logger.warning("Could not load watermarks, falling back to per-symbol lookups")
+            self.chunk_plan = {}
+        if self.journal is not None:
+            self.journal.record_planned(
+                [chunk for chunks in self.chunk_plan.values() for chunk in chunks or []]
+            )
+        duration = time.time() - start
+        round_trips = metrics.get_counters()['counters'].get('db.round_trips', 0) - round_trips_before
+        chunks = sum(len(chunks or []) for chunks in self.chunk_plan.values())
+        metrics.set_gauge('startup.planning_seconds', duration)
+        logger.info("Planned %d chunks for %d symbols in %.2fs (%.0f DB round-trips)",
+                    chunks, len(self.chunk_plan), duration, round_trips)
+
+    def _start_metrics_server(self):
+        if self.metrics_server is None:
+            return
+        try:
+            self.metrics_server.start()
+            logger.info("Serving metrics on http://%s:%d/metrics", self.metrics_server.host, self.metrics_server.port)
+        except OSError as e:
+            logger.warning("Could not start metrics server: %s", e)
+            self.metrics_server = None
+
+    def _stop_metrics_server(self):
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
 
     @time_this(category='total_execution', operation='pipeline_run')
     def run(self):
+        self._start_metrics_server()
         try:
             run_start = time.time()
-            print(f"[{datetime.now().strftime('%H:%M:%S.%f')}] Starting pipeline...")
+            logger.info("Starting pipeline...")
+            self._start_journal_run()
             symbols = self.symbol_scraper.process()
-            print(f"[{datetime.now().strftime('%H:%M:%S.%f')}] Found {len(symbols)} symbols")
-
-            # Start the save worker thread
-            save_worker = Thread(target=self.batch_save_worker, daemon=True)
-            save_worker.start()
+            logger.info("Found %d symbols", len(symbols))
+            self.plan_chunks(symbols)
 
-            # Calculate optimal number of workers
-            cpu_count = multiprocessing.cpu_count()
-            available_memory = psutil.virtual_memory().available
-            max_workers = min(len(symbols), cpu_count * 4, 30)
+            self.write_stage.start()
+            drained = False
+            try:
+                # Calculate optimal number of workers
+                cpu_count = multiprocessing.cpu_count()
+                available_memory = psutil.virtual_memory().available
+                max_workers = min(len(symbols), cpu_count * 4, 30)
             
-            total_records = 0
-            failed_symbols = []
+                total_records = 0
+                failed_symbols = []
             
-            # Process symbols in batches to better manage resources
-            symbol_batches = [symbols[i:i + max_workers] for i in range(0, len(symbols), max_workers)]
+                # Process symbols in batches to better manage resources
+                symbol_batches = [symbols[i:i + max_workers] for i in range(0, len(symbols), max_workers)]
             
-            for batch_idx, symbol_batch in enumerate(symbol_batches, 1):
-                print(f"Processing batch {batch_idx}/{len(symbol_batches)}")
+                for batch_idx, symbol_batch in enumerate(symbol_batches, 1):
+                    logger.info("Processing batch %d/%d", batch_idx, len(symbol_batches))
                 
-                with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-                    future_to_symbol = {
-                        executor.submit(self.process_symbol, symbol): symbol 
-                        for symbol in symbol_batch
-                    }
+                    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+                        future_to_symbol = {
+                            executor.submit(self.process_symbol, symbol): symbol 
+                            for symbol in symbol_batch
+                        }
                     
-                    for future in concurrent.futures.as_completed(future_to_symbol):
-                        symbol = future_to_symbol[future]
-                        try:
-                            records = future.result()
-                            total_records += records
-                            if records == 0:
+                        for future in concurrent.futures.as_completed(future_to_symbol):
+                            symbol = future_to_symbol[future]
+                            try:
+                                records = future.result()
+                                total_records += records
+                                if records == 0:
+                                    failed_symbols.append(symbol)
+                            except Exception as e:
+                                logger.error("Failed %s: %s", symbol, e)
                                 failed_symbols.append(symbol)
-                        except Exception as e:
-                            print(f"Failed {symbol}: {e}")
-                            failed_symbols.append(symbol)
-
-            # Signal save worker to finish and wait for completion
-            self.save_queue.put(None)
-            save_worker.join(timeout=30)
-
-            total_duration = time.time() - run_start
-            print(f"\n=== Pipeline Summary ===")
-            print(f"Duration: {total_duration:.2f} seconds")
-            print(f"Symbols processed: {len(symbols)} total, {len(symbols) - len(failed_symbols)} successful")
-            print(f"Records: {total_records}")
-            print(f"Speed: {total_records/total_duration:.2f} records/second")
-            
-            if failed_symbols:
-                print(f"Failed symbols: {', '.join(failed_symbols)}")
+            finally:
+                # Drain and flush every queued row, also when a batch raised
+                drained = self._close_stages()
 
-            metrics.print_summary()
+            if not drained:
+                return self._fail_undrained()
+            self.refresh_read_models(symbols, failed_symbols)
+            self._finish_journal_run('completed')
+
+            self._print_summary(run_start, symbols, total_records, failed_symbols)
             return True
 
         except Exception as e:
-            print(f"Pipeline error: {e}")
+            logger.exception("Pipeline error: %s", e)
+            self._finish_journal_run('failed')
+            return False
+        finally:
+            self._stop_metrics_server()
+
+    @time_this(category='total_execution', operation='pipeline_run_async')
+    def run_async(self):
+        """Run the pipeline with all symbol/date-chunk fetches driven by one event loop"""
+        self._start_metrics_server()
+        try:
+            return asyncio.run(self._run_async())
+        except Exception as e:
+            logger.exception("Pipeline error: %s", e)
+            self._finish_journal_run('failed')
             return False
+        finally:
+            self._stop_metrics_server()
+
+    async def _run_async(self):
+        run_start = time.time()
+        loop = asyncio.get_running_loop()
+        logger.info("Starting pipeline (async engine)...")
+        self._start_journal_run()
+        symbols = await loop.run_in_executor(None, self.symbol_scraper.process)
+        logger.info("Found %d symbols", len(symbols))
+        await loop.run_in_executor(None, self.plan_chunks, symbols)
+
+        self.write_stage.start()
+
+        total_records = 0
+        failed_symbols = []
+
+        fetch_semaphore = asyncio.Semaphore(self.async_concurrency)
+        connector = aiohttp.TCPConnector(limit=self.async_concurrency)
+
+        drained = False
+        try:
+            with concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.parse_workers, thread_name_prefix='parse'
+            ) as parse_executor:
+                async with aiohttp.ClientSession(connector=connector) as http_session:
+                    results = await asyncio.gather(
+                        *(self.process_symbol_async(symbol, http_session, fetch_semaphore, parse_executor)
+                          for symbol in symbols),
+                        return_exceptions=True
+                    )
+        finally:
+            drained = await loop.run_in_executor(None, self._close_stages)
+        if not drained:
+            return self._fail_undrained()
+
+        for symbol, records in zip(symbols, results):
+            if isinstance(records, Exception):
+                logger.error("Failed %s: %s", symbol, records)
+                failed_symbols.append(symbol)
+                continue
+            total_records += records
+            if records == 0:
+                failed_symbols.append(symbol)
+
+        await loop.run_in_executor(None, self.refresh_read_models, symbols, failed_symbols)
+        self._finish_journal_run('completed')
+
+        self._print_summary(run_start, symbols, total_records, failed_symbols)
+        return True
+
+    def _close_stages(self):
+        """Drain the write stage and flush artifacts; each is closed even if the other fails.
+
+        Returns False when the writers did not drain within the write stage's
+        close timeout, i.e. some queued rows were never saved.
+        """
+        try:
+            return self.write_stage.close()
+        finally:
+            self.artifact_sink.close()
+
+    def _fail_undrained(self):
+        """End a run whose queued rows were not all saved.
+
+        The read models and data version are left alone, and the journal run
+        is marked failed; the unsaved chunks were never marked done, so
+        --resume fetches them again.
+        """
+        logger.error("Write stage did not drain; skipping read model refresh")
+        self._finish_journal_run('failed')
+        return False
+
+    def refresh_read_models(self, symbols, failed_symbols):
+        """Update the API's precomputed tables once the run's rows are committed"""
+        failed = set(failed_symbols)
+        updated = [symbol for symbol in symbols if symbol not in failed]
+        start = time.time()
+        self.db.refresh_market_overview(updated)
+        self.db.refresh_popularity()
+        if updated:
+            self.db.bump_data_version()
+        metrics.set_gauge('read_models.refresh_seconds', time.time() - start)
+
+    def _start_journal_run(self):
+        if self.journal is not None:
+            self.journal.start_run()
+
+    def _finish_journal_run(self, status):
+        if self.journal is not None and self.journal.run_id is not None:
+            self.journal.finish_run(status)
+
+    def _print_summary(self, run_start, symbols, total_records, failed_symbols):
+        total_duration = time.time() - run_start
+        logger.info("=== Pipeline Summary ===")
+        logger.info("Duration: %.2f seconds", total_duration)
+        logger.info("Symbols processed: %d total, %d successful",
+                    len(symbols), len(symbols) - len(failed_symbols))
+        logger.info("Records: %d", total_records)
+        logger.info("Speed: %.2f records/second", total_records / total_duration)
+        counters = metrics.get_counters()['counters']
+        requests_issued = counters.get('fetch.requests', 0)
+        logger.info("HTTP requests: %.0f, rows gained: %d (%.1f rows/request)",
+                    requests_issued, total_records, total_records / max(requests_issued, 1))
+        logger.info("DB round-trips: %.0f", counters.get('db.round_trips', 0))
+        gauges = metrics.get_counters()['gauges']
+        logger.info("DB connections: %.0f opened, pool limit %.0f",
+                    counters.get('db.connections_opened', 0), gauges.get('db.pool.max_connections', 0))
+        peaks = self.write_stage.peak_bytes()
+        if peaks:
+            largest = max(peaks, key=peaks.get)
+            logger.info("Peak in-flight rows per symbol: %.2fMB max (%s), %.2fMB median",
+                        peaks[largest] / 1024 / 1024, largest,
+                        sorted(peaks.values())[len(peaks) // 2] / 1024 / 1024)
+        else:
+            # Sharded runs only see the largest peak across worker processes
+            peak = gauges.get('write_stage.symbol_peak_bytes')
+            if peak:
+                logger.info("Peak in-flight rows per symbol: %.2fMB max", peak / 1024 / 1024)
+        if self.journal is not None:
+            chunk_counts = self.journal.status_counts()
+            logger.info("Journaled chunks: %d done, %d failed, %d pending (run %d in %s)",
+                        chunk_counts.get('done', 0), chunk_counts.get('failed', 0),
+                        chunk_counts.get('pending', 0), self.journal.run_id, self.journal.path)
+
+        if failed_symbols:
+            logger.warning("Failed symbols: %s", ', '.join(failed_symbols))
+
+        metrics.print_summary()
 
     def __del__(self):
         if hasattr(self, 'session') and self.session:
@@ -0,0 +1,195 @@
+import logging
+import os
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+DONE = 'done'
+FAILED = 'failed'
+
+def subtract_ranges(ranges, covered):
+    """Remove the covered (start, end) date ranges from ranges"""
+    result = []
+    covered = sorted(covered)
+    for start, end in sorted(ranges):
+        for covered_start, covered_end in covered:
+            if covered_end < start or covered_start > end:
+                continue
+            if covered_start > start:
+                result.append((start, covered_start - timedelta(days=1)))
+            start = max(start, covered_end + timedelta(days=1))
+            if start > end:
+                break
+        if start <= end:
+            result.append((start, end))
+    return result
+
+class ChunkCompletion:
+    """Marks a chunk done once every batch holding its rows has been written.
+
+    Handed to WriteStage.put() as the on_written callback of each of the
+    chunk's `parts` batches; any failed batch marks the chunk failed.
+    """
+    def __init__(self, journal, chunk, rows, parts):
+        self.journal = journal
+        self.chunk = chunk
+        self.rows = rows
+        self.remaining = parts
+        self.failed = False
+        self._lock = threading.Lock()
+
+    def __call__(self, success):
+        with self._lock:
+            self.remaining -= 1
+            if not success and not self.failed:
+                self.failed = True
+                self.journal.mark_failed(self.chunk, 'database write failed')
+            finished = self.remaining == 0 and not self.failed
+        if finished:
+            self.journal.mark_done(self.chunk, self.rows)
+
+class RunJournal:
+    """SQLite journal of every planned (symbol, start_date, end_date) chunk.
+
+    A chunk is pending until its rows are in stock_data, then done (or
+    failed). A crashed or partly failed run can be resumed from the chunks
+    that never reached done, and closed ranges already fetched are not
+    planned again even when they hold no rows (a symbol that did not trade).
+    """
+    def __init__(self, path=os.path.join("data", "run_journal.sqlite3")):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        # Workers of a sharded run write to the same file; wait out their locks
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                started_at TEXT NOT NULL,
+                finished_at TEXT,
+                status TEXT
+            );
+            CREATE TABLE IF NOT EXISTS chunks (
+                symbol TEXT NOT NULL,
+                start_date TEXT NOT NULL,
+                end_date TEXT NOT NULL,
+                run_id INTEGER,
+                status TEXT NOT NULL,
+                rows INTEGER,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                updated_at TEXT NOT NULL,
+                PRIMARY KEY (symbol, start_date, end_date)
+            );
+            CREATE INDEX IF NOT EXISTS idx_chunks_status ON chunks (status);
+        """)
+        self._conn.commit()
+        self.run_id = None
+
+    def start_run(self):
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO runs (started_at) VALUES (?)", (datetime.now().isoformat(),)
+            )
+            self._conn.commit()
+            self.run_id = cursor.lastrowid
+        return self.run_id
+
+    def finish_run(self, status):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE runs SET finished_at = ?, status = ? WHERE run_id = ?",
+                (datetime.now().isoformat(), status, self.run_id)
+            )
+            self._conn.commit()
+
+    def record_planned(self, chunks):
+        """Register chunks as pending for the current run"""
+        now = datetime.now().isoformat()
+        with self._lock:
+            self._conn.executemany("""
+                INSERT INTO chunks (symbol, start_date, end_date, run_id, status, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (symbol, start_date, end_date) DO UPDATE
+                SET run_id = excluded.run_id, status = excluded.status,
+                    error = NULL, updated_at = excluded.updated_at
+            """, [
+                (c['symbol'], c['start_date'].isoformat(), c['end_date'].isoformat(),
+                 self.run_id, PENDING, now)
+                for c in chunks
+            ])
+            self._conn.commit()
+
+    def _mark(self, chunk, status, rows=None, error=None):
+        with self._lock:
+            self._conn.execute("""
+                UPDATE chunks
+                SET status = ?, rows = ?, error = ?, attempts = attempts + 1, updated_at = ?
+                WHERE symbol = ? AND start_date = ? AND end_date = ?
+            """, (status, rows, error, datetime.now().isoformat(), chunk['symbol'],
+                  chunk['start_date'].isoformat(), chunk['end_date'].isoformat()))
+            self._conn.commit()
+
+    def mark_done(self, chunk, rows):
+        self._mark(chunk, DONE, rows=rows)
+
+    def mark_failed(self, chunk, error):
+        self._mark(chunk, FAILED, error=str(error)[:500])
+
+    def completion(self, chunk, rows, parts):
+        return ChunkCompletion(self, chunk, rows, parts)
+
+    def unfinished_chunks(self, symbols=None):
+        """Chunks of any run that never reached done, as {symbol: [chunk, ...]}"""
+        with self._lock:
+            result = self._conn.execute("""
+                SELECT symbol, start_date, end_date FROM chunks
+                WHERE status != ? ORDER BY symbol, start_date
+            """, (DONE,)).fetchall()
+        wanted = set(symbols) if symbols is not None else None
+        plan = {}
+        for symbol, start_date, end_date in result:
+            if wanted is not None and symbol not in wanted:
+                continue
+            plan.setdefault(symbol, []).append({
+                'symbol': symbol,
+                'start_date': date.fromisoformat(start_date),
+                'end_date': date.fromisoformat(end_date)
+            })
+        return plan
+
+    def closed_ranges(self):
+        """Done chunks that ended before the day they were fetched, as {symbol: [(start, end)]}.
+
+        Those ranges cannot gain rows any more, so planning can skip them.
+        """
+        with self._lock:
+            result = self._conn.execute("""
+                SELECT symbol, start_date, end_date FROM chunks
+                WHERE status = ? AND end_date < substr(updated_at, 1, 10)
+            """, (DONE,)).fetchall()
+        ranges = {}
+        for symbol, start_date, end_date in result:
+            ranges.setdefault(symbol, []).append(
+                (date.fromisoformat(start_date), date.fromisoformat(end_date))
+            )
+        return ranges
+
+    def status_counts(self, run_id=None):
+        with self._lock:
+            result = self._conn.execute(
+                "SELECT status, COUNT(*) FROM chunks WHERE run_id = ? GROUP BY status",
+                (run_id or self.run_id,)
+            ).fetchall()
+        return dict(result)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
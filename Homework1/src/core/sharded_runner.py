@@ -0,0 +1,162 @@
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+
+from src.core.pipeline import Pipeline
+from src.utils.logging_config import configure_logging, shutdown_logging
+from src.utils.performance_metrics import metrics
+from src.utils.rate_limiter import rate_limiter as shared_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+_STOP = None
+
+def _worker(worker_id, processes, threads, pipeline_options, log_options, work_queue, result_queue):
+    """Worker process: its own Pipeline (HTTP session, DB engine, writers) draining the work queue"""
+    configure_logging(**(log_options or {}))
+    pipeline = Pipeline(rate_limiter=shared_rate_limiter.share(processes), **pipeline_options)
+    pipeline._start_metrics_server()
+    pipeline.write_stage.start()
+    drained = False
+
+    def drain():
+        while True:
+            item = work_queue.get()
+            if item is _STOP:
+                break
+            symbol, chunks = item
+            pipeline.chunk_plan[symbol] = chunks
+            records = pipeline.process_symbol(symbol)
+            result_queue.put(('symbol', worker_id, (symbol, records)))
+
+    try:
+        workers = [
+            threading.Thread(target=drain, name=f'shard{worker_id}-{i}')
+            for i in range(threads)
+        ]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+    finally:
+        drained = pipeline._close_stages()
+        pipeline._stop_metrics_server()
+        result_queue.put(('done', worker_id, (metrics.snapshot(), drained)))
+        shutdown_logging()
+
+class ShardedRunner:
+    """Runs the pipeline across worker processes fed from one work queue.
+
+    The coordinator scrapes symbols, plans every chunk (and journals them)
+    once, then queues symbols largest plan first. Each worker process builds
+    its own Pipeline with a 1/N share of the rate limit and pulls symbols
+    with `threads` threads until the queue is empty. Per-symbol results
+    stream back as they finish; each worker's metrics are merged into the
+    coordinator's when it exits. Symbols a crashed worker never reported
+    count as failed.
+    """
+    def __init__(self, processes, pipeline_options=None, log_options=None, threads=None):
+        self.processes = processes
+        self.pipeline_options = dict(pipeline_options or {})
+        self.log_options = log_options
+        self.threads = threads or max(1, min(multiprocessing.cpu_count() * 4, 30) // processes)
+        # Spawned workers do not inherit the coordinator's threads or locks
+        self.context = multiprocessing.get_context('spawn')
+        # The coordinator only scrapes, plans and reports
+        self.coordinator = Pipeline(**dict(self.pipeline_options, artifacts=('none',)))
+
+    def _worker_options(self, worker_id):
+        options = dict(self.pipeline_options, resume=False)
+        port = options.get('metrics_port')
+        # Workers serve their own metrics next to the coordinator's port
+        options['metrics_port'] = port + 1 + worker_id if port else None
+        return options
+
+    def run(self):
+        coordinator = self.coordinator
+        coordinator._start_metrics_server()
+        try:
+            run_start = time.time()
+            logger.info("Starting pipeline (%d processes x %d threads)...", self.processes, self.threads)
+            coordinator._start_journal_run()
+            symbols = coordinator.symbol_scraper.process()
+            logger.info("Found %d symbols", len(symbols))
+            coordinator.plan_chunks(symbols)
+
+            work_queue = self.context.Queue()
+            result_queue = self.context.Queue()
+            # Longest plans first so no worker is left with one big symbol at the end
+            planned = sorted(
+                ((symbol, coordinator.chunk_plan.get(symbol)) for symbol in symbols),
+                key=lambda item: len(item[1] or []),
+                reverse=True
+            )
+            for item in planned:
+                work_queue.put(item)
+            for _ in range(self.processes * self.threads):
+                work_queue.put(_STOP)
+
+            workers = [
+                self.context.Process(
+                    target=_worker,
+                    args=(worker_id, self.processes, self.threads, self._worker_options(worker_id),
+                          self.log_options, work_queue, result_queue),
+                    name=f'shard-{worker_id}'
+                )
+                for worker_id in range(self.processes)
+            ]
+            for worker in workers:
+                worker.start()
+
+            results, drained = self._collect(workers, result_queue)
+            for worker in workers:
+                worker.join()
+
+            if not drained:
+                return coordinator._fail_undrained()
+            total_records = sum(results.values())
+            failed_symbols = [symbol for symbol in symbols if not results.get(symbol)]
+            coordinator.refresh_read_models(symbols, failed_symbols)
+            coordinator._finish_journal_run('completed')
+            coordinator._print_summary(run_start, symbols, total_records, failed_symbols)
+            return True
+
+        except Exception as e:
+            logger.exception("Pipeline error: %s", e)
+            coordinator._finish_journal_run('failed')
+            return False
+        finally:
+            coordinator.artifact_sink.close()
+            coordinator._stop_metrics_server()
+
+    def _collect(self, workers, result_queue):
+        """Gather per-symbol records until every worker has reported or died.
+
+        Returns (records by symbol, whether every reporting worker drained its
+        write stage).
+        """
+        results = {}
+        drained = True
+        finished = set()
+        while len(finished) < len(workers):
+            try:
+                kind, worker_id, payload = result_queue.get(timeout=1.0)
+            except queue.Empty:
+                for worker_id, worker in enumerate(workers):
+                    if worker_id not in finished and not worker.is_alive():
+                        logger.error("Worker %d exited with code %s before reporting",
+                                     worker_id, worker.exitcode)
+                        finished.add(worker_id)
+                continue
+            if kind == 'symbol':
+                symbol, records = payload
+                results[symbol] = records
+            elif kind == 'done':
+                snapshot, worker_drained = payload
+                metrics.merge_snapshot(snapshot)
+                drained = drained and worker_drained
+                finished.add(worker_id)
+                logger.info("Worker %d finished (peak memory %.2fMB)", worker_id, snapshot['peak_memory_mb'])
+        return results, drained
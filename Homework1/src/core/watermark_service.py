@@ -0,0 +1,69 @@
+import time
+
+from src.utils.performance_metrics import metrics
+
+class WatermarkService:
+    """In-memory per-symbol high-water marks (last stored date) and row density.
+
+    Everything is loaded with a single GROUP BY query when a run starts,
+    so planning date chunks costs no further database round-trips.
+    """
+    def __init__(self, db):
+        self.db = db
+        self.last_dates = {}
+        self.densities = {}
+        self.gap_ranges = {}
+        self.loaded = False
+        self.load_duration = 0.0
+
+    def load(self):
+        start = time.time()
+        stats = self.db.get_symbol_stats()
+        self.load_duration = time.time() - start
+        if stats is None:
+            return False
+        self.last_dates = {}
+        self.densities = {}
+        for symbol, (first_date, last_date, row_count) in stats.items():
+            self.last_dates[symbol] = last_date
+            days = (last_date - first_date).days + 1
+            self.densities[symbol] = row_count / days if days > 0 else None
+        self.loaded = True
+        metrics.set_gauge('watermarks.load_seconds', self.load_duration)
+        metrics.set_gauge('watermarks.symbols', len(self.last_dates))
+        return True
+
+    def load_gaps(self, since, min_gap_days=7, spacing_factor=4):
+        """Load holes in stored history since a date with one window query.
+
+        A hole only counts when it is also more than spacing_factor times
+        the symbol's usual spacing between trading days (1 / rows_per_day):
+        an illiquid ticker that trades a few times a month has long quiet
+        stretches that are not missing data.
+        """
+        gaps = self.db.get_date_gaps(since, min_gap_days)
+        if gaps is None:
+            return False
+        self.gap_ranges = {}
+        for symbol, ranges in gaps.items():
+            density = self.densities.get(symbol)
+            threshold = max(min_gap_days, spacing_factor / density) if density else min_gap_days
+            # Days between the stored rows on either side of the hole
+            ranges = [(start, end) for start, end in ranges if (end - start).days + 2 > threshold]
+            if ranges:
+                self.gap_ranges[symbol] = ranges
+        metrics.set_gauge('watermarks.gaps', sum(len(ranges) for ranges in self.gap_ranges.values()))
+        return True
+
+    def gaps(self, symbol):
+        """Missing (start, end) ranges inside a symbol's stored history"""
+        return self.gap_ranges.get(symbol, [])
+
+    def last_date(self, symbol):
+        if not self.loaded:
+            return self.db.get_last_date(symbol)
+        return self.last_dates.get(symbol)
+
+    def rows_per_day(self, symbol):
+        """Historical rows per calendar day, or None when unknown"""
+        return self.densities.get(symbol)
@@ -0,0 +1,244 @@
+import logging
+import sys
+import threading
+import time
+from collections import deque
+
+from src.utils.performance_metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+def estimate_bytes(rows):
+    """Approximate in-memory size of a list of row dicts or row tuples
+    (exact for a StockBatch)"""
+    if hasattr(rows, 'nbytes'):
+        return rows.nbytes
+    if not rows:
+        return 0
+    sample = rows[0]
+    values = sample.values() if isinstance(sample, dict) else sample
+    row_bytes = sys.getsizeof(sample) + sum(sys.getsizeof(value) for value in values)
+    return sys.getsizeof(rows) + row_bytes * len(rows)
+
+class ByteBudgetQueue:
+    """FIFO whose capacity is a byte budget rather than an item count.
+
+    put() blocks while the queued bytes plus the new item would exceed
+    max_bytes. An item larger than the whole budget is still admitted once
+    the queue is empty, so oversized batches cannot deadlock producers.
+    """
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._items = deque()
+        self._bytes = 0
+        self._cond = threading.Condition()
+
+    def put(self, item, size):
+        with self._cond:
+            while size and self._items and self._bytes + size > self.max_bytes:
+                self._cond.wait()
+            self._items.append((item, size, time.monotonic()))
+            self._bytes += size
+            self._cond.notify_all()
+
+    def get(self):
+        """Return (item, enqueued_at), blocking until an item is available"""
+        with self._cond:
+            while not self._items:
+                self._cond.wait()
+            item, size, enqueued_at = self._items.popleft()
+            self._bytes -= size
+            self._cond.notify_all()
+            return item, enqueued_at
+
+    def get_nowait(self):
+        """Like get() but returns None when the queue is empty"""
+        with self._cond:
+            if not self._items or self._items[0][0] is _STOP:
+                return None
+            item, size, enqueued_at = self._items.popleft()
+            self._bytes -= size
+            self._cond.notify_all()
+            return item, enqueued_at
+
+    def qsize(self):
+        with self._cond:
+            return len(self._items)
+
+    def items(self):
+        """Snapshot of the queued items, oldest first"""
+        with self._cond:
+            return [item for item, _, _ in self._items]
+
+    def nbytes(self):
+        with self._cond:
+            return self._bytes
+
+class WriteStage:
+    """Producer/consumer stage between the fetchers and the database.
+
+    Fetch threads put row batches; writer_count threads, each holding its
+    own database connection, drain them in batches of up to batch_size
+    rows. close() drains and flushes everything that was queued, waiting
+    at most close_timeout seconds for the writers to finish.
+    Batches put with a key (the symbol) are tracked from put() until they
+    are written, and the peak in-flight bytes of every key are kept.
+    """
+    def __init__(self, db, writer_count=2, max_bytes=64 * 1024 * 1024, batch_size=10000,
+                 close_timeout=600):
+        self.db = db
+        self.writer_count = writer_count
+        self.batch_size = batch_size
+        self.close_timeout = close_timeout
+        self.queue = ByteBudgetQueue(max_bytes)
+        self.threads = []
+        self.rows_written = 0
+        self.rows_failed = 0
+        self.inflight_bytes = {}
+        self.peak_inflight_bytes = {}
+        self.max_inflight_bytes = 0
+        self._lock = threading.Lock()
+
+    def start(self):
+        self.threads = [
+            threading.Thread(target=self._run, name=f'db-writer-{i}', daemon=True)
+            for i in range(self.writer_count)
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def put(self, rows, on_written=None, key=None):
+        """Queue a batch of rows, blocking while the byte budget is used up.
+
+        on_written(success) is called from the writer thread once the batch
+        has been saved (or failed to save).
+        """
+        if not rows:
+            return
+        size = estimate_bytes(rows)
+        if key is not None:
+            # Counted before blocking: the rows are already held in memory
+            self._track(key, size)
+        self.queue.put((rows, on_written, key, size), size)
+        self._report_depth()
+
+    def _track(self, key, size):
+        with self._lock:
+            current = self.inflight_bytes.get(key, 0) + size
+            if current:
+                self.inflight_bytes[key] = current
+            else:
+                self.inflight_bytes.pop(key, None)
+            if current > self.peak_inflight_bytes.get(key, 0):
+                self.peak_inflight_bytes[key] = current
+                if current > self.max_inflight_bytes:
+                    self.max_inflight_bytes = current
+                    metrics.set_gauge('write_stage.symbol_peak_bytes', current)
+
+    def peak_bytes(self):
+        """Peak in-flight bytes per key, as {key: bytes}"""
+        with self._lock:
+            return dict(self.peak_inflight_bytes)
+
+    def close(self, timeout=None):
+        """Signal the writers to stop and wait until every queued row is flushed.
+
+        Waits at most timeout seconds (close_timeout by default); returns
+        False, logging how many rows were left unwritten, if the writers
+        had not finished by then.
+        """
+        timeout = self.close_timeout if timeout is None else timeout
+        for _ in self.threads:
+            self.queue.put(_STOP, 0)
+        deadline = time.monotonic() + timeout
+        for thread in self.threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        running = [thread for thread in self.threads if thread.is_alive()]
+        self.threads = []
+        self._report_depth()
+        if running:
+            logger.error("%d writer threads still busy after %.0fs; %d queued rows (%d bytes) not written",
+                         len(running), timeout, self.undrained_rows(), self.queue.nbytes())
+            return False
+        return True
+
+    def undrained_rows(self):
+        """Rows still waiting in the queue"""
+        return sum(len(item[0]) for item in self.queue.items() if item is not _STOP)
+
+    def _report_depth(self):
+        metrics.set_gauge('write_stage.queue_items', self.queue.qsize())
+        metrics.set_gauge('write_stage.queue_bytes', self.queue.nbytes())
+
+    def _connect(self):
+        try:
+            return self.db.engine.raw_connection()
+        except Exception as e:
+            # save_stock_data checks out a pooled connection per batch instead
+            logger.warning("Writer could not open a dedicated connection: %s", e)
+            return None
+
+    def _run(self):
+        connection = self._connect()
+        try:
+            while True:
+                item, enqueued_at = self.queue.get()
+                if item is _STOP:
+                    break
+                rows, on_written, key, size = item
+                batch = list(rows)
+                callbacks = [on_written] if on_written else []
+                released = [(key, size)] if key is not None else []
+                oldest = enqueued_at
+                # Coalesce whatever else is already queued, up to batch_size rows
+                while len(batch) < self.batch_size:
+                    queued = self.queue.get_nowait()
+                    if queued is None:
+                        break
+                    (rows, on_written, key, size), queued_at = queued
+                    batch.extend(rows)
+                    if on_written:
+                        callbacks.append(on_written)
+                    if key is not None:
+                        released.append((key, size))
+                    oldest = min(oldest, queued_at)
+                connection = self._write(connection, batch, oldest, callbacks)
+                for key, size in released:
+                    self._track(key, -size)
+        finally:
+            if connection is not None:
+                connection.close()
+
+    def _write(self, connection, batch, enqueued_at, callbacks=()):
+        start = time.time()
+        try:
+            success = self.db.save_stock_data(batch, connection=connection)
+        except Exception as e:
+            logger.error("Batch save error: %s", e)
+            success = False
+        metrics.record_metric(
+            category='database_operations',
+            operation='save_batch',
+            duration=time.time() - start,
+            success=success
+        )
+        metrics.set_gauge('write_stage.lag_seconds', time.monotonic() - enqueued_at)
+        self._report_depth()
+        with self._lock:
+            if success:
+                self.rows_written += len(batch)
+            else:
+                self.rows_failed += len(batch)
+        metrics.increment('write_stage.rows_written' if success else 'write_stage.rows_failed', len(batch))
+        for on_written in callbacks:
+            try:
+                on_written(success)
+            except Exception as e:
+                logger.error("Write callback failed: %s", e)
+        if not success and connection is not None:
+            # The connection may be broken; replace it before the next batch
+            connection.invalidate()
+            connection = self._connect()
+        return connection
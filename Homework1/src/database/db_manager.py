@@ -1,37 +1,81 @@
-import os
-from dotenv import load_dotenv
-from sqlalchemy import UniqueConstraint, create_engine, text, MetaData, Table, Column, Integer, String, Date, Float, DateTime
+import logging
+import psycopg2
+from sqlalchemy import UniqueConstraint, text, MetaData, Table, Column, Integer, String, Date, Float, DateTime
 from sqlalchemy.exc import SQLAlchemyError
-from datetime import datetime
+from datetime import datetime, timedelta
 import time
-from sqlalchemy.pool import QueuePool
 from contextlib import contextmanager
 
+from src.database.engine_registry import get_engine
+from src.utils.performance_metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+STOCK_COLUMNS = (
+    'symbol', 'date', 'last_trade_price', 'max_price',
+    'min_price', 'avg_price', 'change_percentage',
+    'volume', 'turnover_best', 'total_turnover'
+)
+
+QUOTE_COLUMNS = (
+    'symbol', 'date', 'last_trade_price', 'change_percentage',
+    'volume', 'total_turnover'
+)
+
+# Keeps latest_quote on each symbol's newest row; the WHERE makes an older
+# chunk written after a newer one a no-op
+LATEST_QUOTE_UPSERT = f"""
+    ON CONFLICT (symbol) DO UPDATE SET
+        {', '.join(f"{column} = EXCLUDED.{column}" for column in QUOTE_COLUMNS[1:])},
+        updated_at = now()
+    WHERE latest_quote.date <= EXCLUDED.date
+"""
+
+class CopyStream:
+    """File-like object that renders rows as COPY text on demand,
+    so a batch is streamed to the server without building one big string"""
+    def __init__(self, rows):
+        self._lines = (self.format_row(row) for row in rows)
+        self._buffer = ''
+
+    @staticmethod
+    def format_value(value):
+        if value is None:
+            return '\\N'
+        if hasattr(value, 'isoformat'):
+            return value.isoformat()
+        return str(value)
+
+    @classmethod
+    def format_row(cls, row):
+        """Render a row dict or a STOCK_COLUMNS-ordered tuple as one COPY line"""
+        values = row if isinstance(row, tuple) else (row[column] for column in STOCK_COLUMNS)
+        return '\t'.join(cls.format_value(value) for value in values) + '\n'
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            line = next(self._lines, None)
+            if line is None:
+                break
+            self._buffer += line
+        if size < 0:
+            chunk, self._buffer = self._buffer, ''
+        else:
+            chunk, self._buffer = self._buffer[:size], self._buffer[size:]
+        return chunk
+
 class DatabaseManager:
-    def __init__(self):
-        load_dotenv()
-        self.engine = self._create_engine()
+    def __init__(self, use_copy=True, pool_size=None, max_overflow=None):
+        self.use_copy = use_copy
+        # One engine per process, shared by every DatabaseManager; the schema
+        # is migrated once when that engine is created
+        self.engine = get_engine(pool_size=pool_size, max_overflow=max_overflow)
         self.metadata = MetaData()
-        self.stock_data = self._create_table()
-
-    def _create_engine(self):
-        db_url = (
-            f"postgresql://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@"
-            f"{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
-            f"?sslmode={os.getenv('DB_SSL_MODE')}"
-        )
-        return create_engine(
-            db_url,
-            poolclass=QueuePool,
-            pool_size=30,
-            max_overflow=40,
-            pool_timeout=30,
-            pool_pre_ping=True,
-            pool_recycle=3600
-        )
+        self.stock_data = self._define_table()
 
-    def _create_table(self):
-        stock_data = Table(
+    def _define_table(self):
+        """stock_data as a SQLAlchemy Table; its DDL lives in migrations.py"""
+        return Table(
             'stock_data',
             self.metadata,
             Column('id', Integer, primary_key=True),
@@ -48,46 +92,80 @@ class DatabaseManager:
             Column('created_at', DateTime, default=datetime.utcnow),
             UniqueConstraint('symbol', 'date', name='unique_symbol_date')
         )
-        
-        try:
-            self.metadata.create_all(self.engine)
-            with self.engine.connect() as conn:
-                conn.execute(text("""
-                    CREATE INDEX IF NOT EXISTS idx_symbol_date 
-                    ON stock_data (symbol, date);
-                """))
-            print("Database table created successfully")
-        except SQLAlchemyError as e:
-            print(f"Error creating table: {e}")
-        return stock_data
 
-    def save_stock_data(self, data_rows):
+    def save_stock_data(self, data_rows, connection=None):
+        """Upsert rows into stock_data; rows are dicts or STOCK_COLUMNS-ordered
+        tuples, connection is an optional DBAPI connection owned by the
+        caller (e.g. a dedicated writer thread)"""
         if not data_rows:
             return True
 
-        # Prepare batch insert values
-        values = []
-        for row in data_rows:
-            try:
-                values.append({
-                    'symbol': row['symbol'],
-                    'date': row['date'],
-                    'last_trade_price': float(str(row['last_trade_price']).replace(',', '')),
-                    'max_price': float(str(row['max_price']).replace(',', '')),
-                    'min_price': float(str(row['min_price']).replace(',', '')),
-                    'avg_price': float(str(row['avg_price']).replace(',', '')),
-                    'change_percentage': float(str(row['change_percentage']).replace(',', '')),
-                    'volume': int(float(str(row['volume']).replace(',', ''))),
-                    'turnover_best': float(str(row['turnover_best']).replace(',', '')),
-                    'total_turnover': float(str(row['total_turnover']).replace(',', ''))
-                })
-            except (ValueError, TypeError) as e:
-                print(f"Error processing row: {e}")
-                continue
-
-        if not values:
+        # Rows arrive typed from the parser (floats, int volume, date);
+        # they are not re-parsed here
+        values = data_rows
+
+        if self.use_copy:
+            if self._copy_stock_data(values, connection):
+                return True
+            logger.warning("COPY load failed, falling back to batched INSERT")
+        return self._insert_stock_data(values)
+
+    def _copy_stock_data(self, values, connection=None):
+        """Stream a batch into the staging table with COPY and merge it into
+        stock_data with a single set-based upsert"""
+        columns = ', '.join(STOCK_COLUMNS)
+        updates = ',\n                '.join(
+            f"{column} = EXCLUDED.{column}" for column in STOCK_COLUMNS[2:]
+        )
+        quote_columns = ', '.join(QUOTE_COLUMNS)
+        # The DELETE only sees rows this transaction copied (other writers'
+        # staged rows are uncommitted and invisible), so concurrent loads
+        # never merge each other's data. DISTINCT ON keeps a batch that
+        # repeats a (symbol, date) from hitting the same row twice. The
+        # stock_data upsert runs as a CTE so the same statement can carry
+        # each symbol's newest row on to latest_quote.
+        merge_sql = f"""
+            WITH batch AS (
+                DELETE FROM stock_data_staging RETURNING {columns}
+            ), merged AS (
+                INSERT INTO stock_data ({columns})
+                SELECT DISTINCT ON (symbol, date) {columns}
+                FROM batch
+                ORDER BY symbol, date
+                ON CONFLICT (symbol, date) DO UPDATE SET
+                    {updates}
+            )
+            INSERT INTO latest_quote ({quote_columns})
+            SELECT DISTINCT ON (symbol) {quote_columns}
+            FROM batch
+            ORDER BY symbol, date DESC
+            {LATEST_QUOTE_UPSERT}
+        """
+
+        metrics.increment('db.round_trips')
+        owns_connection = connection is None
+        if owns_connection:
+            connection = self.engine.raw_connection()
+        try:
+            with connection.cursor() as cursor:
+                cursor.copy_expert(
+                    f"COPY stock_data_staging ({columns}) FROM STDIN",
+                    CopyStream(values)
+                )
+                cursor.execute(merge_sql)
+            connection.commit()
+            logger.debug("Saved %d records to database (COPY)", len(values))
             return True
+        except psycopg2.Error as e:
+            connection.rollback()
+            logger.error("Error in COPY load: %s", e)
+            return False
+        finally:
+            if owns_connection:
+                connection.close()
 
+    def _insert_stock_data(self, values):
+        """Fallback path: executemany of INSERT ... ON CONFLICT DO UPDATE"""
         # Use a simpler batch insert query
         query = text("""
             INSERT INTO stock_data (
@@ -111,25 +189,43 @@ class DatabaseManager:
                 total_turnover = EXCLUDED.total_turnover
         """)
 
+        # executemany binds by name, so compact tuple rows become dicts here
+        values = [
+            dict(zip(STOCK_COLUMNS, row)) if isinstance(row, tuple) else row
+            for row in values
+        ]
+        quote_query = text(f"""
+            INSERT INTO latest_quote ({', '.join(QUOTE_COLUMNS)})
+            VALUES ({', '.join(':' + column for column in QUOTE_COLUMNS)})
+            {LATEST_QUOTE_UPSERT}
+        """)
+        newest = {}
+        for row in values:
+            if row['symbol'] not in newest or row['date'] > newest[row['symbol']]['date']:
+                newest[row['symbol']] = row
+
         max_retries = 3
         retry_delay = 0.2
 
         for attempt in range(max_retries):
             try:
+                metrics.increment('db.round_trips')
                 with self.engine.begin() as connection:
                     connection.execute(query, values)
-                print(f"Saved {len(values)} records to database")
+                    connection.execute(quote_query, list(newest.values()))
+                logger.debug("Saved %d records to database", len(values))
                 return True
             except SQLAlchemyError as e:
                 if attempt < max_retries - 1:
                     time.sleep(retry_delay)
                     retry_delay *= 1.5
                     continue
-                print(f"Error saving to database: {e}")
+                logger.error("Error saving to database: %s", e)
                 return False
 
     def get_last_date(self, symbol):
         try:
+            metrics.increment('db.round_trips')
             with self.engine.connect() as connection:
                 query = text("""
                     SELECT MAX(date) 
@@ -139,7 +235,202 @@ class DatabaseManager:
                 result = connection.execute(query, {"symbol": symbol})
                 return result.scalar()
         except SQLAlchemyError as e:
-            print(f"Error getting last date: {e}")
+            logger.error("Error getting last date: %s", e)
+            return None
+
+    def get_symbol_stats(self):
+        """First date, last date and row count of every symbol, in one GROUP BY query"""
+        try:
+            metrics.increment('db.round_trips')
+            with self.engine.connect() as connection:
+                result = connection.execute(text("""
+                    SELECT symbol, MIN(date), MAX(date), COUNT(*)
+                    FROM stock_data
+                    GROUP BY symbol
+                """))
+                return {
+                    symbol: (first_date, last_date, row_count)
+                    for symbol, first_date, last_date, row_count in result
+                }
+        except SQLAlchemyError as e:
+            logger.error("Error getting symbol stats: %s", e)
+            return None
+
+    def get_date_gaps(self, since, min_gap_days=7):
+        """Holes in every symbol's stored history since a date, in one window query.
+
+        Returns {symbol: [(first_missing_day, last_missing_day), ...]} for each
+        pair of consecutive stored dates more than min_gap_days apart; the
+        watermark service then drops holes that are normal for the symbol.
+        """
+        try:
+            metrics.increment('db.round_trips')
+            with self.engine.connect() as connection:
+                result = connection.execute(text("""
+                    SELECT symbol, previous_date, date
+                    FROM (
+                        SELECT symbol, date,
+                               LAG(date) OVER (PARTITION BY symbol ORDER BY date) AS previous_date
+                        FROM stock_data
+                        WHERE date >= :since
+                    ) ordered
+                    WHERE date - previous_date > :min_gap_days
+                    ORDER BY symbol, date
+                """), {"since": since, "min_gap_days": min_gap_days})
+                gaps = {}
+                for symbol, previous_date, next_date in result:
+                    gaps.setdefault(symbol, []).append(
+                        (previous_date + timedelta(days=1), next_date - timedelta(days=1))
+                    )
+                return gaps
+        except SQLAlchemyError as e:
+            logger.error("Error finding date gaps: %s", e)
+            return None
+
+    def get_symbol_registry(self):
+        """Every registered symbol with its last stored trading day, in one query.
+
+        Returns {symbol: (first_seen, last_seen, refreshed_at, last_traded)};
+        last_traded is one index lookup per symbol on idx_symbol_date.
+        """
+        try:
+            metrics.increment('db.round_trips')
+            with self.engine.connect() as connection:
+                result = connection.execute(text("""
+                    SELECT r.symbol, r.first_seen, r.last_seen, r.refreshed_at,
+                           (SELECT MAX(s.date) FROM stock_data s WHERE s.symbol = r.symbol)
+                    FROM symbol_registry r
+                """))
+                return {
+                    symbol: (first_seen, last_seen, refreshed_at, last_traded)
+                    for symbol, first_seen, last_seen, refreshed_at, last_traded in result
+                }
+        except SQLAlchemyError as e:
+            logger.error("Error reading symbol registry: %s", e)
+            return None
+
+    def record_symbols(self, symbols, seen_on, refreshed_at=None):
+        """Upsert the symbols listed on the site; new ones get first_seen = seen_on"""
+        if not symbols:
+            return True
+        refreshed_at = refreshed_at or datetime.now()
+        try:
+            metrics.increment('db.round_trips')
+            with self.engine.begin() as connection:
+                connection.execute(text("""
+                    INSERT INTO symbol_registry (symbol, first_seen, last_seen, refreshed_at)
+                    VALUES (:symbol, :seen_on, :seen_on, :refreshed_at)
+                    ON CONFLICT (symbol) DO UPDATE
+                    SET last_seen = EXCLUDED.last_seen, refreshed_at = EXCLUDED.refreshed_at
+                """), [
+                    {"symbol": symbol, "seen_on": seen_on, "refreshed_at": refreshed_at}
+                    for symbol in symbols
+                ])
+            return True
+        except SQLAlchemyError as e:
+            logger.error("Error updating symbol registry: %s", e)
+            return False
+
+    def refresh_market_overview(self, symbols=None, window_days=30):
+        """Recompute market_overview_snapshot rows from stock_data.
+
+        Only the given symbols are recomputed while the snapshot's window
+        still starts window_days before today; once the day rolls over (or
+        when symbols is None) every row is rebuilt. Returns the number of
+        snapshot rows written, or None on error.
+        """
+        try:
+            metrics.increment('db.round_trips')
+            with self.engine.begin() as connection:
+                window_start = connection.execute(text(
+                    "SELECT MIN(window_start) FROM market_overview_snapshot"
+                )).scalar()
+                full = symbols is None or window_start != datetime.now().date() - timedelta(days=window_days)
+                params = {"window_days": window_days}
+                scope = ""
+                if not full:
+                    scope = "AND symbol = ANY(:symbols)"
+                    params["symbols"] = list(symbols)
+                connection.execute(text(f"""
+                    DELETE FROM market_overview_snapshot WHERE TRUE {scope}
+                """), params)
+                # One pass per symbol: newest and oldest price in the window plus totals
+                result = connection.execute(text(f"""
+                    INSERT INTO market_overview_snapshot (
+                        symbol, current_price, start_price, price_change, total_volume,
+                        total_turnover, last_trade_date, window_start, refreshed_at
+                    )
+                    SELECT symbol, current_price, start_price,
+                           (current_price - start_price) / start_price * 100,
+                           total_volume, total_turnover, last_trade_date,
+                           CURRENT_DATE - :window_days, now()
+                    FROM (
+                        SELECT symbol,
+                               (ARRAY_AGG(last_trade_price ORDER BY date DESC))[1] AS current_price,
+                               (ARRAY_AGG(last_trade_price ORDER BY date ASC))[1] AS start_price,
+                               SUM(volume) AS total_volume,
+                               SUM(volume * last_trade_price) AS total_turnover,
+                               MAX(date) AS last_trade_date
+                        FROM stock_data
+                        WHERE date >= CURRENT_DATE - :window_days {scope}
+                        GROUP BY symbol
+                    ) windowed
+                    WHERE current_price > 0 AND start_price > 0
+                """), params)
+                logger.info("Refreshed market overview for %s (%d rows)",
+                            "all symbols" if full else f"{len(symbols)} symbols", result.rowcount)
+                return result.rowcount
+        except SQLAlchemyError as e:
+            logger.error("Error refreshing market overview: %s", e)
+            return None
+
+    def refresh_popularity(self):
+        """Rank latest_quote symbols by turnover over the market overview
+        window (rank 1 is the most traded); symbols without a snapshot row
+        get no rank. Returns the number of ranked symbols, or None on error.
+        """
+        try:
+            metrics.increment('db.round_trips')
+            with self.engine.begin() as connection:
+                result = connection.execute(text("""
+                    UPDATE latest_quote quote
+                    SET turnover_30d = ranked.total_turnover,
+                        popularity_rank = ranked.popularity_rank
+                    FROM (
+                        SELECT q.symbol, s.total_turnover,
+                               CASE WHEN s.symbol IS NOT NULL THEN ROW_NUMBER() OVER (
+                                   ORDER BY s.total_turnover DESC NULLS LAST, q.symbol
+                               ) END AS popularity_rank
+                        FROM latest_quote q
+                        LEFT JOIN market_overview_snapshot s ON s.symbol = q.symbol
+                    ) ranked
+                    WHERE quote.symbol = ranked.symbol
+                    RETURNING ranked.popularity_rank
+                """))
+                ranked = sum(1 for row in result if row[0] is not None)
+                logger.info("Ranked %d symbols by recent turnover", ranked)
+                return ranked
+        except SQLAlchemyError as e:
+            logger.error("Error refreshing popularity ranking: %s", e)
+            return None
+
+    def bump_data_version(self):
+        """Advance data_version so API response caches drop their entries.
+
+        Returns the new version, or None on error.
+        """
+        try:
+            metrics.increment('db.round_trips')
+            with self.engine.begin() as connection:
+                version = connection.execute(text("""
+                    UPDATE data_version SET version = version + 1, updated_at = now()
+                    WHERE id = 1
+                    RETURNING version
+                """)).scalar()
+                logger.info("Data version is now %s", version)
+                return version
+        except SQLAlchemyError as e:
+            logger.error("Error bumping data version: %s", e)
             return None
 
     def test_connection(self):
@@ -148,5 +439,5 @@ class DatabaseManager:
                 result = connection.execute(text("SELECT 1"))
                 return True
         except SQLAlchemyError as e:
-            print(f"Database connection error: {e}")
+            logger.error("Database connection error: %s", e)
             return False
\ No newline at end of file
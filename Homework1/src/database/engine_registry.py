@@ -0,0 +1,136 @@
+import logging
+import os
+import threading
+import time
+
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.pool import QueuePool
+
+from src.database.migrations import migrate
+from src.utils.performance_metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Connections held outside the writers: planning, registry and fallback queries
+CONTROL_CONNECTIONS = 2
+
+_engines = {}
+_lock = threading.Lock()
+
+def database_url():
+    load_dotenv()
+    return (
+        f"postgresql://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@"
+        f"{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
+        f"?sslmode={os.getenv('DB_SSL_MODE')}"
+    )
+
+def pool_size_for(writer_threads, fetch_concurrency=0):
+    """(pool_size, max_overflow) for a pipeline.
+
+    Each writer thread holds one dedicated connection and the planner and
+    symbol registry need a couple more. Fetch threads never touch the
+    database, so fetch_concurrency only bounds the overflow: at most one
+    extra checkout per writer (the per-batch fallback when a writer's own
+    connection is lost), never more than there are fetchers feeding them.
+    """
+    pool_size = writer_threads + CONTROL_CONNECTIONS
+    max_overflow = min(writer_threads, fetch_concurrency) if fetch_concurrency else writer_threads
+    return pool_size, max_overflow
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection"""
+    def _do_get(self):
+        start = time.perf_counter()
+        success = False
+        try:
+            connection = super()._do_get()
+            success = True
+            return connection
+        finally:
+            metrics.record_metric(
+                category='db_pool_checkout',
+                operation='checkout',
+                duration=time.perf_counter() - start,
+                success=success
+            )
+
+def _instrument(engine, pool_size, max_overflow):
+    """Keep connection gauges current from pool events"""
+    metrics.set_gauge('db.pool.size', pool_size)
+    metrics.set_gauge('db.pool.max_connections', pool_size + max_overflow)
+    # Counted here rather than read from the pool, whose own counts are
+    # only updated after the checkin event fires
+    counts = {'db.pool.connections': 0, 'db.pool.checked_out': 0}
+    counts_lock = threading.Lock()
+
+    def count(gauge, delta):
+        with counts_lock:
+            counts[gauge] += delta
+            metrics.set_gauge(gauge, counts[gauge])
+
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        metrics.increment('db.connections_opened')
+        count('db.pool.connections', 1)
+
+    @event.listens_for(engine, 'close')
+    def on_close(dbapi_connection, connection_record):
+        metrics.increment('db.connections_closed')
+        count('db.pool.connections', -1)
+
+    @event.listens_for(engine, 'checkout')
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        count('db.pool.checked_out', 1)
+
+    @event.listens_for(engine, 'checkin')
+    def on_checkin(dbapi_connection, connection_record):
+        count('db.pool.checked_out', -1)
+
+def get_engine(url=None, pool_size=None, max_overflow=None, run_migrations=True):
+    """The process-wide engine for url, created on first use.
+
+    Every DatabaseManager in the process shares it, so the number of
+    Postgres connections is bounded by one pool no matter how many
+    managers exist. The first caller's sizing wins; pending schema
+    migrations run once, when the engine is created.
+    """
+    url = url or database_url()
+    with _lock:
+        engine = _engines.get(url)
+        if engine is not None:
+            if pool_size is not None and pool_size > engine.pool.size():
+                logger.warning("Engine already created with pool_size=%d; ignoring pool_size=%d",
+                               engine.pool.size(), pool_size)
+            return engine
+
+        default_size, default_overflow = pool_size_for(writer_threads=2)
+        pool_size = default_size if pool_size is None else pool_size
+        max_overflow = default_overflow if max_overflow is None else max_overflow
+        engine = create_engine(
+            url,
+            poolclass=InstrumentedQueuePool,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=30,
+            pool_pre_ping=True,
+            pool_recycle=3600
+        )
+        _instrument(engine, pool_size, max_overflow)
+        if run_migrations:
+            try:
+                migrate(engine)
+            except SQLAlchemyError as e:
+                logger.error("Error applying migrations: %s", e)
+        _engines[url] = engine
+        logger.debug("Created engine (pool_size=%d, max_overflow=%d)", pool_size, max_overflow)
+        return engine
+
+def dispose_engines():
+    """Close every pooled connection, e.g. before forking or at exit"""
+    with _lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
@@ -0,0 +1,165 @@
+"""Schema for the ingestion tables, applied once per database.
+
+Each migration runs at most once: applied versions are recorded in
+schema_migrations, and a transaction-scoped advisory lock keeps pipelines
+starting at the same time (e.g. sharded workers) from racing each other.
+
+    python -m src.database.migrations
+"""
+import logging
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary constant identifying this schema's advisory lock
+MIGRATION_LOCK_KEY = 7_351_202_401
+
+MIGRATIONS = (
+    (1, 'stock_data', (
+        """
+        CREATE TABLE IF NOT EXISTS stock_data (
+            id SERIAL PRIMARY KEY,
+            symbol VARCHAR(10) NOT NULL,
+            date DATE NOT NULL,
+            last_trade_price DOUBLE PRECISION,
+            max_price DOUBLE PRECISION,
+            min_price DOUBLE PRECISION,
+            avg_price DOUBLE PRECISION,
+            change_percentage DOUBLE PRECISION,
+            volume INTEGER,
+            turnover_best DOUBLE PRECISION,
+            total_turnover DOUBLE PRECISION,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            CONSTRAINT unique_symbol_date UNIQUE (symbol, date)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_symbol_date ON stock_data (symbol, date)",
+    )),
+    # Unlogged staging table for COPY loads: no WAL, no indexes
+    (2, 'stock_data_staging', (
+        """
+        CREATE UNLOGGED TABLE IF NOT EXISTS stock_data_staging (
+            symbol VARCHAR(10) NOT NULL,
+            date DATE NOT NULL,
+            last_trade_price DOUBLE PRECISION,
+            max_price DOUBLE PRECISION,
+            min_price DOUBLE PRECISION,
+            avg_price DOUBLE PRECISION,
+            change_percentage DOUBLE PRECISION,
+            volume INTEGER,
+            turnover_best DOUBLE PRECISION,
+            total_turnover DOUBLE PRECISION
+        )
+        """,
+    )),
+    # Symbols listed on the site, refreshed at most once per TTL
+    (3, 'symbol_registry', (
+        """
+        CREATE TABLE IF NOT EXISTS symbol_registry (
+            symbol VARCHAR(10) PRIMARY KEY,
+            first_seen DATE NOT NULL,
+            last_seen DATE NOT NULL,
+            refreshed_at TIMESTAMP NOT NULL
+        )
+        """,
+    )),
+    # /api/stocks/market-overview, precomputed by refresh_market_overview()
+    (4, 'market_overview_snapshot', (
+        """
+        CREATE TABLE IF NOT EXISTS market_overview_snapshot (
+            symbol VARCHAR(10) PRIMARY KEY,
+            current_price DOUBLE PRECISION NOT NULL,
+            start_price DOUBLE PRECISION NOT NULL,
+            price_change DOUBLE PRECISION NOT NULL,
+            total_volume BIGINT,
+            total_turnover DOUBLE PRECISION,
+            last_trade_date DATE NOT NULL,
+            window_start DATE NOT NULL,
+            refreshed_at TIMESTAMP NOT NULL
+        )
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_market_overview_price_change
+        ON market_overview_snapshot (price_change DESC)
+        """,
+    )),
+    # Bumped after each run so API response caches know to drop stale entries
+    (5, 'data_version', (
+        """
+        CREATE TABLE IF NOT EXISTS data_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version BIGINT NOT NULL,
+            updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        "INSERT INTO data_version (id, version) VALUES (1, 0) ON CONFLICT (id) DO NOTHING",
+    )),
+    # Newest row per symbol, upserted by every write; popularity_rank orders
+    # symbols by 30-day turnover and is set by refresh_popularity()
+    (6, 'latest_quote', (
+        """
+        CREATE TABLE IF NOT EXISTS latest_quote (
+            symbol VARCHAR(10) PRIMARY KEY,
+            date DATE NOT NULL,
+            last_trade_price DOUBLE PRECISION,
+            change_percentage DOUBLE PRECISION,
+            volume INTEGER,
+            total_turnover DOUBLE PRECISION,
+            turnover_30d DOUBLE PRECISION,
+            popularity_rank INTEGER,
+            updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_latest_quote_popularity
+        ON latest_quote (popularity_rank) WHERE popularity_rank IS NOT NULL
+        """,
+        # One-off backfill from the existing history
+        """
+        INSERT INTO latest_quote (
+            symbol, date, last_trade_price, change_percentage, volume, total_turnover
+        )
+        SELECT DISTINCT ON (symbol)
+            symbol, date, last_trade_price, change_percentage, volume, total_turnover
+        FROM stock_data
+        ORDER BY symbol, date DESC
+        ON CONFLICT (symbol) DO NOTHING
+        """,
+    )),
+)
+
+def pending_migrations(applied):
+    """Migrations whose version is not in applied, in order"""
+    return [migration for migration in MIGRATIONS if migration[0] not in applied]
+
+def migrate(engine):
+    """Apply every pending migration; returns the versions applied"""
+    with engine.begin() as connection:
+        connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        connection.execute(text("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                name VARCHAR(100) NOT NULL,
+                applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+        """))
+        applied = {row[0] for row in connection.execute(text("SELECT version FROM schema_migrations"))}
+        versions = []
+        for version, name, statements in pending_migrations(applied):
+            for statement in statements:
+                connection.execute(text(statement))
+            connection.execute(
+                text("INSERT INTO schema_migrations (version, name) VALUES (:version, :name)"),
+                {"version": version, "name": name}
+            )
+            logger.info("Applied migration %d (%s)", version, name)
+            versions.append(version)
+    return versions
+
+if __name__ == "__main__":
+    from src.database.engine_registry import get_engine
+
+    logging.basicConfig(level=logging.INFO)
+    applied = migrate(get_engine(run_migrations=False))
+    logger.info("Schema up to date (%d migrations applied)", len(applied))
@@ -1,93 +1,72 @@
+import asyncio
+import logging
+import os
+import aiohttp
 import requests
 from bs4 import BeautifulSoup
-from datetime import datetime
 from requests.sessions import Session
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 import time
-import json
-import os
-import hashlib
-import pandas as pd
+
+from src.parsers.history_table_parser import (
+    ROW_FIELDS, columns_to_tuples, decode_columns,
+    parse_date, parse_history_columns, parse_number
+)
+from src.models.stock_row import StockBatch
+from src.sinks.artifact_sink import ArtifactSink
+from src.utils.file_naming import chunk_basename
+from src.utils.http_cache import HttpCache
+from src.utils.performance_metrics import metrics
+from src.utils.rate_limiter import rate_limiter as shared_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+# Site root; point it at a local stand-in (benchmarks/fake_mse_server.py) for tests and benchmarks
+MSE_BASE_URL = os.getenv('MSE_BASE_URL', 'https://www.mse.mk')
 
 class DataFetcherFilter:
-    def __init__(self):
-        self.base_url = "https://www.mse.mk/en/stats/symbolhistory"
+    PARSERS = ('lxml', 'bs4')
+
+    def __init__(self, rate_limiter=None, parser='lxml', artifact_sink=None, http_cache=None,
+                 base_url=None, compact_rows=False):
+        if parser not in self.PARSERS:
+            raise ValueError(f"Unknown parser '{parser}', expected one of {self.PARSERS}")
+        self.base_url = f"{(base_url or MSE_BASE_URL).rstrip('/')}/en/stats/symbolhistory"
+        self.parser = parser
+        # Compact rows come back as one StockBatch per page instead of row dicts
+        self.compact_rows = compact_rows
+        self.rate_limiter = rate_limiter or shared_rate_limiter
+        # 429/503 are left to the rate limiter so it can back off
         self.retry_strategy = Retry(
             total=5,
             backoff_factor=0.5,
-            status_forcelist=[500, 502, 503, 504, 429],
+            status_forcelist=[500, 502, 504],
             allowed_methods=["GET"]
         )
         self.timeout = (5, 15)
+        self.async_timeout = aiohttp.ClientTimeout(sock_connect=5, sock_read=15)
         
-        # Ensure directories exist
-        self.raw_dir = os.path.join("data", "raw")
-        self.processed_dir = os.path.join("data", "processed")
-        os.makedirs(self.raw_dir, exist_ok=True)
-        os.makedirs(self.processed_dir, exist_ok=True)
-        os.makedirs("data/csv", exist_ok=True)  # Create csv directory
+        # Raw pages and parsed rows are handed to the sink's background writer
+        self.artifact_sink = artifact_sink or ArtifactSink()
+        # Optional on-disk HttpCache; None always goes to the network
+        self.http_cache = http_cache
 
     def _generate_filename(self, symbol, start_date, end_date):
         """Generate a unique filename for the data"""
-        date_str = f"{start_date.strftime('%Y%m%d')}-{end_date.strftime('%Y%m%d')}"
-        hash_str = hashlib.md5(f"{symbol}-{date_str}".encode()).hexdigest()[:8]
-        return f"{symbol}_{date_str}_{hash_str}"
-
-    def _save_raw_data(self, symbol, start_date, end_date, content):
-        """Save raw HTML content"""
-        filename = self._generate_filename(symbol, start_date, end_date)
-        filepath = os.path.join(self.raw_dir, f"{filename}.html")
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(content)
-
-    def _format_price(self, value):
-        """Format price with proper separators"""
-        try:
-            formatted = f"{float(value):,.2f}"
-            return formatted.replace(",", "X").replace(".", ",").replace("X", ".")
-        except (ValueError, TypeError):
-            return "0,00"
+        return chunk_basename(symbol, start_date, end_date)
 
-    def _format_number(self, value):
-        """Format whole numbers"""
+    def process(self, input_data, session=None):
+        """Fetch and parse one chunk; any error is logged and yields no rows"""
         try:
-            return f"{int(float(value)):,}".replace(",", ".")
-        except (ValueError, TypeError):
-            return "0"
-
-    def _save_to_csv(self, symbol, data):
-        """Save data to CSV format"""
-        columns = ['Date', 'Last trade price', 'Max', 'Min', 'Avg. Price', 
-                  '%chg.', 'Volume', 'Turnover in BEST', 'Total turnover']
-        
-        csv_data = []
-        for row in data:
-            csv_row = [
-                row['date'].strftime('%d.%m.%Y'),
-                self._format_price(row['last_trade_price']),
-                self._format_price(row['max_price']),
-                self._format_price(row['min_price']),
-                self._format_price(row['avg_price']),
-                self._format_price(row['change_percentage']),
-                self._format_number(row['volume']),
-                self._format_number(row['turnover_best']),
-                self._format_number(row['total_turnover'])
-            ]
-            csv_data.append(csv_row)
-
-        df = pd.DataFrame(csv_data, columns=columns)
-        filepath = f"data/csv/{symbol}.csv"
-        df.to_csv(filepath, index=False)
-
-    def _save_processed_data(self, symbol, start_date, end_date, data):
-        """Save processed data as JSON"""
-        filename = self._generate_filename(symbol, start_date, end_date)
-        filepath = os.path.join(self.processed_dir, f"{filename}.json")
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, default=str, indent=2)
+            return self.fetch(input_data, session)
+        except Exception as e:
+            logger.error("Error fetching data for %s: %s", input_data['symbol'], e)
+            return []
 
-    def process(self, input_data, session=None):
+    def fetch(self, input_data, session=None):
+        """Fetch and parse one chunk, raising on failure so callers can tell
+        a failed chunk from one that has no rows"""
         if session is None:
             session = self._create_session()
         
@@ -95,103 +74,232 @@ class DataFetcherFilter:
         start_date = input_data['start_date']
         end_date = input_data['end_date']
 
+        url, params = self._build_request(symbol, start_date, end_date)
+
+        logger.debug("Fetching data for %s from %s to %s", symbol, start_date, end_date)
+
+        cached = self._cache_lookup(symbol, start_date, end_date)
+        if cached is not None and cached.fresh:
+            self.http_cache.record_hit(cached)
+            return self._handle_response(symbol, start_date, end_date, cached.body)
+        headers = HttpCache.validators(cached) if cached is not None else {}
+
+        # Add exponential backoff for retries
+        response_content = None
+        for attempt in range(3):
+            try:
+                self.rate_limiter.acquire(url)
+                metrics.increment('fetch.requests')
+                request_start = time.time()
+                logger.debug("Making request for %s (attempt %d)", symbol, attempt + 1)
+                response = session.get(url, params=params, headers=headers, timeout=self.timeout)
+                request_duration = time.time() - request_start
+                logger.debug("Request for %s completed in %.2fs (Status: %d)",
+                             symbol, request_duration, response.status_code)
+                metrics.record_metric(
+                    category='network_requests',
+                    operation='fetch_history',
+                    duration=request_duration,
+                    success=response.status_code < 400
+                )
+                self.rate_limiter.record_response(
+                    url, response.status_code, response.headers.get('Retry-After')
+                )
+                if response.status_code == 304:
+                    if cached is None:
+                        # Nothing was sent to revalidate; retry for a full page
+                        raise requests.exceptions.HTTPError(
+                            "304 Not Modified without a cached copy", response=response
+                        )
+                    self.http_cache.record_revalidated(cached)
+                    response_content = cached.body
+                    break
+                response.raise_for_status()
+                response_content = response.text
+                self._cache_store(symbol, start_date, end_date, response_content, response.headers)
+                break
+            except requests.exceptions.RequestException as e:
+                logger.warning("Request failed for %s (attempt %d): %s", symbol, attempt + 1, e)
+                if attempt == 2:
+                    raise
+                wait_time = (2 ** attempt) * 0.5
+                logger.debug("Waiting %ss before retry", wait_time)
+                time.sleep(wait_time)
+
+        if not response_content:
+            return []
+
+        return self._handle_response(symbol, start_date, end_date, response_content)
+
+    async def process_async(self, input_data, session, parse_executor=None):
+        """Async counterpart of process() that fetches through a shared aiohttp session
+        and hands the CPU-bound parsing to parse_executor"""
         try:
-            url = f"{self.base_url}/{symbol}"
-            params = {
-                'fromDate': start_date.strftime('%m/%d/%Y'),
-                'toDate': end_date.strftime('%m/%d/%Y')
-            }
-
-            print(f"[{datetime.now().strftime('%H:%M:%S.%f')}] Fetching data for {symbol} "
-                  f"from {start_date} to {end_date}")
-
-            # Add exponential backoff for retries
-            response_content = None
-            for attempt in range(3):
-                try:
-                    request_start = time.time()
-                    print(f"[{datetime.now().strftime('%H:%M:%S.%f')}] Making request for {symbol} (attempt {attempt + 1})")
-                    response = session.get(url, params=params, timeout=self.timeout)
+            return await self.fetch_async(input_data, session, parse_executor)
+        except Exception as e:
+            logger.error("Error fetching data for %s: %s", input_data['symbol'], e)
+            return []
+
+    async def fetch_async(self, input_data, session, parse_executor=None):
+        """Async counterpart of fetch(); raises on failure"""
+        symbol = input_data['symbol']
+        start_date = input_data['start_date']
+        end_date = input_data['end_date']
+
+        url, params = self._build_request(symbol, start_date, end_date)
+
+        logger.debug("Fetching data for %s from %s to %s", symbol, start_date, end_date)
+
+        loop = asyncio.get_running_loop()
+        cached = await loop.run_in_executor(None, self._cache_lookup, symbol, start_date, end_date)
+        if cached is not None and cached.fresh:
+            self.http_cache.record_hit(cached)
+            return await loop.run_in_executor(
+                parse_executor, self._handle_response,
+                symbol, start_date, end_date, cached.body
+            )
+        headers = HttpCache.validators(cached) if cached is not None else {}
+
+        response_content = None
+        for attempt in range(3):
+            try:
+                await self.rate_limiter.acquire_async(url)
+                metrics.increment('fetch.requests')
+                request_start = time.time()
+                async with session.get(url, params=params, headers=headers,
+                                       timeout=self.async_timeout) as response:
                     request_duration = time.time() - request_start
-                    print(f"[{datetime.now().strftime('%H:%M:%S.%f')}] Request for {symbol} completed in {request_duration:.2f}s "
-                          f"(Status: {response.status_code})")
+                    logger.debug("Request for %s completed in %.2fs (Status: %d)",
+                                 symbol, request_duration, response.status)
+                    metrics.record_metric(
+                        category='network_requests',
+                        operation='fetch_history_async',
+                        duration=request_duration,
+                        success=response.status < 400
+                    )
+                    self.rate_limiter.record_response(
+                        url, response.status, response.headers.get('Retry-After')
+                    )
+                    if response.status == 304:
+                        if cached is None:
+                            # Nothing was sent to revalidate; retry for a full page
+                            raise aiohttp.ClientError("304 Not Modified without a cached copy")
+                        self.http_cache.record_revalidated(cached)
+                        response_content = cached.body
+                        break
                     response.raise_for_status()
-                    response_content = response.text
-                    self._save_raw_data(symbol, start_date, end_date, response_content)
-                    break
-                except requests.exceptions.RequestException as e:
-                    print(f"[{datetime.now().strftime('%H:%M:%S.%f')}] Request failed for {symbol} (attempt {attempt + 1}): {e}")
-                    if attempt == 2:
-                        raise
-                    wait_time = (2 ** attempt) * 0.5
-                    print(f"[{datetime.now().strftime('%H:%M:%S.%f')}] Waiting {wait_time}s before retry")
-                    time.sleep(wait_time)
-
-            if not response_content:
-                return []
-
-            parse_start = time.time()
-            print(f"[{datetime.now().strftime('%H:%M:%S.%f')}] Parsing response for {symbol}")
-            soup = BeautifulSoup(response_content, 'html.parser')
-            table = soup.find('table')
-            if not table:
-                print(f"[{datetime.now().strftime('%H:%M:%S.%f')}] No data found for {symbol}")
-                return []
-
-            # Process rows in batches
-            batch_size = 100
-            data = []
-            rows = table.find_all('tr')[1:]  # Skip header row
-            print(f"[{datetime.now().strftime('%H:%M:%S.%f')}] Found {len(rows)} rows for {symbol}")
-            
-            for i in range(0, len(rows), batch_size):
-                batch_start = time.time()
-                batch_rows = rows[i:i + batch_size]
-                print(f"[{datetime.now().strftime('%H:%M:%S.%f')}] Processing batch {i//batch_size + 1} "
-                      f"of {(len(rows) + batch_size - 1)//batch_size} for {symbol}")
-                batch_data = self._process_rows(batch_rows, symbol)
-                data.extend(batch_data)
-                batch_duration = time.time() - batch_start
-                print(f"[{datetime.now().strftime('%H:%M:%S.%f')}] Batch {i//batch_size + 1} for {symbol} "
-                      f"processed in {batch_duration:.2f}s")
-
-            if data:
-                self._save_processed_data(symbol, start_date, end_date, data)
-                self._save_to_csv(symbol, data)
-
-            parse_duration = time.time() - parse_start
-            print(f"[{datetime.now().strftime('%H:%M:%S.%f')}] Completed parsing {symbol} in {parse_duration:.2f}s - "
-                  f"Found {len(data)} records")
-            return data
+                    response_content = await response.text()
+                    response_headers = response.headers
+                await loop.run_in_executor(
+                    None, self._cache_store,
+                    symbol, start_date, end_date, response_content, response_headers
+                )
+                break
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.warning("Request failed for %s (attempt %d): %s", symbol, attempt + 1, e)
+                if attempt == 2:
+                    raise
+                wait_time = (2 ** attempt) * 0.5
+                logger.debug("Waiting %ss before retry", wait_time)
+                await asyncio.sleep(wait_time)
 
-        except Exception as e:
-            print(f"[{datetime.now().strftime('%H:%M:%S.%f')}] Error fetching data for {symbol}: {e}")
+        if not response_content:
             return []
 
+        return await loop.run_in_executor(
+            parse_executor, self._handle_response,
+            symbol, start_date, end_date, response_content
+        )
+
+    def _cache_lookup(self, symbol, start_date, end_date):
+        if self.http_cache is None:
+            return None
+        return self.http_cache.lookup(symbol, start_date, end_date)
+
+    def _cache_store(self, symbol, start_date, end_date, content, headers):
+        # An empty body is never a valid history page; don't let it be revalidated forever
+        if self.http_cache is None or not content:
+            return
+        self.http_cache.record_miss()
+        self.http_cache.store(
+            symbol, start_date, end_date, content,
+            etag=headers.get('ETag'), last_modified=headers.get('Last-Modified')
+        )
+
+    def _build_request(self, symbol, start_date, end_date):
+        """Build the history URL and query parameters for a date range"""
+        url = f"{self.base_url}/{symbol}"
+        params = {
+            'fromDate': start_date.strftime('%m/%d/%Y'),
+            'toDate': end_date.strftime('%m/%d/%Y')
+        }
+        return url, params
+
+    def _handle_response(self, symbol, start_date, end_date, response_content):
+        """Queue the raw page for the artifact sink and parse it into records"""
+        self.artifact_sink.submit_raw(symbol, start_date, end_date, response_content)
+
+        parse_start = time.time()
+        logger.debug("Parsing response for %s (%s)", symbol, self.parser)
+        data = self.parse_page(symbol, response_content)
+
+        if data:
+            self.artifact_sink.submit_records(symbol, start_date, end_date, data)
+
+        parse_duration = time.time() - parse_start
+        logger.debug("Completed parsing %s in %.2fs - Found %d records", symbol, parse_duration, len(data))
+        return data
+
+    def parse_page(self, symbol, response_content):
+        """Parse a history page into row dicts (or compact tuples) with the configured parser"""
+        if self.parser == 'bs4':
+            return self._parse_page_bs4(symbol, response_content)
+        return self._columns_to_rows(symbol, parse_history_columns(response_content))
+
+    def _columns_to_rows(self, symbol, columns):
+        """Build rows from decoded columns; values are already typed"""
+        if self.compact_rows:
+            return StockBatch.from_columns(symbol, columns)
+        return [
+            {'symbol': symbol, **dict(zip(ROW_FIELDS, row))}
+            for row in columns_to_tuples(columns)
+        ]
+
+    def _parse_page_bs4(self, symbol, response_content):
+        """Original BeautifulSoup parser, kept behind parser='bs4'"""
+        soup = BeautifulSoup(response_content, 'html.parser')
+        table = soup.find('table')
+        if not table:
+            logger.debug("No data found for %s", symbol)
+            return []
+
+        # Process rows in batches
+        batch_size = 100
+        data = []
+        rows = table.find_all('tr')[1:]  # Skip header row
+        logger.debug("Found %d rows for %s", len(rows), symbol)
+
+        for i in range(0, len(rows), batch_size):
+            batch_start = time.time()
+            batch_rows = rows[i:i + batch_size]
+            logger.debug("Processing batch %d of %d for %s",
+                         i // batch_size + 1, (len(rows) + batch_size - 1) // batch_size, symbol)
+            batch_data = self._process_rows(batch_rows, symbol)
+            data.extend(batch_data)
+            batch_duration = time.time() - batch_start
+            logger.debug("Batch %d for %s processed in %.2fs", i // batch_size + 1, symbol, batch_duration)
+        return data
+
     def _process_rows(self, rows, symbol):
         """Process table rows into structured data"""
-        batch_data = []
+        raw_rows = []
         for row in rows:
-            try:
-                cols = row.find_all('td')
-                if cols:
-                    row_data = {
-                        'symbol': symbol,
-                        'date': self.parse_date(cols[0].text.strip()),
-                        'last_trade_price': self.parse_number(cols[1].text),
-                        'max_price': self.parse_number(cols[2].text),
-                        'min_price': self.parse_number(cols[3].text),
-                        'avg_price': self.parse_number(cols[4].text),
-                        'change_percentage': self.parse_number(cols[5].text),
-                        'volume': self.parse_number(cols[6].text),
-                        'turnover_best': self.parse_number(cols[7].text),
-                        'total_turnover': self.parse_number(cols[8].text)
-                    }
-                    batch_data.append(row_data)
-            except Exception as e:
-                print(f"[{datetime.now().strftime('%H:%M:%S.%f')}] Error processing row for {symbol}: {e}")
-                continue
-        return batch_data
+            cols = row.find_all('td')
+            if len(cols) >= len(ROW_FIELDS):
+                raw_rows.append([col.text for col in cols])
+            elif cols:
+                logger.debug("Skipping short row for %s", symbol)
+        return self._columns_to_rows(symbol, decode_columns(raw_rows))
 
     def _create_session(self):
         session = Session()
@@ -202,17 +310,8 @@ class DataFetcherFilter:
 
     def parse_date(self, date_str):
         """Parse date string to date object"""
-        try:
-            return datetime.strptime(date_str, '%m/%d/%Y').date()
-        except:
-            return None
+        return parse_date(date_str)
 
     def parse_number(self, value):
         """Parse number strings to float"""
-        try:
-            clean_value = value.strip().replace(',', '').replace('%', '')
-            if not clean_value:
-                return 0.0
-            return float(clean_value)
-        except:
-            return 0.0
\ No newline at end of file
+        return parse_number(value)
\ No newline at end of file
@@ -1,43 +1,78 @@
+import logging
 from datetime import datetime, timedelta
 import math
 
 from src.database.db_manager import DatabaseManager 
+from src.core.chunk_planner import ChunkPlanner
+from src.core.run_journal import subtract_ranges
+from src.core.watermark_service import WatermarkService
+
+logger = logging.getLogger(__name__)
+
 class DateCheckerFilter:
-    def __init__(self):
-        self.db = DatabaseManager()
-        self.chunk_size = timedelta(days=365)
+    def __init__(self, db=None, watermarks=None, planner=None, journal=None, detect_gaps=True):
+        # Share the pipeline's DatabaseManager (and engine) when given one
+        self.db = db or DatabaseManager()
+        self.watermarks = watermarks or WatermarkService(self.db)
+        self.planner = planner or ChunkPlanner()
+        # Optional RunJournal; its closed, already fetched ranges are never planned again
+        self.journal = journal
+        self.detect_gaps = detect_gaps
+        self.closed_ranges = {}
+        # Dormant symbols ({symbol: date}): only fetched from that date on
+        self.probe_starts = {}
+        self.history_years = 10
+
+    def _history_start(self, current_date):
+        return current_date.replace(year=current_date.year - self.history_years)
+
+    def load_watermarks(self, current_date=None):
+        """Load every symbol's last stored date, and the holes in its history, up front"""
+        if not self.watermarks.load():
+            return False
+        if self.detect_gaps:
+            self.watermarks.load_gaps(self._history_start(current_date or datetime.now().date()))
+        if self.journal is not None:
+            self.closed_ranges = self.journal.closed_ranges()
+        return True
+
+    def plan(self, symbols, current_date=None):
+        """Plan date chunks for all symbols in memory"""
+        return {symbol: self.process(symbol, current_date) for symbol in symbols}
 
-    def process(self, symbol):
+    def process(self, symbol, current_date=None):
         try:
-            current_date = datetime.now().date()
-            ten_years_ago = current_date.replace(year=current_date.year - 10)
+            current_date = current_date or datetime.now().date()
+            history_start = self._history_start(current_date)
             
-            # Check last date in database
-            last_date = self.db.get_last_date(symbol)
+            # Check last date (in memory once watermarks are loaded)
+            last_date = self.watermarks.last_date(symbol)
             
             if last_date is None:
-                start_date = ten_years_ago
+                start_date = history_start
             else:
                 start_date = last_date + timedelta(days=1)
                 
-            if start_date >= current_date:
+            probe_start = self.probe_starts.get(symbol)
+            if probe_start is not None:
+                # No trades for a long time: skip the silent stretch and its gaps
+                start_date = max(start_date, probe_start)
+                ranges = []
+            else:
+                ranges = list(self.watermarks.gaps(symbol))
+            if start_date < current_date:
+                ranges.append((start_date, current_date))
+            ranges = subtract_ranges(ranges, self.closed_ranges.get(symbol, ()))
+            if not ranges:
                 return None  # No new data needed
-                
-            # Calculate date chunks
-            date_chunks = []
-            chunk_start = start_date
-            
-            while chunk_start < current_date:
-                chunk_end = min(chunk_start + self.chunk_size, current_date)
-                date_chunks.append({
-                    'symbol': symbol,
-                    'start_date': chunk_start,
-                    'end_date': chunk_end
-                })
-                chunk_start = chunk_end + timedelta(days=1)
-            
-            return date_chunks
+
+            date_chunks = self.planner.plan(
+                symbol,
+                ranges,
+                rows_per_day=self.watermarks.rows_per_day(symbol)
+            )
+            return date_chunks or None
                 
         except Exception as e:
-            print(f"Error checking dates for {symbol}: {e}")
-            return None
\ No newline at end of file
+            logger.error("Error checking dates for %s: %s", symbol, e)
+            return None
@@ -1,32 +1,104 @@
+import logging
+import re
+from datetime import date, datetime, timedelta
+
 import requests
-from bs4 import BeautifulSoup
+from lxml import html
+
+from src.filters.data_fetcher import MSE_BASE_URL
+from src.utils.performance_metrics import metrics
+from src.utils.rate_limiter import rate_limiter as shared_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+# Symbols containing numbers are bonds and other non-equity listings
+_HAS_DIGIT = re.compile(r'\d')
 
 class SymbolScraperFilter:
-    def __init__(self):
-        self.base_url = "https://www.mse.mk/en/stats/symbolhistory/adin"  
+    """Discovers the listed symbols, through the symbol registry when a db is given.
+
+    The site's symbol dropdown is downloaded at most once per ttl_hours;
+    in between, symbols come straight from the symbol_registry table.
+    Symbols that dropped off the dropdown are skipped. Listed symbols whose
+    last stored trading day is more than delisted_after_days old are kept
+    but marked dormant: process() leaves {symbol: probe_start} in
+    self.dormant, and only that recent window is fetched for them, so a
+    suspended or illiquid ticker is picked up again once it trades.
+    """
+    def __init__(self, rate_limiter=None, base_url=None, db=None, session=None,
+                 ttl_hours=24, delisted_after_days=90):
+        self.base_url = f"{(base_url or MSE_BASE_URL).rstrip('/')}/en/stats/symbolhistory/adin"
+        self.rate_limiter = rate_limiter or shared_rate_limiter
+        self.db = db
+        self.session = session or requests.Session()
+        self.ttl = timedelta(hours=ttl_hours)
+        self.delisted_after = timedelta(days=delisted_after_days) if delisted_after_days else None
+        self.dormant = {}
+        self.timeout = (5, 15)
+
+    def process(self, current_date=None):
+        current_date = current_date or date.today()
+        registry = self.db.get_symbol_registry() if self.db is not None else None
+
+        if registry and self._is_fresh(registry):
+            metrics.increment('symbols.registry_hits')
+            symbols = self._listed(registry)
+            logger.info("Using %d registered symbols (refreshed within %s)", len(symbols), self.ttl)
+        else:
+            symbols = self.scrape()
+            if symbols and self.db is not None and self.db.record_symbols(symbols, current_date):
+                registry = self.db.get_symbol_registry() or registry
+            elif not symbols and registry:
+                symbols = self._listed(registry)
+                logger.warning("Symbol scrape failed, using %d registered symbols", len(symbols))
 
-    def process(self):
+        self.dormant = self._dormant(symbols, registry, current_date)
+        return symbols
+
+    @staticmethod
+    def _listed(registry):
+        """Symbols that were on the dropdown at the last refresh"""
+        latest_seen = max(entry[1] for entry in registry.values())
+        return sorted(symbol for symbol, entry in registry.items() if entry[1] == latest_seen)
+
+    def _is_fresh(self, registry):
+        refreshed_at = max(entry[2] for entry in registry.values())
+        return datetime.now() - refreshed_at < self.ttl
+
+    def _dormant(self, symbols, registry, current_date):
+        """{symbol: cutoff} for listed symbols with no stored trades since the cutoff"""
+        if not registry or self.delisted_after is None:
+            return {}
+        cutoff = current_date - self.delisted_after
+        dormant = {
+            symbol: cutoff for symbol in symbols
+            if symbol in registry and registry[symbol][3] is not None and registry[symbol][3] < cutoff
+        }
+        metrics.set_gauge('symbols.dormant', len(dormant))
+        if dormant:
+            logger.info("%d symbols have no trades since %s; fetching only from then on",
+                        len(dormant), cutoff)
+        return dormant
+
+    def scrape(self):
+        """Download the symbol dropdown; [] on failure"""
         try:
-            response = requests.get(self.base_url)
-            response.raise_for_status()  
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            dropdown = soup.find('select', {'id': 'Code'})
-            
-            if not dropdown:
+            self.rate_limiter.acquire(self.base_url)
+            metrics.increment('symbols.scrapes')
+            response = self.session.get(self.base_url, timeout=self.timeout)
+            self.rate_limiter.record_response(
+                self.base_url, response.status_code, response.headers.get('Retry-After')
+            )
+            response.raise_for_status()
+
+            values = html.fromstring(response.content).xpath('//select[@id="Code"]/option/@value')
+            if not values:
                 raise Exception("Could not find symbol dropdown")
-            
-            symbols = []
-            for option in dropdown.find_all('option'):
-                symbol = option['value']
-                # Skip symbols containing numbers 
-                if not any(char.isdigit() for char in symbol):
-                    symbols.append(symbol)
-            
-            print(f"Found {len(symbols)} valid symbols")
+
+            symbols = [symbol for symbol in values if not _HAS_DIGIT.search(symbol)]
+            logger.info("Found %d valid symbols", len(symbols))
             return symbols
-            
+
         except Exception as e:
-            print(f"Error scraping symbols: {e}")
-            return []
\ No newline at end of file
+            logger.error("Error scraping symbols: %s", e)
+            return []
@@ -0,0 +1,77 @@
+from collections import namedtuple
+from itertools import repeat
+
+import numpy as np
+
+# One stock_data row; field order matches the table's columns
+StockRow = namedtuple('StockRow', [
+    'symbol', 'date', 'last_trade_price', 'max_price', 'min_price', 'avg_price',
+    'change_percentage', 'volume', 'turnover_best', 'total_turnover'
+])
+
+# Symbols are short ASCII tickers (stock_data.symbol is VARCHAR(10))
+STOCK_DTYPE = np.dtype([
+    ('symbol', 'S10'),
+    ('date', 'datetime64[D]'),
+    ('last_trade_price', 'f8'),
+    ('max_price', 'f8'),
+    ('min_price', 'f8'),
+    ('avg_price', 'f8'),
+    ('change_percentage', 'f8'),
+    ('volume', 'i8'),
+    ('turnover_best', 'f8'),
+    ('total_turnover', 'f8'),
+])
+
+class StockBatch:
+    """Rows held as one NumPy structured array (82 bytes per row).
+
+    Used for row batches that sit in the write queue: no per-row Python
+    objects exist until the batch is iterated, which yields StockRow
+    tuples. Slicing returns another StockBatch over the same memory.
+    """
+    __slots__ = ('array',)
+
+    def __init__(self, array):
+        self.array = array
+
+    @classmethod
+    def from_columns(cls, symbol, columns):
+        """Build a batch from decode_columns() output for one symbol"""
+        array = np.empty(len(columns['date']), dtype=STOCK_DTYPE)
+        array['symbol'] = symbol
+        array['date'] = np.asarray(columns['date'], dtype='datetime64[D]')
+        for field in StockRow._fields[2:]:
+            array[field] = columns[field]
+        return cls(array)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build a batch from StockRow tuples or row dicts"""
+        rows = [row if isinstance(row, tuple) else tuple(row[f] for f in StockRow._fields) for row in rows]
+        return cls(np.array(rows, dtype=STOCK_DTYPE))
+
+    @property
+    def nbytes(self):
+        return self.array.nbytes
+
+    def __len__(self):
+        return len(self.array)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return StockBatch(self.array[index])
+        # A one-row slice, so the row is built the same way as in __iter__
+        return next(iter(StockBatch(self.array[index:index + 1 or None])))
+
+    def __iter__(self):
+        array = self.array
+        if not len(array):
+            return iter(())
+        symbols = array['symbol']
+        # Single-symbol batches (the common case) decode the ticker once
+        if (symbols == symbols[0]).all():
+            symbols = repeat(symbols[0].decode('ascii'))
+        else:
+            symbols = (symbol.decode('ascii') for symbol in symbols.tolist())
+        return map(StockRow, symbols, *(array[field].tolist() for field in StockRow._fields[1:]))
@@ -0,0 +1,130 @@
+from datetime import datetime
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+from lxml import etree
+
+from src.models.stock_row import StockRow
+
+# Typed tuple layout emitted for every history row (symbol is added by the caller)
+ROW_FIELDS = (
+    'date', 'last_trade_price', 'max_price', 'min_price', 'avg_price',
+    'change_percentage', 'volume', 'turnover_best', 'total_turnover'
+)
+COLUMN_COUNT = len(ROW_FIELDS)
+# Compact records are StockRow tuples: the symbol first, then ROW_FIELDS
+RECORD_FIELDS = StockRow._fields
+NUMERIC_FIELDS = ROW_FIELDS[1:]
+DATE_FORMAT = '%m/%d/%Y'
+
+# Thousands separators and percent signs are removed in one C-level pass
+_NUMBER_NOISE = str.maketrans('', '', ',%')
+# Unit separator used to join a chunk's cells into one string for decoding
+_CELL_SEPARATOR = '\x1f'
+
+def parse_date(date_str):
+    """Parse date string to date object"""
+    try:
+        return datetime.strptime(date_str, DATE_FORMAT).date()
+    except (TypeError, ValueError):
+        return None
+
+def parse_number(value):
+    """Parse number strings to float"""
+    try:
+        clean_value = value.strip().replace(',', '').replace('%', '')
+        if not clean_value:
+            return 0.0
+        return float(clean_value)
+    except (AttributeError, ValueError):
+        return 0.0
+
+def iter_table_cells(content):
+    """Stream the rows of the first <table> in a history page as lists of cell
+    strings, without building a tree for the rest of the document.
+
+    Mirrors the BeautifulSoup path: the first <tr> of the table is treated
+    as the header and skipped, and parsing stops once the table closes.
+    """
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+
+    context = etree.iterparse(
+        BytesIO(content), events=('start', 'end'), tag=('table', 'tr'),
+        html=True, encoding='utf-8', recover=True
+    )
+    table_depth = 0
+    header_skipped = False
+    for event, element in context:
+        if element.tag == 'table':
+            if event == 'start':
+                table_depth += 1
+                continue
+            table_depth -= 1
+            if table_depth == 0:
+                break
+            continue
+
+        if event != 'end' or table_depth == 0:
+            continue
+        if not header_skipped:
+            header_skipped = True
+        else:
+            cells = [''.join(td.itertext()) for td in element.iter('td')]
+            if cells:
+                yield cells
+
+        # Drop rows already consumed so memory stays flat for long pages
+        element.clear()
+        parent = element.getparent()
+        if parent is not None:
+            while element.getprevious() is not None:
+                del parent[0]
+
+def decode_columns(raw_rows):
+    """Decode a chunk of raw cell rows column by column.
+
+    Returns a dict of NumPy arrays keyed by ROW_FIELDS: 'date' holds
+    datetime.date objects, 'volume' int64 and the rest float64. Numbers
+    follow parse_number (blank or invalid -> 0.0); rows whose date does
+    not parse are dropped since stock_data.date is NOT NULL.
+    """
+    raw_rows = [cells for cells in raw_rows if len(cells) >= COLUMN_COUNT]
+    if not raw_rows:
+        columns = {field: np.empty(0, dtype=np.float64) for field in NUMERIC_FIELDS}
+        columns['date'] = np.empty(0, dtype=object)
+        columns['volume'] = np.empty(0, dtype=np.int64)
+        return columns
+
+    dates = pd.to_datetime(
+        [cells[0].strip() for cells in raw_rows], format=DATE_FORMAT, errors='coerce'
+    )
+    flat = _CELL_SEPARATOR.join(
+        _CELL_SEPARATOR.join(cells[1:COLUMN_COUNT]) for cells in raw_rows
+    ).translate(_NUMBER_NOISE).split(_CELL_SEPARATOR)
+    numbers = np.asarray(pd.to_numeric(flat, errors='coerce'), dtype=np.float64)
+    numbers = np.nan_to_num(numbers.reshape(len(raw_rows), len(NUMERIC_FIELDS)), nan=0.0)
+
+    valid = ~dates.isna()
+    columns = {'date': dates[valid].date}
+    for index, field in enumerate(NUMERIC_FIELDS):
+        columns[field] = numbers[valid, index]
+    columns['volume'] = columns['volume'].astype(np.int64)
+    return columns
+
+def columns_to_tuples(columns):
+    """Turn decoded columns into typed row tuples in ROW_FIELDS order"""
+    return list(zip(*(columns[field].tolist() for field in ROW_FIELDS)))
+
+def record_to_dict(record):
+    """Expand a compact record tuple into a row dict"""
+    return dict(zip(RECORD_FIELDS, record))
+
+def parse_history_columns(content):
+    """Parse an MSE symbol history page into decoded columns"""
+    return decode_columns(iter_table_cells(content))
+
+def parse_history_table(content):
+    """Parse an MSE symbol history page into typed row tuples"""
+    return columns_to_tuples(parse_history_columns(content))
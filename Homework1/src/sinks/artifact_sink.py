@@ -0,0 +1,216 @@
+import csv
+import json
+import logging
+import os
+import queue
+import threading
+from abc import ABC, abstractmethod
+from collections import namedtuple
+from datetime import datetime
+
+from src.parsers.history_table_parser import record_to_dict
+from src.utils.file_naming import chunk_basename
+from src.utils.performance_metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# kind is 'raw' (HTML page as str) or 'records' (list of row dicts; StockRow
+# tuples or a StockBatch are expanded on the writer thread before writers see them)
+Artifact = namedtuple('Artifact', ['kind', 'symbol', 'start_date', 'end_date', 'payload'])
+
+class ArtifactWriter(ABC):
+    """Base class for artifact writers; subclasses handle one artifact kind"""
+    name = None
+    kind = None
+
+    @abstractmethod
+    def write(self, artifact):
+        """Persist one artifact of this writer's kind"""
+
+    def close(self):
+        pass
+
+class RawHtmlWriter(ArtifactWriter):
+    """Keep the fetched HTML page of every chunk"""
+    name = 'raw'
+    kind = 'raw'
+
+    def __init__(self, directory=os.path.join("data", "raw")):
+        self.directory = directory
+        os.makedirs(self.directory, exist_ok=True)
+
+    def write(self, artifact):
+        filename = chunk_basename(artifact.symbol, artifact.start_date, artifact.end_date)
+        filepath = os.path.join(self.directory, f"{filename}.html")
+        with open(filepath, 'w', encoding='utf-8') as f:
+            f.write(artifact.payload)
+
+class JsonWriter(ArtifactWriter):
+    """Save each chunk's parsed rows as a JSON document"""
+    name = 'json'
+    kind = 'records'
+
+    def __init__(self, directory=os.path.join("data", "processed")):
+        self.directory = directory
+        os.makedirs(self.directory, exist_ok=True)
+
+    def write(self, artifact):
+        filename = chunk_basename(artifact.symbol, artifact.start_date, artifact.end_date)
+        filepath = os.path.join(self.directory, f"{filename}.json")
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json.dump(artifact.payload, f, default=str)
+
+class CsvWriter(ArtifactWriter):
+    """Append rows to data/csv/{symbol}.csv using the regional number format"""
+    name = 'csv'
+    kind = 'records'
+    COLUMNS = ['Date', 'Last trade price', 'Max', 'Min', 'Avg. Price',
+               '%chg.', 'Volume', 'Turnover in BEST', 'Total turnover']
+
+    def __init__(self, directory=os.path.join("data", "csv")):
+        self.directory = directory
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def format_price(value):
+        """Format price with proper separators"""
+        try:
+            formatted = f"{float(value):,.2f}"
+            return formatted.replace(",", "X").replace(".", ",").replace("X", ".")
+        except (ValueError, TypeError):
+            return "0,00"
+
+    @staticmethod
+    def format_number(value):
+        """Format whole numbers"""
+        try:
+            return f"{int(float(value)):,}".replace(",", ".")
+        except (ValueError, TypeError):
+            return "0"
+
+    def write(self, artifact):
+        filepath = os.path.join(self.directory, f"{artifact.symbol}.csv")
+        write_header = not os.path.exists(filepath) or os.path.getsize(filepath) == 0
+        with open(filepath, 'a', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            if write_header:
+                writer.writerow(self.COLUMNS)
+            for row in artifact.payload:
+                writer.writerow([
+                    row['date'].strftime('%d.%m.%Y'),
+                    self.format_price(row['last_trade_price']),
+                    self.format_price(row['max_price']),
+                    self.format_price(row['min_price']),
+                    self.format_price(row['avg_price']),
+                    self.format_price(row['change_percentage']),
+                    self.format_number(row['volume']),
+                    self.format_number(row['turnover_best']),
+                    self.format_number(row['total_turnover'])
+                ])
+
+class ParquetWriter(ArtifactWriter):
+    """Append rows to one Parquet file per symbol per run under data/parquet/{symbol}/"""
+    name = 'parquet'
+    kind = 'records'
+
+    def __init__(self, directory=os.path.join("data", "parquet")):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as e:
+            raise ImportError("The parquet artifact writer requires pyarrow (pip install pyarrow)") from e
+        self.pa = pyarrow
+        self.pq = pyarrow.parquet
+        self.directory = directory
+        self.run_id = datetime.now().strftime('%Y%m%d%H%M%S')
+        self.writers = {}
+
+    def write(self, artifact):
+        if not artifact.payload:
+            return
+        table = self.pa.Table.from_pylist(artifact.payload)
+        writer = self.writers.get(artifact.symbol)
+        if writer is None:
+            symbol_dir = os.path.join(self.directory, artifact.symbol)
+            os.makedirs(symbol_dir, exist_ok=True)
+            writer = self.pq.ParquetWriter(
+                os.path.join(symbol_dir, f"part-{self.run_id}.parquet"), table.schema
+            )
+            self.writers[artifact.symbol] = writer
+        writer.write_table(table.cast(writer.schema))
+
+    def close(self):
+        for writer in self.writers.values():
+            writer.close()
+        self.writers = {}
+
+WRITERS = {
+    writer.name: writer
+    for writer in (RawHtmlWriter, JsonWriter, CsvWriter, ParquetWriter)
+}
+
+class ArtifactSink:
+    """Hands artifacts to writers on a background thread.
+
+    The queue is bounded, so a slow disk applies back-pressure to the
+    fetchers instead of buffering without limit. With no writers the sink
+    is a no-op and no thread is started.
+    """
+    def __init__(self, writers=None, max_pending=256):
+        self.writers = list(writers or [])
+        self.kinds = {writer.kind for writer in self.writers}
+        self.queue = queue.Queue(maxsize=max_pending)
+        self._thread = None
+        if self.writers:
+            self._thread = threading.Thread(target=self._run, name='artifact-writer', daemon=True)
+            self._thread.start()
+
+    @classmethod
+    def from_names(cls, names, max_pending=256):
+        """Build a sink from writer names, e.g. ['raw', 'csv'] or ['none']"""
+        names = [name for name in names if name and name != 'none']
+        unknown = [name for name in names if name not in WRITERS]
+        if unknown:
+            raise ValueError(f"Unknown artifact writers: {', '.join(unknown)}")
+        return cls([WRITERS[name]() for name in names], max_pending=max_pending)
+
+    @property
+    def enabled(self):
+        return bool(self.writers)
+
+    def submit_raw(self, symbol, start_date, end_date, content):
+        self._submit(Artifact('raw', symbol, start_date, end_date, content))
+
+    def submit_records(self, symbol, start_date, end_date, rows):
+        self._submit(Artifact('records', symbol, start_date, end_date, rows))
+
+    def _submit(self, artifact):
+        if artifact.kind not in self.kinds:
+            return
+        self.queue.put(artifact)
+        metrics.set_gauge('artifact_sink.pending', self.queue.qsize())
+
+    def _run(self):
+        while True:
+            artifact = self.queue.get()
+            if artifact is None:
+                break
+            if artifact.kind == 'records' and artifact.payload and isinstance(artifact.payload[0], tuple):
+                artifact = artifact._replace(payload=[record_to_dict(row) for row in artifact.payload])
+            for writer in self.writers:
+                if writer.kind != artifact.kind:
+                    continue
+                try:
+                    writer.write(artifact)
+                    metrics.increment(f'artifact_sink.{writer.name}_written')
+                except Exception as e:
+                    logger.error("Error writing %s artifact for %s: %s", writer.name, artifact.symbol, e)
+
+    def close(self):
+        """Flush pending artifacts and close all writers"""
+        if self._thread is not None:
+            self.queue.put(None)
+            self._thread.join()
+            self._thread = None
+        for writer in self.writers:
+            writer.close()
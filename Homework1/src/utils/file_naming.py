@@ -0,0 +1,7 @@
+import hashlib
+
+def chunk_basename(symbol, start_date, end_date):
+    """Generate a unique base filename for a symbol's date-range chunk"""
+    date_str = f"{start_date.strftime('%Y%m%d')}-{end_date.strftime('%Y%m%d')}"
+    hash_str = hashlib.md5(f"{symbol}-{date_str}".encode()).hexdigest()[:8]
+    return f"{symbol}_{date_str}_{hash_str}"
@@ -0,0 +1,144 @@
+import gzip
+import json
+import os
+import tempfile
+import threading
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+
+from src.utils.file_naming import chunk_basename
+from src.utils.performance_metrics import metrics
+
+CacheEntry = namedtuple('CacheEntry', ['body', 'etag', 'last_modified', 'fresh', 'size'])
+
+class HttpCache:
+    """On-disk cache of MSE history pages keyed by symbol and date range.
+
+    Bodies are stored gzip-compressed next to a small JSON metadata file,
+    both named with chunk_basename(). A range that was already closed
+    (ended more than settle_days before it was fetched) never changes and
+    is served without touching the network; open ranges are revalidated
+    with ETag / Last-Modified. The least recently used entries are evicted
+    once the cache grows beyond max_bytes.
+    """
+    def __init__(self, directory=os.path.join("data", "http_cache"),
+                 max_bytes=512 * 1024 * 1024, settle_days=7):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.settle_days = settle_days
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        self.total_bytes = sum(
+            entry.stat().st_size for entry in os.scandir(self.directory) if entry.is_file()
+        )
+
+    def _paths(self, symbol, start_date, end_date):
+        base = os.path.join(self.directory, chunk_basename(symbol, start_date, end_date))
+        return f"{base}.html.gz", f"{base}.json"
+
+    def lookup(self, symbol, start_date, end_date, today=None):
+        """Return the cached CacheEntry for a range, or None"""
+        body_path, meta_path = self._paths(symbol, start_date, end_date)
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+            with gzip.open(body_path, 'rt', encoding='utf-8') as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+
+        fetched_on = datetime.fromisoformat(meta['fetched_at']).date()
+        closed_on = end_date + timedelta(days=self.settle_days)
+        fresh = fetched_on > closed_on and (today or date.today()) > closed_on
+        try:
+            # Touch the body so eviction sees this entry as recently used
+            os.utime(body_path)
+        except OSError:
+            # Evicted meanwhile by another thread or shard process
+            return None
+        return CacheEntry(body, meta.get('etag'), meta.get('last_modified'), fresh, len(body))
+
+    @staticmethod
+    def validators(entry):
+        """Conditional request headers for revalidating an entry"""
+        headers = {}
+        if entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+        return headers
+
+    def store(self, symbol, start_date, end_date, body, etag=None, last_modified=None):
+        body_path, meta_path = self._paths(symbol, start_date, end_date)
+
+        # Written to temporary files and renamed into place, so a concurrent
+        # lookup sees either the old entry or the new one, never a partial file
+        body_tmp = self._temp_path()
+        meta_tmp = self._temp_path()
+        try:
+            with gzip.open(body_tmp, 'wt', encoding='utf-8') as f:
+                f.write(body)
+            with open(meta_tmp, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'symbol': symbol,
+                    'start_date': start_date.isoformat(),
+                    'end_date': end_date.isoformat(),
+                    'fetched_at': datetime.now().isoformat(),
+                    'etag': etag,
+                    'last_modified': last_modified
+                }, f)
+            new_size = os.path.getsize(body_tmp) + os.path.getsize(meta_tmp)
+
+            with self._lock:
+                old_size = sum(os.path.getsize(p) for p in (body_path, meta_path) if os.path.exists(p))
+                os.replace(body_tmp, body_path)
+                os.replace(meta_tmp, meta_path)
+                self.total_bytes += new_size - old_size
+                over_budget = self.total_bytes > self.max_bytes
+        finally:
+            for path in (body_tmp, meta_tmp):
+                if os.path.exists(path):
+                    os.remove(path)
+        if over_budget:
+            self.evict()
+
+    def _temp_path(self):
+        fd, path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        os.close(fd)
+        return path
+
+    def evict(self):
+        """Drop least recently used entries until the cache is under 90% of max_bytes"""
+        with self._lock:
+            bodies = sorted(
+                (entry for entry in os.scandir(self.directory) if entry.name.endswith('.html.gz')),
+                key=lambda entry: entry.stat().st_mtime
+            )
+            target = self.max_bytes * 0.9
+            for entry in bodies:
+                if self.total_bytes <= target:
+                    break
+                meta_path = entry.path[:-len('.html.gz')] + '.json'
+                for path in (entry.path, meta_path):
+                    try:
+                        self.total_bytes -= os.path.getsize(path)
+                        os.remove(path)
+                    except OSError:
+                        pass
+                metrics.increment('http_cache.evictions')
+
+    # Metric helpers used by the fetcher
+
+    @staticmethod
+    def record_hit(entry):
+        metrics.increment('http_cache.hits')
+        metrics.increment('http_cache.bytes_saved', entry.size)
+
+    @staticmethod
+    def record_revalidated(entry):
+        metrics.increment('http_cache.revalidated')
+        metrics.increment('http_cache.bytes_saved', entry.size)
+
+    @staticmethod
+    def record_miss():
+        metrics.increment('http_cache.misses')
@@ -0,0 +1,127 @@
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.utils.performance_metrics import metrics as shared_metrics
+
+CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+PREFIX = 'mse'
+
+# Upper bounds (seconds) of the exported histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+# Counters whose last name segment is really a label value, e.g. http.responses.429
+LABELLED_COUNTERS = {
+    'http.responses': 'status',
+}
+
+def metric_name(name):
+    """Turn a dotted metrics key into an OpenMetrics name"""
+    return f"{PREFIX}_{re.sub(r'[^a-zA-Z0-9_]', '_', name)}"
+
+def _format_value(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def _split_labelled(name):
+    for prefix, label in LABELLED_COUNTERS.items():
+        if name.startswith(prefix + '.'):
+            return prefix, label, name[len(prefix) + 1:]
+    return None
+
+def render_openmetrics(metrics=None):
+    """Render histograms, counters and gauges in the OpenMetrics text format"""
+    metrics = metrics or shared_metrics
+    snapshot = metrics.get_counters()
+    lines = []
+
+    histograms = metrics.get_histograms()
+    if histograms:
+        family = f"{PREFIX}_operation_duration_seconds"
+        lines.append(f"# TYPE {family} histogram")
+        lines.append(f"# HELP {family} Duration of timed operations by category.")
+        for category, histogram in sorted(histograms.items()):
+            for le in LATENCY_BUCKETS:
+                lines.append(f'{family}_bucket{{category="{category}",le="{le}"}} '
+                             f'{histogram.cumulative_count(le)}')
+            lines.append(f'{family}_bucket{{category="{category}",le="+Inf"}} {histogram.count}')
+            lines.append(f'{family}_count{{category="{category}"}} {histogram.count}')
+            lines.append(f'{family}_sum{{category="{category}"}} {_format_value(histogram.total)}')
+        failures = f"{PREFIX}_operation_failures"
+        lines.append(f"# TYPE {failures} counter")
+        for category, histogram in sorted(histograms.items()):
+            lines.append(f'{failures}_total{{category="{category}"}} {histogram.count - histogram.successes}')
+
+    labelled = {}
+    for name, value in sorted(snapshot['counters'].items()):
+        split = _split_labelled(name)
+        if split:
+            prefix, label, label_value = split
+            labelled.setdefault((prefix, label), []).append((label_value, value))
+            continue
+        family = metric_name(name)
+        lines.append(f"# TYPE {family} counter")
+        lines.append(f"{family}_total {_format_value(value)}")
+    for (prefix, label), samples in sorted(labelled.items()):
+        family = metric_name(prefix)
+        lines.append(f"# TYPE {family} counter")
+        for label_value, value in samples:
+            lines.append(f'{family}_total{{{label}="{label_value}"}} {_format_value(value)}')
+
+    counters = snapshot['counters']
+    cache_served = counters.get('http_cache.hits', 0) + counters.get('http_cache.revalidated', 0)
+    cache_lookups = cache_served + counters.get('http_cache.misses', 0)
+    gauges = dict(snapshot['gauges'])
+    if cache_lookups:
+        gauges['http_cache.hit_ratio'] = cache_served / cache_lookups
+    gauges['process.peak_memory_mb'] = metrics.peak_memory_mb
+    for name, value in sorted(gauges.items()):
+        family = metric_name(name)
+        lines.append(f"# TYPE {family} gauge")
+        lines.append(f"{family} {_format_value(value)}")
+
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+class MetricsServer:
+    """Serves render_openmetrics() at /metrics from a background thread"""
+    def __init__(self, port=9108, host='127.0.0.1', metrics=None):
+        self.host = host
+        self.port = port
+        self.metrics = metrics or shared_metrics
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = render_openmetrics(exporter.metrics).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name='metrics-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+            self._thread = None
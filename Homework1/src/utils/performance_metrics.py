@@ -1,74 +1,283 @@
+import logging
 import time
 import psutil
 import threading
+import weakref
 from functools import wraps
-from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, Any
+
+logger = logging.getLogger(__name__)
+
+class LatencyHistogram:
+    """Fixed-size log-linear histogram of durations (HDR-style).
+
+    Values are recorded in microseconds: below 64us every value has its own
+    bucket, above that each power of two is split into 32 sub-buckets, so a
+    percentile is accurate to about 3% from 1us up to ~19 hours in 1056
+    buckets, however many operations are recorded.
+    """
+    SUB_BUCKET_BITS = 5
+    SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+    MAX_SHIFT = 31
+    BUCKET_COUNT = 2 * SUB_BUCKETS + MAX_SHIFT * SUB_BUCKETS
+    MAX_VALUE_US = ((2 * SUB_BUCKETS) << MAX_SHIFT) - 1
+
+    __slots__ = ('counts', 'count', 'successes', 'total', 'min', 'max', 'memory_total')
 
-class PerformanceMetrics:
     def __init__(self):
-        self.metrics: Dict[str, List[Dict[str, Any]]] = {
-            'symbol_processing': [],
-            'database_operations': [],
-            'network_requests': [],
-            'total_execution': []
-        }
+        self.counts = [0] * self.BUCKET_COUNT
+        self.count = 0
+        self.successes = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.memory_total = 0.0
+
+    @classmethod
+    def bucket_index(cls, value_us):
+        if value_us < 2 * cls.SUB_BUCKETS:
+            return value_us
+        shift = value_us.bit_length() - cls.SUB_BUCKET_BITS - 1
+        return 2 * cls.SUB_BUCKETS + (shift - 1) * cls.SUB_BUCKETS + (value_us >> shift) - cls.SUB_BUCKETS
+
+    @classmethod
+    def bucket_bounds(cls, index):
+        """Lowest and highest microsecond value that falls into a bucket"""
+        if index < 2 * cls.SUB_BUCKETS:
+            return index, index
+        shift, offset = divmod(index - 2 * cls.SUB_BUCKETS, cls.SUB_BUCKETS)
+        mantissa = cls.SUB_BUCKETS + offset
+        return mantissa << (shift + 1), ((mantissa + 1) << (shift + 1)) - 1
+
+    def record(self, duration, success=True, memory_mb=0.0):
+        value_us = min(max(int(duration * 1_000_000), 0), self.MAX_VALUE_US)
+        self.counts[self.bucket_index(value_us)] += 1
+        self.count += 1
+        self.successes += success
+        self.total += duration
+        self.memory_total += memory_mb
+        if self.min is None or duration < self.min:
+            self.min = duration
+        if self.max is None or duration > self.max:
+            self.max = duration
+
+    def merge(self, other):
+        """Add another histogram's observations to this one"""
+        if not other.count:
+            return self
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.successes += other.successes
+        self.total += other.total
+        self.memory_total += other.memory_total
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+        return self
+
+    def cumulative_count(self, le):
+        """Number of observations of at most le seconds, to bucket precision"""
+        limit_us = le * 1_000_000
+        total = 0
+        for index, bucket_count in enumerate(self.counts):
+            if bucket_count and self.bucket_bounds(index)[1] > limit_us:
+                break
+            total += bucket_count
+        return total
+
+    def percentile(self, q):
+        """Duration in seconds at quantile q (0-100)"""
+        if not self.count:
+            return 0.0
+        rank = max(1, int(round(q / 100 * self.count)))
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                low, high = self.bucket_bounds(index)
+                value = (low + high) / 2 / 1_000_000
+                return min(max(value, self.min), self.max)
+        return self.max
+
+class PerformanceMetrics:
+    """Process-wide latency histograms, counters and gauges.
+
+    record_metric() only touches a buffer owned by the calling thread, so
+    the hot path takes no shared lock; buffers are merged when a summary is
+    requested, and buffers of finished threads are folded into one retired
+    histogram per category. RSS is sampled by a background ticker instead
+    of on every call.
+    """
+    def __init__(self, memory_interval: float = 1.0):
+        self.counters: Dict[str, float] = {}
+        self.gauges: Dict[str, float] = {}
         self._lock = threading.Lock()
+        self._local = threading.local()
+        self._buffers = []  # (weakref to owning thread, {category: LatencyHistogram})
+        self._retired: Dict[str, LatencyHistogram] = {}
+        self.memory_interval = memory_interval
+        self.current_memory_mb = 0.0
+        self.peak_memory_mb = 0.0
+        self._ticker = None
+
+    def _start_ticker(self):
+        with self._lock:
+            if self._ticker is not None:
+                return
+            self._sample_memory()
+            self._ticker = threading.Thread(target=self._tick, name='metrics-rss', daemon=True)
+            self._ticker.start()
+
+    def _tick(self):
+        while True:
+            time.sleep(self.memory_interval)
+            self._sample_memory()
+
+    def _sample_memory(self):
+        rss_mb = psutil.Process().memory_info().rss / 1024 / 1024
+        self.current_memory_mb = rss_mb
+        self.peak_memory_mb = max(self.peak_memory_mb, rss_mb)
+
+    def _thread_buffer(self):
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None:
+            buffer = {}
+            self._local.buffer = buffer
+            with self._lock:
+                self._retire_finished()
+                self._buffers.append((weakref.ref(threading.current_thread()), buffer))
+        return buffer
 
-    def record_metric(self, category: str, operation: str, duration: float, 
+    def _retire_finished(self):
+        """Fold buffers of threads that have exited; caller holds _lock"""
+        alive = []
+        for thread_ref, buffer in self._buffers:
+            thread = thread_ref()
+            if thread is not None and thread.is_alive():
+                alive.append((thread_ref, buffer))
+                continue
+            for category, histogram in list(buffer.items()):
+                self._retired.setdefault(category, LatencyHistogram()).merge(histogram)
+        self._buffers = alive
+
+    def record_metric(self, category: str, operation: str, duration: float,
                      success: bool, additional_info: Dict = None):
-        """Record a performance metric with thread-safe operation."""
-        metric = {
-            'timestamp': datetime.now(),
-            'operation': operation,
-            'duration': duration,
-            'success': success,
-            'memory_usage': psutil.Process().memory_info().rss / 1024 / 1024,  # MB
-            'additional_info': additional_info or {}
-        }
-        
+        """Record a performance metric in the calling thread's histogram."""
+        if self._ticker is None:
+            self._start_ticker()
+        buffer = self._thread_buffer()
+        histogram = buffer.get(category)
+        if histogram is None:
+            histogram = buffer[category] = LatencyHistogram()
+        histogram.record(duration, success, self.current_memory_mb)
+
+    def get_histograms(self) -> Dict[str, LatencyHistogram]:
+        """Merged copy of every category's histogram."""
+        merged: Dict[str, LatencyHistogram] = {}
+        with self._lock:
+            self._retire_finished()
+            sources = [self._retired] + [buffer for _, buffer in self._buffers]
+            for source in sources:
+                for category, histogram in list(source.items()):
+                    merged.setdefault(category, LatencyHistogram()).merge(histogram)
+        return merged
+
+    def increment(self, name: str, value: float = 1):
+        """Add value to a named counter."""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value: float):
+        """Record the latest value of a named gauge."""
+        with self._lock:
+            self.gauges[name] = value
+
+    def get_counters(self) -> Dict[str, Dict[str, float]]:
+        """Snapshot of all counters and gauges."""
         with self._lock:
-            if category not in self.metrics:
-                self.metrics[category] = []
-            self.metrics[category].append(metric)
+            return {'counters': dict(self.counters), 'gauges': dict(self.gauges)}
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Picklable copy of everything recorded, to be merged in another process."""
+        self._sample_memory()
+        snapshot = self.get_counters()
+        snapshot['histograms'] = self.get_histograms()
+        snapshot['peak_memory_mb'] = self.peak_memory_mb
+        return snapshot
+
+    def merge_snapshot(self, snapshot: Dict[str, Any]):
+        """Fold another process's snapshot() in: histograms merge, counters add
+        up, gauges and peak memory keep the larger value."""
+        with self._lock:
+            for category, histogram in snapshot['histograms'].items():
+                self._retired.setdefault(category, LatencyHistogram()).merge(histogram)
+            for name, value in snapshot['counters'].items():
+                self.counters[name] = self.counters.get(name, 0) + value
+            for name, value in snapshot['gauges'].items():
+                self.gauges[name] = max(self.gauges.get(name, value), value)
+            self.peak_memory_mb = max(self.peak_memory_mb, snapshot['peak_memory_mb'])
 
     def get_summary(self) -> Dict:
         """Generate a summary of all recorded metrics."""
         summary = {}
-        
-        for category, measurements in self.metrics.items():
-            if not measurements:
+
+        for category, histogram in self.get_histograms().items():
+            if not histogram.count:
                 continue
-                
-            durations = [m['duration'] for m in measurements]
-            success_count = sum(1 for m in measurements if m['success'])
-            
+
             summary[category] = {
-                'total_operations': len(measurements),
-                'successful_operations': success_count,
-                'failure_rate': (len(measurements) - success_count) / len(measurements),
-                'average_duration': sum(durations) / len(durations),
-                'min_duration': min(durations),
-                'max_duration': max(durations),
-                'total_duration': sum(durations),
-                'average_memory_mb': sum(m['memory_usage'] for m in measurements) / len(measurements)
+                'total_operations': histogram.count,
+                'successful_operations': histogram.successes,
+                'failure_rate': (histogram.count - histogram.successes) / histogram.count,
+                'average_duration': histogram.total / histogram.count,
+                'min_duration': histogram.min,
+                'max_duration': histogram.max,
+                'total_duration': histogram.total,
+                'p50_duration': histogram.percentile(50),
+                'p95_duration': histogram.percentile(95),
+                'p99_duration': histogram.percentile(99),
+                'average_memory_mb': histogram.memory_total / histogram.count,
+                'peak_memory_mb': self.peak_memory_mb
             }
-            
+
         return summary
 
     def print_summary(self):
-        """Print a formatted summary of all metrics."""
+        """Log a formatted summary of all metrics."""
         summary = self.get_summary()
-        
-        print("\n=== Performance Metrics Summary ===")
+
+        logger.info("=== Performance Metrics Summary ===")
         for category, stats in summary.items():
-            print(f"\n{category.upper()}")
-            print(f"Total Operations: {stats['total_operations']}")
-            print(f"Success Rate: {((1 - stats['failure_rate']) * 100):.2f}%")
-            print(f"Average Duration: {stats['average_duration']:.2f}s")
-            print(f"Min/Max Duration: {stats['min_duration']:.2f}s / {stats['max_duration']:.2f}s")
-            print(f"Total Duration: {stats['total_duration']:.2f}s")
-            print(f"Average Memory Usage: {stats['average_memory_mb']:.2f}MB")
+            logger.info("%s", category.upper())
+            logger.info("Total Operations: %d", stats['total_operations'])
+            logger.info("Success Rate: %.2f%%", (1 - stats['failure_rate']) * 100)
+            logger.info("Average Duration: %.2fs", stats['average_duration'])
+            logger.info("Min/Max Duration: %.2fs / %.2fs", stats['min_duration'], stats['max_duration'])
+            logger.info("p50/p95/p99 Duration: %.3fs / %.3fs / %.3fs",
+                        stats['p50_duration'], stats['p95_duration'], stats['p99_duration'])
+            logger.info("Total Duration: %.2fs", stats['total_duration'])
+            logger.info("Average Memory Usage: %.2fMB", stats['average_memory_mb'])
+        if summary:
+            logger.info("Peak Memory Usage: %.2fMB", self.peak_memory_mb)
+
+        snapshot = self.get_counters()
+        if snapshot['counters']:
+            logger.info("COUNTERS")
+            for name, value in sorted(snapshot['counters'].items()):
+                logger.info("%s: %.2f" if isinstance(value, float) else "%s: %s", name, value)
+        if snapshot['gauges']:
+            logger.info("GAUGES")
+            for name, value in sorted(snapshot['gauges'].items()):
+                logger.info("%s: %.2f", name, value)
+
+        counters = snapshot['counters']
+        served = counters.get('http_cache.hits', 0) + counters.get('http_cache.revalidated', 0)
+        lookups = served + counters.get('http_cache.misses', 0)
+        if lookups:
+            logger.info("HTTP CACHE")
+            logger.info("Hit Rate: %.2f%% (%s fresh, %s revalidated, %s misses)",
+                        served / lookups * 100, counters.get('http_cache.hits', 0),
+                        counters.get('http_cache.revalidated', 0), counters.get('http_cache.misses', 0))
+            logger.info("Bytes Saved: %.2fMB", counters.get('http_cache.bytes_saved', 0) / (1024 * 1024))
 
 # Global metrics instance
 metrics = PerformanceMetrics()
@@ -0,0 +1,169 @@
+import asyncio
+import threading
+import time
+from urllib.parse import urlparse
+
+from src.utils.performance_metrics import metrics
+
+class TokenBucket:
+    """Token bucket that hands out reservations instead of blocking.
+
+    A reservation may drive the token count negative; the caller is told how
+    long to wait for its token and sleeps without holding any lock.
+    """
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated = now
+
+    def reserve(self, now: float) -> float:
+        """Take one token and return the seconds until it becomes available."""
+        self._refill(now)
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+    def set_rate(self, rate: float, now: float):
+        self._refill(now)
+        self.rate = rate
+
+class HostLimiter:
+    """Per-host bucket whose rate follows AIMD on throttling responses."""
+    def __init__(self, rate: float, min_rate: float, max_rate: float, burst: float):
+        self.bucket = TokenBucket(rate, burst)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.blocked_until = 0.0
+        self.last_decrease = 0.0
+
+    @property
+    def rate(self) -> float:
+        return self.bucket.rate
+
+class RateLimiter:
+    """Global token bucket plus adaptive per-host limits.
+
+    Every outgoing request reserves a token from the global bucket and from
+    its host's bucket. A 429/503 halves the host rate (at most once per
+    cooldown window, so a burst of in-flight failures counts once) and
+    honours Retry-After; every successful response adds back a small
+    constant, up to max_host_rate.
+    """
+    THROTTLE_STATUSES = (429, 503)
+
+    def __init__(self, global_rate: float = 30.0, global_burst: float = 30.0,
+                 host_rate: float = 20.0, min_host_rate: float = 1.0,
+                 max_host_rate: float = 50.0, host_burst: float = 10.0,
+                 increase_step: float = 0.1, decrease_factor: float = 0.5,
+                 cooldown: float = 2.0):
+        self.global_bucket = TokenBucket(global_rate, global_burst)
+        self.host_rate = host_rate
+        self.min_host_rate = min_host_rate
+        self.max_host_rate = max_host_rate
+        self.host_burst = host_burst
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self.hosts = {}
+        self._lock = threading.Lock()
+
+    def share(self, parts: int) -> 'RateLimiter':
+        """A limiter with 1/parts of this one's budget, for one of `parts` processes."""
+        return RateLimiter(
+            global_rate=self.global_bucket.rate / parts,
+            global_burst=max(1.0, self.global_bucket.capacity / parts),
+            host_rate=self.host_rate / parts,
+            min_host_rate=self.min_host_rate / parts,
+            max_host_rate=self.max_host_rate / parts,
+            host_burst=max(1.0, self.host_burst / parts),
+            increase_step=self.increase_step / parts,
+            decrease_factor=self.decrease_factor,
+            cooldown=self.cooldown
+        )
+
+    def _host(self, url: str) -> HostLimiter:
+        host = urlparse(url).netloc or url
+        limiter = self.hosts.get(host)
+        if limiter is None:
+            limiter = HostLimiter(self.host_rate, self.min_host_rate,
+                                  self.max_host_rate, self.host_burst)
+            self.hosts[host] = limiter
+        return limiter
+
+    def _reserve(self, url: str) -> float:
+        with self._lock:
+            now = time.monotonic()
+            host = self._host(url)
+            wait = max(
+                self.global_bucket.reserve(now),
+                host.bucket.reserve(now),
+                host.blocked_until - now
+            )
+        metrics.increment('rate_limiter.requests')
+        if wait > 0:
+            metrics.increment('rate_limiter.waits')
+            metrics.increment('rate_limiter.wait_seconds', wait)
+        return wait
+
+    def acquire(self, url: str) -> float:
+        """Block the calling thread until a request to url may be sent."""
+        wait = self._reserve(url)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, url: str) -> float:
+        """Event-loop friendly variant of acquire()."""
+        wait = self._reserve(url)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def record_response(self, url: str, status_code: int, retry_after=None):
+        """Feed a response status back into the host's AIMD controller."""
+        with self._lock:
+            now = time.monotonic()
+            host = self._host(url)
+            if status_code in self.THROTTLE_STATUSES:
+                throttled = True
+                if now - host.last_decrease >= self.cooldown:
+                    host.bucket.set_rate(max(self.min_host_rate, host.rate * self.decrease_factor), now)
+                    host.last_decrease = now
+                delay = self._parse_retry_after(retry_after)
+                if delay:
+                    host.blocked_until = max(host.blocked_until, now + delay)
+            else:
+                throttled = False
+                if host.rate < self.max_host_rate:
+                    host.bucket.set_rate(min(self.max_host_rate, host.rate + self.increase_step), now)
+            rate = min(host.rate, self.global_bucket.rate)
+
+        metrics.increment(f'http.responses.{status_code}')
+        if throttled:
+            metrics.increment('rate_limiter.throttled')
+        metrics.set_gauge('rate_limiter.current_rate', rate)
+
+    @staticmethod
+    def _parse_retry_after(value):
+        if value is None:
+            return None
+        try:
+            return max(0.0, float(value))
+        except (TypeError, ValueError):
+            # HTTP-date form is not worth parsing here; fall back to AIMD only
+            return None
+
+    def current_rate(self, url: str) -> float:
+        with self._lock:
+            return min(self._host(url).rate, self.global_bucket.rate)
+
+# Shared limiter for every filter talking to mse.mk
+rate_limiter = RateLimiter()
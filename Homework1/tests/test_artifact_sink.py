@@ -0,0 +1,62 @@
+import csv
+import os
+import tempfile
+import unittest
+from datetime import date
+from src.sinks.artifact_sink import ArtifactSink, CsvWriter, RawHtmlWriter
+
+def make_row(day):
+    return {
+        'symbol': 'ADIN', 'date': date(2024, 1, day),
+        'last_trade_price': 1650.0, 'max_price': 0.0, 'min_price': 0.0,
+        'avg_price': 1650.0, 'change_percentage': 0.0, 'volume': 1250,
+        'turnover_best': 0.0, 'total_turnover': 2062500.0
+    }
+
+class TestArtifactSink(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_compact_records_are_expanded(self):
+        sink = ArtifactSink([CsvWriter(self.tmp.name)])
+        sink.submit_records('ADIN', date(2024, 1, 1), date(2024, 1, 2), [tuple(make_row(2).values())])
+        sink.close()
+
+        with open(os.path.join(self.tmp.name, 'ADIN.csv'), encoding='utf-8') as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(rows[1][0], '02.01.2024')
+
+    def test_csv_appends_per_symbol(self):
+        sink = ArtifactSink([CsvWriter(self.tmp.name)])
+        sink.submit_records('ADIN', date(2024, 1, 1), date(2024, 1, 2), [make_row(2)])
+        sink.submit_records('ADIN', date(2024, 1, 3), date(2024, 1, 4), [make_row(4)])
+        sink.close()
+
+        with open(os.path.join(self.tmp.name, 'ADIN.csv'), encoding='utf-8') as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(rows[0], CsvWriter.COLUMNS)
+        self.assertEqual(rows[1], ['02.01.2024', '1.650,00', '0,00', '0,00', '1.650,00',
+                                   '0,00', '1.250', '0', '2.062.500'])
+        self.assertEqual(rows[2][0], '04.01.2024')
+        self.assertEqual(len(rows), 3)
+
+    def test_writers_only_receive_their_kind(self):
+        sink = ArtifactSink([RawHtmlWriter(self.tmp.name)])
+        sink.submit_records('ADIN', date(2024, 1, 1), date(2024, 1, 2), [make_row(2)])
+        sink.submit_raw('ADIN', date(2024, 1, 1), date(2024, 1, 2), '<html></html>')
+        sink.close()
+        self.assertEqual(len(os.listdir(self.tmp.name)), 1)
+
+    def test_none_disables_all_writers(self):
+        sink = ArtifactSink.from_names(['none'])
+        self.assertFalse(sink.enabled)
+        sink.submit_raw('ADIN', date(2024, 1, 1), date(2024, 1, 2), '<html></html>')
+        sink.close()
+
+    def test_unknown_writer_is_rejected(self):
+        with self.assertRaises(ValueError):
+            ArtifactSink.from_names(['xml'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+from datetime import date
+from src.core.chunk_planner import ChunkPlanner
+
+def spans(chunks):
+    return [(c['start_date'], c['end_date']) for c in chunks]
+
+class TestChunkPlanner(unittest.TestCase):
+    def setUp(self):
+        self.planner = ChunkPlanner(holidays=[date(2024, 5, 24)])
+
+    def test_trims_to_trading_days(self):
+        # Saturday .. next Saturday -> Monday .. Friday
+        self.assertEqual(self.planner.trim(date(2024, 5, 18), date(2024, 5, 25)),
+                         (date(2024, 5, 20), date(2024, 5, 23)))
+        self.assertIsNone(self.planner.trim(date(2024, 5, 18), date(2024, 5, 19)))
+
+    def test_small_ranges_are_merged(self):
+        chunks = self.planner.plan('ADIN', [
+            (date(2024, 5, 6), date(2024, 5, 7)),
+            (date(2024, 5, 9), date(2024, 5, 10)),
+            (date(2024, 5, 13), date(2024, 5, 13)),
+        ])
+        self.assertEqual(spans(chunks), [(date(2024, 5, 6), date(2024, 5, 13))])
+
+    def test_chunk_length_follows_density(self):
+        self.assertEqual(self.planner.chunk_days(None), 365)
+        self.assertEqual(self.planner.chunk_days(0.01), 365)
+        self.assertEqual(self.planner.chunk_days(1.0), 250)
+        self.assertEqual(self.planner.chunk_days(100.0), 30)
+
+    def test_dense_range_is_split(self):
+        chunks = self.planner.plan('ADIN', [(date(2020, 1, 1), date(2023, 12, 29))], rows_per_day=1.0)
+        self.assertGreater(len(chunks), 4)
+        for start, end in spans(chunks):
+            self.assertLessEqual((end - start).days, 250)
+            self.assertTrue(self.planner.is_trading_day(start))
+            self.assertTrue(self.planner.is_trading_day(end))
+        # Contiguous coverage with no overlap
+        for (_, prev_end), (next_start, _) in zip(spans(chunks), spans(chunks)[1:]):
+            self.assertGreater(next_start, prev_end)
+            self.assertLessEqual((next_start - prev_end).days, 4)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+from datetime import date
+from src.database.db_manager import CopyStream
+
+class TestCopyStream(unittest.TestCase):
+    def setUp(self):
+        self.row = {
+            'symbol': 'ADIN',
+            'date': date(2024, 1, 2),
+            'last_trade_price': 1500.0,
+            'max_price': 1520.5,
+            'min_price': None,
+            'avg_price': 1510.0,
+            'change_percentage': -0.5,
+            'volume': 10,
+            'turnover_best': 15000.0,
+            'total_turnover': 15000.0
+        }
+
+    def test_row_is_rendered_as_copy_text(self):
+        line = CopyStream.format_row(self.row)
+        self.assertEqual(
+            line,
+            "ADIN\t2024-01-02\t1500.0\t1520.5\t\\N\t1510.0\t-0.5\t10\t15000.0\t15000.0\n"
+        )
+
+    def test_tuple_row_matches_dict_row(self):
+        record = tuple(self.row.values())
+        self.assertEqual(CopyStream.format_row(record), CopyStream.format_row(self.row))
+
+    def test_small_reads_reassemble_the_stream(self):
+        stream = CopyStream([self.row] * 5)
+        chunks = []
+        while True:
+            chunk = stream.read(7)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        self.assertEqual(''.join(chunks), CopyStream.format_row(self.row) * 5)
+
+if __name__ == '__main__':
+    unittest.main()
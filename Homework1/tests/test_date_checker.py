@@ -0,0 +1,114 @@
+import unittest
+from datetime import date, timedelta
+from src.filters.date_checker import DateCheckerFilter
+
+class FakeDatabase:
+    def __init__(self, last_dates, gaps=None, row_counts=None):
+        self.last_dates = last_dates
+        self.gaps = gaps or {}
+        self.row_counts = row_counts or {}
+        self.bulk_queries = 0
+        self.single_queries = 0
+
+    def get_symbol_stats(self):
+        self.bulk_queries += 1
+        return {
+            symbol: (last_date - timedelta(days=699), last_date, self.row_counts.get(symbol, 350))
+            for symbol, last_date in self.last_dates.items()
+        }
+
+    def get_date_gaps(self, since, min_gap_days=7):
+        self.bulk_queries += 1
+        return self.gaps
+
+    def get_last_date(self, symbol):
+        self.single_queries += 1
+        return self.last_dates.get(symbol)
+
+class FakeJournal:
+    def __init__(self, closed):
+        self.closed = closed
+
+    def closed_ranges(self):
+        return self.closed
+
+class TestDateCheckerFilter(unittest.TestCase):
+    def setUp(self):
+        # A Monday, so the previous weekend is a non-trading gap
+        self.today = date(2024, 5, 20)
+        self.db = FakeDatabase({
+            'ADIN': date(2024, 5, 15),
+            'ALK': self.today,
+            'MPT': date(2024, 5, 17),
+        })
+        self.checker = DateCheckerFilter(db=self.db)
+
+    def test_plan_uses_bulk_queries_only(self):
+        self.assertTrue(self.checker.load_watermarks())
+        plan = self.checker.plan(['ADIN', 'ALK', 'KMB'], self.today)
+        # Watermarks and history gaps
+        self.assertEqual(self.db.bulk_queries, 2)
+        self.assertEqual(self.db.single_queries, 0)
+
+        self.assertEqual(
+            [(c['start_date'], c['end_date']) for c in plan['ADIN']],
+            [(date(2024, 5, 16), self.today)]
+        )
+        self.assertIsNone(plan['ALK'])
+        # Unknown symbols get the full ten-year backfill in yearly chunks
+        self.assertGreaterEqual(len(plan['KMB']), 10)
+        self.assertEqual(plan['KMB'][-1]['end_date'], self.today)
+
+    def test_weekend_gap_is_skipped(self):
+        self.checker.load_watermarks()
+        # Last row on Friday, run on Sunday: nothing to fetch
+        self.assertIsNone(self.checker.process('MPT', date(2024, 5, 19)))
+
+    def test_history_gaps_are_planned(self):
+        self.db.gaps = {'ALK': [(date(2024, 2, 5), date(2024, 2, 23))]}
+        self.checker.load_watermarks()
+        self.assertEqual(
+            [(c['start_date'], c['end_date']) for c in self.checker.process('ALK', self.today)],
+            [(date(2024, 2, 5), date(2024, 2, 23))]
+        )
+
+    def test_quiet_stretches_of_sparse_symbols_are_not_gaps(self):
+        # About one trade a month: a three-week pause is normal, half a year is not
+        self.db.last_dates['SPRS'] = self.today
+        self.db.row_counts['SPRS'] = 24
+        self.db.gaps = {'SPRS': [
+            (date(2023, 3, 1), date(2023, 9, 15)),
+            (date(2024, 2, 5), date(2024, 2, 23)),
+        ]}
+        self.checker.load_watermarks()
+        self.assertEqual(
+            [(c['start_date'], c['end_date']) for c in self.checker.process('SPRS', self.today)],
+            [(date(2023, 3, 1), date(2023, 9, 15))]
+        )
+
+    def test_journaled_ranges_are_skipped(self):
+        self.db.gaps = {'ALK': [(date(2024, 2, 5), date(2024, 2, 23))]}
+        journal = FakeJournal({'ALK': [(date(2024, 2, 1), date(2024, 2, 16))]})
+        checker = DateCheckerFilter(db=self.db, journal=journal)
+        checker.load_watermarks()
+        self.assertEqual(
+            [(c['start_date'], c['end_date']) for c in checker.process('ALK', self.today)],
+            [(date(2024, 2, 19), date(2024, 2, 23))]
+        )
+
+    def test_dormant_symbol_is_probed_over_recent_window(self):
+        self.db.last_dates['OLD'] = date(2023, 1, 10)
+        self.db.gaps = {'OLD': [(date(2022, 3, 1), date(2022, 6, 1))]}
+        self.checker.load_watermarks()
+        self.checker.probe_starts = {'OLD': self.today - timedelta(days=90)}
+        self.assertEqual(
+            [(c['start_date'], c['end_date']) for c in self.checker.process('OLD', self.today)],
+            [(self.today - timedelta(days=90), self.today)]
+        )
+
+    def test_falls_back_to_per_symbol_lookup(self):
+        self.checker.process('ADIN', self.today)
+        self.assertEqual(self.db.single_queries, 1)
+
+if __name__ == '__main__':
+    unittest.main()
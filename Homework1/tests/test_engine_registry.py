@@ -0,0 +1,52 @@
+import os
+import tempfile
+import unittest
+
+from sqlalchemy import text
+
+from src.database.engine_registry import dispose_engines, get_engine, pool_size_for
+from src.database.migrations import MIGRATIONS, pending_migrations
+from src.utils.performance_metrics import metrics
+
+class TestEngineRegistry(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(dispose_engines)
+        self.url = f"sqlite:///{os.path.join(self.tmp.name, 'test.db')}"
+
+    def test_engine_is_shared_per_url(self):
+        engine = get_engine(self.url, pool_size=3, max_overflow=1, run_migrations=False)
+        self.assertIs(get_engine(self.url, run_migrations=False), engine)
+        self.assertIs(get_engine(self.url, pool_size=50, run_migrations=False), engine)
+        self.assertEqual(engine.pool.size(), 3)
+
+    def test_pool_is_sized_for_writers(self):
+        self.assertEqual(pool_size_for(writer_threads=2), (4, 2))
+        self.assertEqual(pool_size_for(writer_threads=4, fetch_concurrency=25), (6, 4))
+        self.assertEqual(pool_size_for(writer_threads=4, fetch_concurrency=1), (6, 1))
+
+    def test_checkouts_and_connections_are_measured(self):
+        engine = get_engine(self.url, pool_size=2, max_overflow=0, run_migrations=False)
+        before = metrics.get_histograms().get('db_pool_checkout')
+        before = before.count if before else 0
+        with engine.connect() as first, engine.connect() as second:
+            first.execute(text("SELECT 1"))
+            second.execute(text("SELECT 1"))
+            self.assertEqual(metrics.get_counters()['gauges']['db.pool.checked_out'], 2)
+        gauges = metrics.get_counters()['gauges']
+        self.assertEqual(gauges['db.pool.checked_out'], 0)
+        self.assertEqual(gauges['db.pool.connections'], 2)
+        self.assertEqual(gauges['db.pool.max_connections'], 2)
+        self.assertEqual(metrics.get_histograms()['db_pool_checkout'].count - before, 2)
+
+class TestMigrations(unittest.TestCase):
+    def test_versions_are_unique_and_ordered(self):
+        versions = [migration[0] for migration in MIGRATIONS]
+        self.assertEqual(versions, sorted(set(versions)))
+
+    def test_only_pending_migrations_run(self):
+        self.assertEqual([m[0] for m in pending_migrations({1, 2})], [v for v, _, _ in MIGRATIONS if v > 2])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+from datetime import date
+
+import requests
+
+from benchmarks.fake_mse_server import FakeMSEServer, synthetic_symbols
+from src.filters.data_fetcher import DataFetcherFilter
+from src.filters.symbol_scraper import SymbolScraperFilter
+from src.sinks.artifact_sink import ArtifactSink
+
+class FakeRateLimiter:
+    def __init__(self):
+        self.statuses = []
+
+    def acquire(self, url):
+        pass
+
+    def record_response(self, url, status, retry_after=None):
+        self.statuses.append((status, retry_after))
+
+class TestFakeMSEServer(unittest.TestCase):
+    def start_server(self, **options):
+        server = FakeMSEServer(symbols=['ADIN', 'ALK', 'BENCHAAB'], **options).start()
+        self.addCleanup(server.stop)
+        return server
+
+    def fetcher(self, server, rate_limiter=None):
+        sink = ArtifactSink([])
+        self.addCleanup(sink.close)
+        return DataFetcherFilter(
+            rate_limiter=rate_limiter or FakeRateLimiter(), parser='lxml',
+            artifact_sink=sink, http_cache=None, base_url=server.url
+        )
+
+    def test_symbols_are_letters_only(self):
+        symbols = synthetic_symbols(30)
+        self.assertEqual(len(set(symbols)), 30)
+        self.assertTrue(all(symbol.isalpha() for symbol in symbols))
+
+    def test_scraper_reads_symbol_dropdown(self):
+        server = self.start_server()
+        scraper = SymbolScraperFilter(rate_limiter=FakeRateLimiter(), base_url=server.url)
+        self.assertEqual(scraper.process(), ['ADIN', 'ALK', 'BENCHAAB'])
+
+    def test_fetcher_parses_weekday_rows(self):
+        server = self.start_server()
+        chunk = {'symbol': 'ADIN', 'start_date': date(2024, 1, 1), 'end_date': date(2024, 3, 31)}
+        rows = self.fetcher(server).fetch(chunk)
+        self.assertGreater(len(rows), 40)
+        for row in rows:
+            self.assertEqual(row['symbol'], 'ADIN')
+            self.assertLess(row['date'].weekday(), 5)
+            self.assertTrue(chunk['start_date'] <= row['date'] <= chunk['end_date'])
+
+    def test_rows_do_not_depend_on_chunking(self):
+        server = self.start_server()
+        fetcher = self.fetcher(server)
+        whole = fetcher.fetch({'symbol': 'ALK', 'start_date': date(2024, 1, 1), 'end_date': date(2024, 2, 29)})
+        parts = (
+            fetcher.fetch({'symbol': 'ALK', 'start_date': date(2024, 1, 1), 'end_date': date(2024, 1, 31)})
+            + fetcher.fetch({'symbol': 'ALK', 'start_date': date(2024, 2, 1), 'end_date': date(2024, 2, 29)})
+        )
+        key = lambda row: row['date']
+        self.assertEqual(sorted(whole, key=key), sorted(parts, key=key))
+
+    def test_burst_returns_429_with_retry_after(self):
+        server = self.start_server(burst_every=3, burst_length=1, retry_after=2)
+        url = f"{server.url}/en/stats/symbolhistory/ADIN"
+        statuses = [requests.get(url, timeout=5) for _ in range(3)]
+        self.assertEqual([response.status_code for response in statuses], [200, 200, 429])
+        self.assertEqual(statuses[2].headers['Retry-After'], '2')
+        self.assertEqual(server.status_counts, {200: 2, 429: 1})
+
+if __name__ == '__main__':
+    unittest.main()
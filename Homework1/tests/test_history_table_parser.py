@@ -0,0 +1,81 @@
+import glob
+import json
+import os
+import unittest
+from src.filters.data_fetcher import DataFetcherFilter
+from src.parsers.history_table_parser import decode_columns, parse_history_table, record_to_dict
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), 'fixtures', 'history')
+RAW_DIR = os.path.join('data', 'raw')
+
+def read_page(path):
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+def symbol_for(path):
+    return os.path.basename(path).split('_')[0]
+
+class TestHistoryTableParser(unittest.TestCase):
+    def setUp(self):
+        self.lxml_fetcher = DataFetcherFilter(parser='lxml')
+        self.bs4_fetcher = DataFetcherFilter(parser='bs4')
+
+    def test_golden_files(self):
+        pages = sorted(glob.glob(os.path.join(FIXTURE_DIR, '*.html')))
+        self.assertTrue(pages, "No golden pages found")
+        for page in pages:
+            with self.subTest(page=os.path.basename(page)):
+                with open(page[:-len('.html')] + '.json', encoding='utf-8') as f:
+                    expected = json.load(f)
+                rows = self.lxml_fetcher.parse_page(symbol_for(page), read_page(page))
+                self.assertEqual(json.loads(json.dumps(rows, default=str)), expected)
+
+    def test_lxml_matches_bs4_on_saved_pages(self):
+        pages = sorted(glob.glob(os.path.join(FIXTURE_DIR, '*.html')))
+        pages += sorted(glob.glob(os.path.join(RAW_DIR, '*.html')))
+        for page in pages:
+            with self.subTest(page=os.path.basename(page)):
+                content = read_page(page)
+                symbol = symbol_for(page)
+                self.assertEqual(
+                    self.lxml_fetcher.parse_page(symbol, content),
+                    self.bs4_fetcher.parse_page(symbol, content)
+                )
+
+    def test_rows_are_typed_tuples(self):
+        page = os.path.join(FIXTURE_DIR, 'ADIN_20240101-20240131.html')
+        first = parse_history_table(read_page(page))[0]
+        self.assertIsInstance(first, tuple)
+        self.assertEqual(first[0].isoformat(), '2024-01-31')
+        self.assertEqual(first[1:3], (21600.0, 21800.0))
+
+    def test_compact_rows_match_dict_rows(self):
+        page = os.path.join(FIXTURE_DIR, 'ADIN_20240101-20240131.html')
+        compact = DataFetcherFilter(parser='lxml', compact_rows=True).parse_page('ADIN', read_page(page))
+        rows = self.lxml_fetcher.parse_page('ADIN', read_page(page))
+        self.assertEqual([record_to_dict(record) for record in compact], rows)
+        self.assertEqual(compact[0][:2], ('ADIN', rows[0]['date']))
+
+    def test_decode_columns(self):
+        columns = decode_columns([
+            ['1/31/2024', '21,600.00', '', 'n/a', '21,600.00', '-1.5%', '1,250', '0', '2,160,000'],
+            ['not a date', '1', '1', '1', '1', '1', '1', '1', '1'],
+            ['1/30/2024', '1'],
+        ])
+        self.assertEqual([d.isoformat() for d in columns['date']], ['2024-01-31'])
+        self.assertEqual(columns['last_trade_price'].tolist(), [21600.0])
+        self.assertEqual(columns['max_price'].tolist(), [0.0])
+        self.assertEqual(columns['min_price'].tolist(), [0.0])
+        self.assertEqual(columns['change_percentage'].tolist(), [-1.5])
+        self.assertEqual(columns['volume'].dtype.kind, 'i')
+        self.assertEqual(columns['volume'].tolist(), [1250])
+
+    def test_page_without_table(self):
+        self.assertEqual(parse_history_table("<html><body><p>Error</p></body></html>"), [])
+
+    def test_unknown_parser_is_rejected(self):
+        with self.assertRaises(ValueError):
+            DataFetcherFilter(parser='regex')
+
+if __name__ == '__main__':
+    unittest.main()
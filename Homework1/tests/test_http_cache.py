@@ -0,0 +1,136 @@
+import os
+import tempfile
+import unittest
+from datetime import date, timedelta
+from unittest import mock
+from src.filters.data_fetcher import DataFetcherFilter
+from src.sinks.artifact_sink import ArtifactSink
+from src.utils.http_cache import HttpCache
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures', 'history')
+
+class FakeRateLimiter:
+    def acquire(self, url):
+        pass
+
+    def record_response(self, url, status, retry_after=None):
+        pass
+
+class FakeResponse:
+    def __init__(self, status_code, text='', headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        pass
+
+class FakeSession:
+    def __init__(self, response):
+        self.response = response
+        self.requests = []
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        self.requests.append(headers)
+        return self.response
+
+class TestHttpCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.cache = HttpCache(self.tmp.name)
+
+    def test_closed_range_is_fresh(self):
+        self.cache.store('ADIN', date(2024, 1, 1), date(2024, 1, 31), '<table></table>', etag='"v1"')
+        entry = self.cache.lookup('ADIN', date(2024, 1, 1), date(2024, 1, 31))
+        self.assertTrue(entry.fresh)
+        self.assertEqual(entry.body, '<table></table>')
+        self.assertEqual(entry.etag, '"v1"')
+
+    def test_open_range_needs_revalidation(self):
+        today = date.today()
+        self.cache.store('ADIN', today - timedelta(days=3), today, '<table></table>',
+                         etag='"v2"', last_modified='Mon, 20 May 2024 10:00:00 GMT')
+        entry = self.cache.lookup('ADIN', today - timedelta(days=3), today)
+        self.assertFalse(entry.fresh)
+        self.assertEqual(HttpCache.validators(entry), {
+            'If-None-Match': '"v2"',
+            'If-Modified-Since': 'Mon, 20 May 2024 10:00:00 GMT'
+        })
+
+    def test_store_replaces_entries_atomically(self):
+        self.cache.store('ADIN', date(2024, 1, 1), date(2024, 1, 31), '<table>1</table>')
+        self.cache.store('ADIN', date(2024, 1, 1), date(2024, 1, 31), '<table>22</table>')
+        files = os.listdir(self.tmp.name)
+        self.assertEqual(len(files), 2)
+        self.assertFalse([name for name in files if name.endswith('.tmp')])
+        self.assertEqual(self.cache.total_bytes,
+                         sum(os.path.getsize(os.path.join(self.tmp.name, name)) for name in files))
+        self.assertEqual(self.cache.lookup('ADIN', date(2024, 1, 1), date(2024, 1, 31)).body,
+                         '<table>22</table>')
+
+    def test_missing_entry(self):
+        self.assertIsNone(self.cache.lookup('ADIN', date(2024, 1, 1), date(2024, 1, 31)))
+
+    def test_evicts_least_recently_used(self):
+        body = os.urandom(4096).hex()
+        self.cache.store('OLD', date(2024, 1, 1), date(2024, 1, 31), body)
+        old_body = os.path.join(self.tmp.name, os.listdir(self.tmp.name)[0].split('.')[0] + '.html.gz')
+        os.utime(old_body, (0, 0))
+        self.cache.max_bytes = self.cache.total_bytes + 1024
+        self.cache.store('NEW', date(2024, 1, 1), date(2024, 1, 31), body)
+
+        self.assertIsNone(self.cache.lookup('OLD', date(2024, 1, 1), date(2024, 1, 31)))
+        self.assertIsNotNone(self.cache.lookup('NEW', date(2024, 1, 1), date(2024, 1, 31)))
+        self.assertLessEqual(self.cache.total_bytes, self.cache.max_bytes)
+
+class TestFetcherWithCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.cache = HttpCache(self.tmp.name)
+        self.fetcher = DataFetcherFilter(
+            rate_limiter=FakeRateLimiter(), artifact_sink=ArtifactSink(), http_cache=self.cache
+        )
+        with open(os.path.join(FIXTURES, 'ADIN_20240101-20240131.html'), encoding='utf-8') as f:
+            self.page = f.read()
+
+    def test_fresh_entry_skips_network(self):
+        chunk = {'symbol': 'ADIN', 'start_date': date(2024, 1, 1), 'end_date': date(2024, 1, 31)}
+        self.cache.store('ADIN', chunk['start_date'], chunk['end_date'], self.page)
+        session = FakeSession(FakeResponse(500))
+
+        rows = self.fetcher.process(chunk, session=session)
+        self.assertTrue(rows)
+        self.assertEqual(session.requests, [])
+
+    def test_not_modified_reuses_cached_body(self):
+        today = date.today()
+        chunk = {'symbol': 'ADIN', 'start_date': today - timedelta(days=6), 'end_date': today}
+        self.cache.store('ADIN', chunk['start_date'], chunk['end_date'], self.page, etag='"v1"')
+        session = FakeSession(FakeResponse(304))
+
+        rows = self.fetcher.process(chunk, session=session)
+        self.assertTrue(rows)
+        self.assertEqual(session.requests, [{'If-None-Match': '"v1"'}])
+
+    def test_not_modified_without_cached_copy_is_an_error(self):
+        chunk = {'symbol': 'ADIN', 'start_date': date(2024, 1, 1), 'end_date': date(2024, 1, 31)}
+        session = FakeSession(FakeResponse(304))
+
+        with mock.patch('src.filters.data_fetcher.time.sleep'):
+            self.assertEqual(self.fetcher.process(chunk, session=session), [])
+        self.assertEqual(len(session.requests), 3)
+        self.assertIsNone(self.cache.lookup('ADIN', chunk['start_date'], chunk['end_date']))
+
+    def test_full_response_is_stored(self):
+        chunk = {'symbol': 'ADIN', 'start_date': date(2024, 1, 1), 'end_date': date(2024, 1, 31)}
+        session = FakeSession(FakeResponse(200, self.page, {'ETag': '"v3"'}))
+
+        self.fetcher.process(chunk, session=session)
+        entry = self.cache.lookup('ADIN', chunk['start_date'], chunk['end_date'])
+        self.assertEqual(entry.etag, '"v3"')
+        self.assertEqual(entry.body, self.page)
+
+if __name__ == '__main__':
+    unittest.main()
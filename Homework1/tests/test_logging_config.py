@@ -0,0 +1,62 @@
+import io
+import json
+import logging
+import unittest
+from src.utils.logging_config import configure_logging, parse_module_levels, shutdown_logging
+
+class CountingArg:
+    def __init__(self):
+        self.calls = 0
+
+    def __str__(self):
+        self.calls += 1
+        return 'ADIN'
+
+class TestLoggingConfig(unittest.TestCase):
+    def setUp(self):
+        self.stream = io.StringIO()
+        self.addCleanup(self._reset)
+
+    def _reset(self):
+        shutdown_logging()
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.setLevel(logging.WARNING)
+        logging.getLogger('tests.debug').setLevel(logging.NOTSET)
+
+    def test_json_lines_include_extra_fields(self):
+        configure_logging(level='INFO', json_output=True, stream=self.stream)
+        logging.getLogger('tests.json').info("%s: %d records", 'ADIN', 21, extra={'symbol': 'ADIN'})
+        shutdown_logging()
+
+        entry = json.loads(self.stream.getvalue())
+        self.assertEqual(entry['message'], 'ADIN: 21 records')
+        self.assertEqual(entry['level'], 'INFO')
+        self.assertEqual(entry['logger'], 'tests.json')
+        self.assertEqual(entry['symbol'], 'ADIN')
+
+    def test_filtered_records_are_never_formatted(self):
+        configure_logging(level='INFO', stream=self.stream)
+        arg = CountingArg()
+        logging.getLogger('tests.lazy').debug("Fetching %s", arg)
+        shutdown_logging()
+
+        self.assertEqual(arg.calls, 0)
+        self.assertEqual(self.stream.getvalue(), '')
+
+    def test_module_levels(self):
+        levels = parse_module_levels('tests.debug=debug, src.database=WARNING')
+        self.assertEqual(levels, {'tests.debug': 'DEBUG', 'src.database': 'WARNING'})
+
+        configure_logging(level='WARNING', module_levels=levels, stream=self.stream)
+        logging.getLogger('tests.debug').debug("kept")
+        logging.getLogger('tests.other').info("dropped")
+        shutdown_logging()
+
+        output = self.stream.getvalue()
+        self.assertIn('DEBUG tests.debug: kept', output)
+        self.assertNotIn('dropped', output)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+import urllib.request
+from src.utils.metrics_exporter import CONTENT_TYPE, MetricsServer, render_openmetrics
+from src.utils.performance_metrics import PerformanceMetrics
+
+class TestMetricsExporter(unittest.TestCase):
+    def setUp(self):
+        self.metrics = PerformanceMetrics()
+        for duration in (0.02, 0.2, 2.0):
+            self.metrics.record_metric('database_operations', 'save_batch', duration, True)
+        self.metrics.increment('write_stage.rows_written', 1500)
+        self.metrics.increment('http.responses.200', 3)
+        self.metrics.increment('http.responses.429')
+        self.metrics.increment('http_cache.hits', 3)
+        self.metrics.increment('http_cache.misses', 1)
+        self.metrics.set_gauge('write_stage.queue_items', 4)
+
+    def test_render(self):
+        text = render_openmetrics(self.metrics)
+        lines = text.splitlines()
+        self.assertIn('# TYPE mse_operation_duration_seconds histogram', lines)
+        self.assertIn('mse_operation_duration_seconds_bucket{category="database_operations",le="0.025"} 1', lines)
+        self.assertIn('mse_operation_duration_seconds_bucket{category="database_operations",le="0.25"} 2', lines)
+        self.assertIn('mse_operation_duration_seconds_bucket{category="database_operations",le="+Inf"} 3', lines)
+        self.assertIn('mse_write_stage_rows_written_total 1500', lines)
+        self.assertIn('mse_http_responses_total{status="429"} 1', lines)
+        self.assertIn('mse_write_stage_queue_items 4', lines)
+        self.assertIn('mse_http_cache_hit_ratio 0.75', lines)
+        self.assertEqual(lines[-1], '# EOF')
+
+    def test_server(self):
+        server = MetricsServer(port=0, metrics=self.metrics).start()
+        self.addCleanup(server.stop)
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.port}/metrics") as response:
+            self.assertEqual(response.headers['Content-Type'], CONTENT_TYPE)
+            self.assertIn('mse_write_stage_rows_written_total 1500', response.read().decode())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import pickle
+import threading
+import unittest
+from src.utils.performance_metrics import LatencyHistogram, PerformanceMetrics
+
+class TestLatencyHistogram(unittest.TestCase):
+    def test_percentiles_within_bucket_precision(self):
+        histogram = LatencyHistogram()
+        for ms in range(1, 1001):
+            histogram.record(ms / 1000)
+
+        self.assertEqual(histogram.count, 1000)
+        self.assertAlmostEqual(histogram.percentile(50), 0.5, delta=0.5 * 0.04)
+        self.assertAlmostEqual(histogram.percentile(95), 0.95, delta=0.95 * 0.04)
+        self.assertAlmostEqual(histogram.percentile(99), 0.99, delta=0.99 * 0.04)
+        self.assertEqual(histogram.percentile(100), 1.0)
+
+    def test_size_is_fixed(self):
+        histogram = LatencyHistogram()
+        for i in range(10000):
+            histogram.record(i * 0.37)
+        self.assertEqual(len(histogram.counts), LatencyHistogram.BUCKET_COUNT)
+
+    def test_merge(self):
+        a, b = LatencyHistogram(), LatencyHistogram()
+        a.record(0.1, success=True)
+        b.record(2.0, success=False)
+        a.merge(b)
+        self.assertEqual((a.count, a.successes), (2, 1))
+        self.assertEqual((a.min, a.max), (0.1, 2.0))
+
+class TestPerformanceMetrics(unittest.TestCase):
+    def test_threads_are_merged_into_summary(self):
+        metrics = PerformanceMetrics()
+
+        def work():
+            for _ in range(100):
+                metrics.record_metric('symbol_processing', 'process_symbol', 0.01, True)
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        metrics.record_metric('symbol_processing', 'process_symbol', 1.0, False)
+
+        stats = metrics.get_summary()['symbol_processing']
+        self.assertEqual(stats['total_operations'], 401)
+        self.assertEqual(stats['successful_operations'], 400)
+        self.assertEqual(stats['max_duration'], 1.0)
+        self.assertAlmostEqual(stats['p50_duration'], 0.01, delta=0.001)
+        # Buffers of finished threads are folded away
+        self.assertLessEqual(len(metrics._buffers), 1)
+
+    def test_merge_snapshot_from_another_process(self):
+        worker = PerformanceMetrics()
+        worker.record_metric('symbol_processing', 'process_symbol', 2.0, True)
+        worker.increment('write_stage.rows_written', 300)
+        worker.set_gauge('write_stage.queue_items', 7)
+
+        coordinator = PerformanceMetrics()
+        coordinator.record_metric('symbol_processing', 'process_symbol', 1.0, False)
+        coordinator.increment('write_stage.rows_written', 200)
+        coordinator.set_gauge('write_stage.queue_items', 3)
+        coordinator.merge_snapshot(pickle.loads(pickle.dumps(worker.snapshot())))
+
+        stats = coordinator.get_summary()['symbol_processing']
+        self.assertEqual((stats['total_operations'], stats['successful_operations']), (2, 1))
+        self.assertEqual(stats['max_duration'], 2.0)
+        snapshot = coordinator.get_counters()
+        self.assertEqual(snapshot['counters']['write_stage.rows_written'], 500)
+        self.assertEqual(snapshot['gauges']['write_stage.queue_items'], 7)
+        self.assertGreater(coordinator.peak_memory_mb, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import os
+import tempfile
+import threading
+import unittest
+from datetime import date
+from unittest import mock
+from src.core.pipeline import Pipeline
+
+class BlockedDatabase:
+    """Writes hang until released; records the read-model refreshes"""
+    def __init__(self, **kwargs):
+        self.engine = mock.Mock()
+        self.release = threading.Event()
+        self.refreshed = []
+
+    def save_stock_data(self, rows, connection=None):
+        self.release.wait()
+        return True
+
+    def refresh_market_overview(self, symbols):
+        self.refreshed.append('market_overview')
+
+    def refresh_popularity(self):
+        self.refreshed.append('popularity')
+
+    def bump_data_version(self):
+        self.refreshed.append('data_version')
+
+CHUNK = {'symbol': 'ALK', 'start_date': date(2024, 1, 1), 'end_date': date(2024, 5, 17)}
+ROWS = [{'symbol': 'ALK', 'date': date(2024, 1, 2), 'volume': i} for i in range(10)]
+
+class TestPipelineUndrainedWrites(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        with mock.patch('src.core.pipeline.DatabaseManager', BlockedDatabase):
+            self.pipeline = Pipeline(
+                artifacts=('none',), writer_threads=1, http_cache_mb=0,
+                journal_path=os.path.join(self.tmp.name, 'journal.sqlite3')
+            )
+        self.addCleanup(self.pipeline.journal.close)
+        self.addCleanup(self._release_writers)
+        self.db = self.pipeline.db
+        self.pipeline.write_stage.close_timeout = 0.1
+
+        def plan_chunks(symbols):
+            self.pipeline.chunk_plan = {'ALK': [CHUNK]}
+            self.pipeline.journal.record_planned([CHUNK])
+
+        for target, attribute, value in (
+            (self.pipeline.symbol_scraper, 'process', mock.Mock(return_value=['ALK'])),
+            (self.pipeline, 'plan_chunks', plan_chunks),
+            (self.pipeline.data_fetcher, 'fetch', mock.Mock(return_value=ROWS)),
+            (self.pipeline.data_fetcher, 'fetch_async', mock.AsyncMock(return_value=ROWS)),
+        ):
+            patcher = mock.patch.object(target, attribute, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _release_writers(self):
+        self.db.release.set()
+        for thread in threading.enumerate():
+            if thread.name.startswith('db-writer-'):
+                thread.join(5)
+
+    def _run_status(self):
+        return self.pipeline.journal._conn.execute(
+            "SELECT status FROM runs WHERE run_id = ?", (self.pipeline.journal.run_id,)
+        ).fetchone()[0]
+
+    def assert_failed_run(self):
+        self.assertEqual(self.db.refreshed, [])
+        self.assertEqual(self._run_status(), 'failed')
+        self.assertEqual(self.pipeline.journal.unfinished_chunks(), {'ALK': [CHUNK]})
+
+    def test_run_fails_when_writes_do_not_drain(self):
+        with self.assertLogs('src.core.write_stage', level='ERROR'):
+            self.assertFalse(self.pipeline.run())
+        self.assert_failed_run()
+
+    def test_run_async_fails_when_writes_do_not_drain(self):
+        with self.assertLogs('src.core.write_stage', level='ERROR'):
+            self.assertFalse(self.pipeline.run_async())
+        self.assert_failed_run()
+
+if __name__ == '__main__':
+    unittest.main()
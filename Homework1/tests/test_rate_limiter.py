@@ -0,0 +1,53 @@
+import unittest
+from src.utils.rate_limiter import RateLimiter, TokenBucket
+
+class TestTokenBucket(unittest.TestCase):
+    def test_reservations_beyond_capacity_wait(self):
+        bucket = TokenBucket(rate=10.0, capacity=2)
+        now = bucket.updated
+        self.assertEqual(bucket.reserve(now), 0.0)
+        self.assertEqual(bucket.reserve(now), 0.0)
+        self.assertAlmostEqual(bucket.reserve(now), 0.1)
+        self.assertAlmostEqual(bucket.reserve(now), 0.2)
+
+    def test_refill_is_capped(self):
+        bucket = TokenBucket(rate=10.0, capacity=2)
+        now = bucket.updated
+        bucket.reserve(now)
+        bucket.reserve(now)
+        self.assertEqual(bucket.reserve(now + 100), 0.0)
+        self.assertAlmostEqual(bucket.tokens, 1.0)
+
+class TestRateLimiter(unittest.TestCase):
+    url = "https://www.mse.mk/en/stats/symbolhistory/ADIN"
+
+    def setUp(self):
+        self.limiter = RateLimiter(global_rate=100.0, host_rate=20.0,
+                                   min_host_rate=1.0, max_host_rate=40.0,
+                                   cooldown=60.0)
+
+    def test_throttle_halves_host_rate_once_per_cooldown(self):
+        self.limiter.record_response(self.url, 429)
+        self.assertAlmostEqual(self.limiter.current_rate(self.url), 10.0)
+        self.limiter.record_response(self.url, 503)
+        self.assertAlmostEqual(self.limiter.current_rate(self.url), 10.0)
+
+    def test_success_increases_rate_additively(self):
+        for _ in range(10):
+            self.limiter.record_response(self.url, 200)
+        self.assertAlmostEqual(self.limiter.current_rate(self.url), 21.0)
+
+    def test_retry_after_blocks_host(self):
+        self.limiter.record_response(self.url, 429, retry_after="5")
+        self.assertGreater(self.limiter._reserve(self.url), 4.0)
+        # Other hosts are not affected
+        self.assertEqual(self.limiter._reserve("https://example.com/"), 0.0)
+
+    def test_share_splits_the_budget(self):
+        shares = [self.limiter.share(4) for _ in range(4)]
+        self.assertAlmostEqual(sum(s.global_bucket.rate for s in shares), self.limiter.global_bucket.rate)
+        self.assertAlmostEqual(sum(s.host_rate for s in shares), self.limiter.host_rate)
+        self.assertAlmostEqual(sum(s.max_host_rate for s in shares), self.limiter.max_host_rate)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+from datetime import date
+from src.core.run_journal import RunJournal, subtract_ranges
+
+def chunk(symbol, start, end):
+    return {'symbol': symbol, 'start_date': start, 'end_date': end}
+
+class TestSubtractRanges(unittest.TestCase):
+    def test_splits_around_covered_ranges(self):
+        self.assertEqual(
+            subtract_ranges([(date(2024, 1, 1), date(2024, 1, 31))],
+                            [(date(2024, 1, 10), date(2024, 1, 12)),
+                             (date(2024, 1, 20), date(2024, 2, 10))]),
+            [(date(2024, 1, 1), date(2024, 1, 9)), (date(2024, 1, 13), date(2024, 1, 19))]
+        )
+
+    def test_fully_covered(self):
+        self.assertEqual(
+            subtract_ranges([(date(2024, 1, 5), date(2024, 1, 6))],
+                            [(date(2024, 1, 1), date(2024, 1, 31))]),
+            []
+        )
+
+class TestRunJournal(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, 'journal.sqlite3')
+        self.journal = RunJournal(self.path)
+        self.addCleanup(self.journal.close)
+
+    def test_interrupted_run_resumes_unfinished_chunks(self):
+        chunks = [
+            chunk('ADIN', date(2023, 1, 1), date(2023, 12, 31)),
+            chunk('ADIN', date(2024, 1, 1), date(2024, 5, 17)),
+            chunk('KMB', date(2024, 1, 1), date(2024, 5, 17)),
+        ]
+        self.journal.start_run()
+        self.journal.record_planned(chunks)
+        # Chunks complete out of order, then the run dies
+        self.journal.mark_done(chunks[1], 95)
+        self.journal.mark_failed(chunks[2], 'timeout')
+
+        resumed = RunJournal(self.path)
+        self.addCleanup(resumed.close)
+        self.assertEqual(resumed.unfinished_chunks(), {
+            'ADIN': [chunks[0]],
+            'KMB': [chunks[2]],
+        })
+        self.assertEqual(resumed.unfinished_chunks(['KMB']), {'KMB': [chunks[2]]})
+        self.assertEqual(resumed.closed_ranges(), {'ADIN': [(date(2024, 1, 1), date(2024, 5, 17))]})
+
+    def test_completion_waits_for_every_batch(self):
+        c = chunk('ADIN', date(2023, 1, 1), date(2023, 12, 31))
+        self.journal.start_run()
+        self.journal.record_planned([c])
+        completion = self.journal.completion(c, rows=250, parts=2)
+
+        completion(True)
+        self.assertEqual(self.journal.status_counts(), {'pending': 1})
+        completion(True)
+        self.assertEqual(self.journal.status_counts(), {'done': 1})
+
+    def test_failed_batch_fails_chunk(self):
+        c = chunk('ADIN', date(2023, 1, 1), date(2023, 12, 31))
+        self.journal.start_run()
+        self.journal.record_planned([c])
+        completion = self.journal.completion(c, rows=250, parts=2)
+
+        completion(False)
+        completion(True)
+        self.assertEqual(self.journal.status_counts(), {'failed': 1})
+
+if __name__ == '__main__':
+    unittest.main()
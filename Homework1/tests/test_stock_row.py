@@ -0,0 +1,57 @@
+import unittest
+from datetime import date
+
+import numpy as np
+
+from src.core.write_stage import estimate_bytes
+from src.database.db_manager import CopyStream
+from src.models.stock_row import StockBatch, StockRow
+
+def make_columns(days):
+    return {
+        'date': np.array([date(2024, 1, day) for day in days], dtype=object),
+        'last_trade_price': np.array([100.0 + day for day in days]),
+        'max_price': np.array([101.0 + day for day in days]),
+        'min_price': np.array([99.0 + day for day in days]),
+        'avg_price': np.array([100.5 + day for day in days]),
+        'change_percentage': np.array([-0.5] * len(days)),
+        'volume': np.array([10 * day for day in days], dtype=np.int64),
+        'turnover_best': np.array([0.0] * len(days)),
+        'total_turnover': np.array([1000.0 * day for day in days]),
+    }
+
+class TestStockBatch(unittest.TestCase):
+    def setUp(self):
+        self.batch = StockBatch.from_columns('ADIN', make_columns([3, 2, 1]))
+
+    def test_iterates_as_stock_rows(self):
+        rows = list(self.batch)
+        self.assertEqual(len(rows), 3)
+        self.assertIsInstance(rows[0], StockRow)
+        self.assertEqual(rows[0], StockRow('ADIN', date(2024, 1, 3), 103.0, 104.0, 102.0,
+                                           103.5, -0.5, 30, 0.0, 3000.0))
+        self.assertIsInstance(rows[0].volume, int)
+
+    def test_slices_and_indexes(self):
+        tail = self.batch[1:]
+        self.assertIsInstance(tail, StockBatch)
+        self.assertEqual([row.date.day for row in tail], [2, 1])
+        self.assertEqual(self.batch[-1].date, date(2024, 1, 1))
+
+    def test_round_trips_rows(self):
+        rows = list(self.batch) + [StockRow('ALK', date(2024, 1, 4), 1.0, 1.0, 1.0, 1.0, 0.0, 1, 1.0, 1.0)]
+        self.assertEqual(list(StockBatch.from_rows(rows)), rows)
+        self.assertEqual(list(StockBatch.from_rows([row._asdict() for row in rows])), rows)
+
+    def test_size_is_exact_and_compact(self):
+        self.assertEqual(estimate_bytes(self.batch), self.batch.nbytes)
+        self.assertLess(self.batch.nbytes, estimate_bytes(list(self.batch)))
+
+    def test_copy_lines_match_row_dicts(self):
+        self.assertEqual(
+            ''.join(CopyStream.format_row(row) for row in self.batch),
+            ''.join(CopyStream.format_row(row._asdict()) for row in self.batch)
+        )
+
+if __name__ == '__main__':
+    unittest.main()
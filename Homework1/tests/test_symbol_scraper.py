@@ -0,0 +1,89 @@
+import unittest
+from datetime import date, datetime, timedelta
+
+from benchmarks.fake_mse_server import FakeMSEServer
+from src.filters.symbol_scraper import SymbolScraperFilter
+
+class FakeRateLimiter:
+    def acquire(self, url):
+        pass
+
+    def record_response(self, url, status, retry_after=None):
+        pass
+
+class FakeDatabase:
+    """In-memory symbol_registry with last stored trading days"""
+    def __init__(self, last_traded=None):
+        self.registry = {}
+        self.last_traded = last_traded or {}
+
+    def get_symbol_registry(self):
+        return {
+            symbol: (first_seen, last_seen, refreshed_at, self.last_traded.get(symbol))
+            for symbol, (first_seen, last_seen, refreshed_at) in self.registry.items()
+        }
+
+    def record_symbols(self, symbols, seen_on, refreshed_at=None):
+        refreshed_at = refreshed_at or datetime.now()
+        for symbol in symbols:
+            first_seen = self.registry.get(symbol, (seen_on,))[0]
+            self.registry[symbol] = (first_seen, seen_on, refreshed_at)
+        return True
+
+class TestSymbolScraperFilter(unittest.TestCase):
+    def setUp(self):
+        self.today = date.today()
+        self.server = FakeMSEServer(symbols=['ADIN', 'ALK', 'KMB', 'RMDEN20']).start()
+        self.addCleanup(self.server.stop)
+
+    def scraper(self, db, **options):
+        return SymbolScraperFilter(rate_limiter=FakeRateLimiter(), base_url=self.server.url, db=db, **options)
+
+    def test_scrape_skips_symbols_with_digits(self):
+        self.assertEqual(self.scraper(None).process(), ['ADIN', 'ALK', 'KMB'])
+
+    def test_registry_is_used_within_ttl(self):
+        db = FakeDatabase()
+        scraper = self.scraper(db)
+        self.assertEqual(scraper.process(self.today), ['ADIN', 'ALK', 'KMB'])
+        self.assertEqual(db.registry['ALK'][0], self.today)
+        self.assertEqual(scraper.process(self.today), ['ADIN', 'ALK', 'KMB'])
+        self.assertEqual(self.server.requests, 1)
+
+    def test_stale_registry_is_refreshed(self):
+        db = FakeDatabase()
+        first_seen = self.today - timedelta(days=30)
+        db.record_symbols(['ADIN', 'OLD'], first_seen, refreshed_at=datetime.now() - timedelta(days=2))
+        self.assertEqual(self.scraper(db).process(self.today), ['ADIN', 'ALK', 'KMB'])
+        self.assertEqual(self.server.requests, 1)
+        self.assertEqual(db.registry['ADIN'][:2], (first_seen, self.today))
+        # No longer on the dropdown, so not served from the registry either
+        self.assertEqual(db.registry['OLD'][1], first_seen)
+        self.assertEqual(self.scraper(db).process(self.today), ['ADIN', 'ALK', 'KMB'])
+
+    def test_dormant_symbols_are_probed_not_dropped(self):
+        db = FakeDatabase(last_traded={
+            'ADIN': self.today - timedelta(days=1),
+            'ALK': self.today - timedelta(days=400),
+        })
+        scraper = self.scraper(db, delisted_after_days=90)
+        # ALK is still listed, so it is still fetched, over the last 90 days only;
+        # KMB has no stored rows yet
+        self.assertEqual(scraper.process(self.today), ['ADIN', 'ALK', 'KMB'])
+        self.assertEqual(scraper.dormant, {'ALK': self.today - timedelta(days=90)})
+        # Once it trades again it is a regular symbol
+        db.last_traded['ALK'] = self.today - timedelta(days=3)
+        scraper.process(self.today)
+        self.assertEqual(scraper.dormant, {})
+        disabled = self.scraper(db, delisted_after_days=0)
+        self.assertEqual(disabled.process(self.today), ['ADIN', 'ALK', 'KMB'])
+        self.assertEqual(disabled.dormant, {})
+
+    def test_failed_scrape_falls_back_to_registry(self):
+        db = FakeDatabase()
+        db.record_symbols(['ADIN', 'ALK'], self.today, refreshed_at=datetime.now() - timedelta(days=2))
+        scraper = SymbolScraperFilter(rate_limiter=FakeRateLimiter(), base_url='http://127.0.0.1:9', db=db)
+        self.assertEqual(scraper.process(self.today), ['ADIN', 'ALK'])
+
+if __name__ == '__main__':
+    unittest.main()
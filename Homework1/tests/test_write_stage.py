@@ -0,0 +1,119 @@
+import threading
+import time
+import unittest
+from datetime import date
+from src.core.write_stage import ByteBudgetQueue, WriteStage, estimate_bytes
+
+class FakeConnection:
+    def close(self):
+        pass
+
+    def invalidate(self):
+        pass
+
+class FakeEngine:
+    def raw_connection(self):
+        return FakeConnection()
+
+class FakeDatabase:
+    def __init__(self, delay=0.0):
+        self.engine = FakeEngine()
+        self.delay = delay
+        self.saved = []
+        self.connections = set()
+        self._lock = threading.Lock()
+
+    def save_stock_data(self, rows, connection=None):
+        time.sleep(self.delay)
+        with self._lock:
+            self.saved.extend(rows)
+            self.connections.add(id(connection))
+        return True
+
+def make_rows(count, symbol='ADIN'):
+    return [{'symbol': symbol, 'date': date(2024, 1, 1), 'volume': i} for i in range(count)]
+
+class TestByteBudgetQueue(unittest.TestCase):
+    def test_put_blocks_when_budget_is_used(self):
+        q = ByteBudgetQueue(max_bytes=100)
+        q.put('a', 60)
+        blocked = threading.Event()
+        done = threading.Event()
+
+        def producer():
+            blocked.set()
+            q.put('b', 60)
+            done.set()
+
+        threading.Thread(target=producer, daemon=True).start()
+        blocked.wait()
+        self.assertFalse(done.wait(0.1))
+        self.assertEqual(q.get()[0], 'a')
+        self.assertTrue(done.wait(1))
+        self.assertEqual(q.nbytes(), 60)
+
+    def test_oversized_item_is_admitted_when_empty(self):
+        q = ByteBudgetQueue(max_bytes=10)
+        q.put('big', 1000)
+        self.assertEqual(q.qsize(), 1)
+
+class TestWriteStage(unittest.TestCase):
+    def test_close_gives_up_after_timeout(self):
+        release = threading.Event()
+
+        class BlockedDatabase(FakeDatabase):
+            def save_stock_data(self, rows, connection=None):
+                release.wait()
+                return super().save_stock_data(rows, connection)
+
+        db = BlockedDatabase()
+        stage = WriteStage(db, writer_count=1, batch_size=10)
+        stage.start()
+        stage.put(make_rows(10))
+        time.sleep(0.05)
+        stage.put(make_rows(5))
+        with self.assertLogs('src.core.write_stage', level='ERROR'):
+            self.assertFalse(stage.close(timeout=0.1))
+        self.assertEqual(stage.undrained_rows(), 5)
+        release.set()
+
+    def test_close_flushes_every_row(self):
+        db = FakeDatabase(delay=0.01)
+        stage = WriteStage(db, writer_count=3, max_bytes=10_000, batch_size=500)
+        stage.start()
+        for i in range(20):
+            stage.put(make_rows(100, symbol=f'S{i}'))
+        stage.close()
+        self.assertEqual(len(db.saved), 2000)
+        self.assertEqual(stage.rows_written, 2000)
+        self.assertEqual(stage.queue.qsize(), 0)
+        self.assertLessEqual(len(db.connections), 3)
+
+    def test_on_written_is_called_after_save(self):
+        db = FakeDatabase()
+        stage = WriteStage(db, writer_count=2, max_bytes=10_000, batch_size=500)
+        results = []
+        stage.start()
+        for i in range(5):
+            stage.put(make_rows(10, symbol=f'S{i}'), on_written=results.append)
+        stage.close()
+        self.assertEqual(results, [True] * 5)
+
+    def test_inflight_bytes_are_tracked_per_key(self):
+        db = FakeDatabase()
+        stage = WriteStage(db, writer_count=1, max_bytes=1_000_000, batch_size=500)
+        rows = [('ADIN', date(2024, 1, 1), 1.0)] * 50
+        stage.put(rows, key='ADIN')
+        stage.put(rows, key='ADIN')
+        stage.put(rows[:10], key='ALK')
+        peaks = stage.peak_bytes()
+        self.assertEqual(peaks['ADIN'], 2 * estimate_bytes(rows))
+        self.assertEqual(peaks['ALK'], estimate_bytes(rows[:10]))
+        stage.start()
+        stage.close()
+        # Released once written; the peak is kept
+        self.assertEqual(stage.inflight_bytes, {})
+        self.assertEqual(stage.peak_bytes(), peaks)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,77 +1,109 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.db.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.async_database import get_async_db
 from app.services.stocks.stock_service import StockService
+from app.services.stocks.response_cache import CachedResponse
+from app.services.stocks.columnar import ARROW_MEDIA_TYPE, encode_arrow
 from app.models.stock import WishlistItem
-from typing import List, Dict, Any
+from typing import Literal
 
 router = APIRouter()
 
+# Clients may reuse a response this long before revalidating with If-None-Match
+CACHE_CONTROL = "public, max-age=60"
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match is "*" or a list of entity tags, compared weakly (RFC 9110)"""
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+def cached_response(request: Request, entry: CachedResponse) -> Response:
+    headers = {"ETag": entry.etag, "Cache-Control": CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match", ""), entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type=entry.media_type, headers=headers)
+
 @router.get("/symbols")
-def get_symbols(db: Session = Depends(get_db)):
+async def get_symbols(request: Request, db: AsyncSession = Depends(get_async_db)):
     try:
         service = StockService(db)
-        return service.get_symbols()
+        return cached_response(request, await service.cached("get_symbols"))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/market-overview")
-def get_market_overview(db: Session = Depends(get_db)):
+async def get_market_overview(request: Request, db: AsyncSession = Depends(get_async_db)):
     try:
         service = StockService(db)
-        return service.get_market_overview()
+        return cached_response(request, await service.cached("get_market_overview"))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/popular-stocks")
-def get_popular_stocks(db: Session = Depends(get_db)):
+async def get_popular_stocks(request: Request, db: AsyncSession = Depends(get_async_db)):
     try:
         service = StockService(db)
-        return service.get_popular_stocks()
+        return cached_response(request, await service.cached("get_popular_stocks"))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/data/{symbol}")
-def get_stock_data(
+async def get_stock_data(
     symbol: str, 
     start_date: str, 
     end_date: str, 
-    db: Session = Depends(get_db)
+    request: Request,
+    response_format: Literal["rows", "columnar", "arrow"] = Query("rows", alias="format"),
+    db: AsyncSession = Depends(get_async_db)
 ):
+    """rows: one object per day; columnar: one JSON array per field;
+    arrow: the columnar form as an Arrow IPC stream"""
     try:
         service = StockService(db)
-        return service.get_stock_data(symbol, start_date, end_date)
+        if response_format == "rows":
+            entry = await service.cached("get_stock_data", symbol, start_date, end_date)
+        elif response_format == "columnar":
+            entry = await service.cached("get_stock_data_columns", symbol, start_date, end_date)
+        else:
+            entry = await service.cached("get_stock_data_columns", symbol, start_date, end_date,
+                                         encode=encode_arrow, media_type=ARROW_MEDIA_TYPE)
+        return cached_response(request, entry)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/wishlist/{symbol}")
-def add_to_wishlist(symbol: str, db: Session = Depends(get_db)):
+async def add_to_wishlist(symbol: str, db: AsyncSession = Depends(get_async_db)):
     try:
         # Check if already exists
-        existing = db.query(WishlistItem).filter(WishlistItem.symbol == symbol).first()
+        result = await db.execute(select(WishlistItem).where(WishlistItem.symbol == symbol))
+        existing = result.scalars().first()
         if existing:
             raise HTTPException(status_code=400, detail="Symbol already in wishlist")
             
         wishlist_item = WishlistItem(symbol=symbol)
         db.add(wishlist_item)
-        db.commit()
+        await db.commit()
         return {"message": "Added to wishlist"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.delete("/wishlist/{symbol}")
-def remove_from_wishlist(symbol: str, db: Session = Depends(get_db)):
+async def remove_from_wishlist(symbol: str, db: AsyncSession = Depends(get_async_db)):
     try:
-        db.query(WishlistItem).filter(WishlistItem.symbol == symbol).delete()
-        db.commit()
+        await db.execute(delete(WishlistItem).where(WishlistItem.symbol == symbol))
+        await db.commit()
         return {"message": "Removed from wishlist"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/wishlist")
-def get_wishlist(db: Session = Depends(get_db)):
+async def get_wishlist(db: AsyncSession = Depends(get_async_db)):
     try:
         service = StockService(db)
-        return service.get_wishlist(db)
+        return await service.get_wishlist(db)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
-from app.db.database import get_db
+from app.db.async_database import get_async_db
 from datetime import datetime
 from typing import Optional, Dict, Any, List
 import pandas as pd
@@ -10,10 +11,10 @@ from app.services.technical.technical_analyzer import TechnicalAnalyzer
 router = APIRouter()
 
 @router.get("/technical/{symbol}")
-def get_technical_analysis(
+async def get_technical_analysis(
     symbol: str,
     timeframe: str = Query("6M", description="Timeframe quick select (e.g., 1M, 3M, 6M, 1Y)"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Dict[str, Any]:
     # Convert timeframe to date range
     end_date = pd.Timestamp.today().normalize()
@@ -35,11 +36,12 @@ def get_technical_analysis(
         ORDER BY date ASC
     """)
     
-    rows = db.execute(query, {
+    result = await db.execute(query, {
         "symbol": symbol,
-        "start_date": start_date.strftime("%Y-%m-%d"),
-        "end_date": end_date.strftime("%Y-%m-%d")
-    }).fetchall()
+        "start_date": start_date.date(),
+        "end_date": end_date.date()
+    })
+    rows = result.fetchall()
 
     if not rows:
         raise HTTPException(
@@ -55,8 +57,9 @@ def get_technical_analysis(
     # Initialize technical analyzer
     analyzer = TechnicalAnalyzer()
     
-    # Perform analysis for all timeframes
-    results = analyzer.analyze_data(df)
+    # Perform analysis for all timeframes; pandas work is CPU-bound, so it
+    # runs in the threadpool rather than blocking the event loop
+    results = await run_in_threadpool(analyzer.analyze_data, df)
     
     # Convert results to response format
     def prepare_response_data(df: pd.DataFrame) -> List[Dict[str, Any]]:
@@ -0,0 +1,29 @@
+import os
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from app.db.database import SQLALCHEMY_DATABASE_URL
+
+# Same database as the sync engine, through asyncpg
+ASYNC_DATABASE_URL = SQLALCHEMY_DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1)
+
+# Requests no longer wait in the threadpool, so this pool is what bounds
+# concurrent queries; excess requests queue for a connection for up to
+# pool_timeout seconds instead of opening more
+ASYNC_POOL_SIZE = int(os.getenv("ASYNC_DB_POOL_SIZE", "20"))
+ASYNC_MAX_OVERFLOW = int(os.getenv("ASYNC_DB_MAX_OVERFLOW", "10"))
+
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    pool_size=ASYNC_POOL_SIZE,
+    max_overflow=ASYNC_MAX_OVERFLOW,
+    pool_timeout=30,
+    pool_pre_ping=True,
+    pool_recycle=3600,
+    # Heroku requires SSL; asyncpg takes it as "ssl" rather than "sslmode"
+    connect_args={"ssl": "require"} if os.getenv('DATABASE_URL') else {}
+)
+
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False, autoflush=False)
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -23,12 +23,16 @@ else:
     DB_NAME = os.getenv("DB_NAME")
     SQLALCHEMY_DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
+# Only sync routes (auth) use this engine, and they run on the threadpool,
+# so no more connections than threads can ever be checked out at once
+SYNC_THREADPOOL_SIZE = 40  # anyio's default thread limit
+
 # Add SSL requirement for Heroku
 if os.getenv('DATABASE_URL'):
     engine = create_engine(
         SQLALCHEMY_DATABASE_URL,
-        pool_size=30,
-        max_overflow=40,
+        pool_size=10,
+        max_overflow=SYNC_THREADPOOL_SIZE - 10,
         pool_timeout=30,
         pool_pre_ping=True,
         pool_recycle=3600,
@@ -39,8 +43,8 @@ if os.getenv('DATABASE_URL'):
 else:
     engine = create_engine(
         SQLALCHEMY_DATABASE_URL,
-        pool_size=30,
-        max_overflow=40,
+        pool_size=10,
+        max_overflow=SYNC_THREADPOOL_SIZE - 10,
         pool_timeout=30,
         pool_pre_ping=True,
         pool_recycle=3600
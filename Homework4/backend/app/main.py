@@ -2,6 +2,8 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api import auth, stocks, technical, fundamental
 from app.db.database import init_db
+from app.db.async_database import async_engine
+from app.metrics import METRICS_PATH, metrics_response, track_requests
 
 app = FastAPI()
 
@@ -12,16 +14,26 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.middleware("http")(track_requests)
 
 @app.on_event("startup")
 async def startup_event():
     init_db()
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    await async_engine.dispose()
+
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 app.include_router(stocks.router, prefix="/api/stocks", tags=["stocks"])
 app.include_router(technical.router, prefix="/api/analysis", tags=["analysis"])
 app.include_router(fundamental.router, prefix="/api/fundamental", tags=["fundamental"])
 
+# Served at the exact path: Prometheus does not follow a mount's redirect to /metrics/
+@app.get(METRICS_PATH, include_in_schema=False)
+def metrics():
+    return metrics_response()
+
 @app.get("/")
 async def root():
     return {"message": "MSE API is running"}
\ No newline at end of file
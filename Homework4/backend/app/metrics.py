@@ -0,0 +1,69 @@
+import time
+from fastapi import Request, Response
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "api_http_request_duration_seconds",
+    "Time spent handling HTTP requests",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_RESPONSES = Counter(
+    "api_http_responses",
+    "HTTP responses by route and status code",
+    ["method", "route", "status"],
+)
+DB_QUERY_SECONDS = Histogram(
+    "api_db_query_duration_seconds",
+    "Time spent executing repository queries",
+    ["repository"],
+    buckets=LATENCY_BUCKETS,
+)
+DB_QUERY_ERRORS = Counter(
+    "api_db_query_errors",
+    "Repository queries that raised",
+    ["repository"],
+)
+CACHE_REQUESTS = Counter(
+    "api_response_cache_events",
+    "Response cache hits, misses, evictions and invalidations",
+    ["event"],
+)
+CACHE_BYTES = Gauge(
+    "api_response_cache_bytes",
+    "Encoded response bytes held by the response cache",
+)
+
+METRICS_PATH = "/metrics"
+
+def metrics_response() -> Response:
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+def _route_template(request: Request) -> str:
+    # Use the full route pattern (/api/stocks/data/{symbol}) so label
+    # cardinality stays bounded and routers' paths do not collide. Some
+    # FastAPI versions leave the router prefix out of route.path; every
+    # parameter matches one segment, so the prefix is whatever precedes
+    # the route's own segments in the request path.
+    route = request.scope.get("route")
+    path = getattr(route, "path", None)
+    if path is None:
+        return "unmatched"
+    prefix = request.scope["path"].rsplit("/", path.count("/"))[0]
+    return prefix + path
+
+async def track_requests(request: Request, call_next):
+    if request.url.path == METRICS_PATH:
+        return await call_next(request)
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = _route_template(request)
+        HTTP_REQUEST_SECONDS.labels(request.method, route).observe(time.perf_counter() - start)
+        HTTP_RESPONSES.labels(request.method, route, str(status)).inc()
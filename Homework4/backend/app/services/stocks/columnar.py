@@ -0,0 +1,40 @@
+from typing import Any, Dict, Iterable, Sequence, Tuple
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+# (response key, stock_data column) for the columnar /data/{symbol} formats
+STOCK_DATA_COLUMNS = (
+    ("dates", "date"),
+    ("close", "last_trade_price"),
+    ("high", "max_price"),
+    ("low", "min_price"),
+    ("avg", "avg_price"),
+    ("changePercentage", "change_percentage"),
+    ("volume", "volume"),
+    ("turnoverBest", "turnover_best"),
+    ("totalTurnover", "total_turnover"),
+)
+
+def columns_from_rows(names: Sequence[str], rows: Iterable[Tuple[Any, ...]]) -> Dict[str, Tuple[Any, ...]]:
+    """Transpose result rows into one tuple per column.
+
+    Values are kept as the driver returned them (date, float, int), which
+    both orjson and Arrow take as they are, so no per-field conversion runs.
+    """
+    columns = tuple(zip(*rows)) or tuple(() for _ in names)
+    return dict(zip(names, columns))
+
+def encode_arrow(columns: Dict[str, Sequence[Any]]) -> bytes:
+    """Columns as an Arrow IPC stream with a single record batch"""
+    # Imported here so the JSON formats do not pay pyarrow's import cost
+    import pyarrow as pa
+
+    types = {"dates": pa.date32(), "volume": pa.int64()}
+    table = pa.table({
+        name: pa.array(values, type=types.get(name, pa.float64()))
+        for name, values in columns.items()
+    })
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
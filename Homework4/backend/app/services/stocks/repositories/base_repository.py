@@ -1,14 +1,18 @@
 from typing import List, Optional, Any
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.metrics import DB_QUERY_ERRORS, DB_QUERY_SECONDS
 
 class BaseRepository:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def execute_query(self, query: str, params: dict = None) -> List[Any]:
+    async def execute_query(self, query: str, params: dict = None) -> List[Any]:
+        repository = type(self).__name__
         try:
-            result = self.db.execute(query, params or {})
-            return result.fetchall()
+            with DB_QUERY_SECONDS.labels(repository).time():
+                result = await self.db.execute(query, params or {})
+                return result.fetchall()
         except Exception as e:
+            DB_QUERY_ERRORS.labels(repository).inc()
             print(f"Database error: {str(e)}")
             raise
\ No newline at end of file
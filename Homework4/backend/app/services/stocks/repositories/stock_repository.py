@@ -1,15 +1,49 @@
 from sqlalchemy import text
-from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from sqlalchemy.exc import ProgrammingError
+from datetime import date, datetime, timedelta
+from typing import List, Dict, Any, Optional, Tuple
 from .base_repository import BaseRepository
+from ..columnar import columns_from_rows
 
 class StockRepository(BaseRepository):
-    def get_symbols(self) -> List[str]:
+    async def get_symbols(self) -> List[str]:
         query = text("SELECT DISTINCT symbol FROM stock_data ORDER BY symbol")
-        result = self.execute_query(query)
+        result = await self.execute_query(query)
         return [row[0] for row in result]
 
-    def get_market_overview(self) -> List[Dict[str, Any]]:
+    # Snapshot rows older than this are not served; the live query is used instead
+    SNAPSHOT_MAX_AGE = timedelta(days=3)
+
+    async def get_market_overview(self) -> List[Dict[str, Any]]:
+        """Serve the snapshot the ingestion pipeline refreshes, falling back
+        to the live aggregate when it is empty or stale"""
+        rows = await self.get_market_overview_snapshot()
+        if rows and datetime.now() - max(row[7] for row in rows) < self.SNAPSHOT_MAX_AGE:
+            return rows
+        return await self.get_market_overview_live()
+
+    async def get_market_overview_snapshot(self) -> List[Any]:
+        query = text("""
+            SELECT
+                symbol,
+                current_price,
+                start_price,
+                price_change,
+                total_volume,
+                total_turnover,
+                last_trade_date,
+                refreshed_at
+            FROM market_overview_snapshot
+            ORDER BY price_change DESC
+        """)
+        try:
+            return await self.execute_query(query)
+        except ProgrammingError:
+            # Table not created yet (ingestion has not run its migrations)
+            await self.db.rollback()
+            return []
+
+    async def get_market_overview_live(self) -> List[Any]:
         query = text("""
             WITH LastTrades AS (
                 SELECT 
@@ -53,9 +87,11 @@ class StockRepository(BaseRepository):
             WHERE lt.current_price > 0 AND ft.start_price > 0
             ORDER BY price_change DESC
         """)
-        return self.execute_query(query)
+        return await self.execute_query(query)
 
-    def get_stock_data(self, symbol: str, start_date: str, end_date: str) -> List[Dict[str, Any]]:
+    # asyncpg binds DATE parameters from date objects only, so the ISO
+    # strings the routes receive are parsed here
+    async def get_stock_data(self, symbol: str, start_date: str, end_date: str) -> List[Dict[str, Any]]:
         query = text("""
             SELECT 
                 date,
@@ -72,13 +108,48 @@ class StockRepository(BaseRepository):
             AND date BETWEEN :start_date AND :end_date
             ORDER BY date
         """)
-        return self.execute_query(query, {
+        return await self.execute_query(query, {
             "symbol": symbol,
-            "start_date": start_date,
-            "end_date": end_date
+            "start_date": date.fromisoformat(start_date),
+            "end_date": date.fromisoformat(end_date)
         })
-        
-    def get_popular_stocks(self) -> List[Dict[str, Any]]:
+
+    async def get_stock_data_columns(self, symbol: str, start_date: str, end_date: str,
+                               columns: List[str]) -> Dict[str, Tuple[Any, ...]]:
+        """Rows of the given stock_data columns transposed straight off the cursor"""
+        query = text(f"""
+            SELECT {', '.join(columns)}
+            FROM stock_data
+            WHERE symbol = :symbol
+            AND date BETWEEN :start_date AND :end_date
+            ORDER BY date
+        """)
+        rows = await self.execute_query(query, {
+            "symbol": symbol,
+            "start_date": date.fromisoformat(start_date),
+            "end_date": date.fromisoformat(end_date)
+        })
+        return columns_from_rows(columns, rows)
+
+    async def get_popular_stocks(self) -> List[Dict[str, Any]]:
+        """Top symbols by 30-day turnover from latest_quote, which the
+        ingestion pipeline keeps current; falls back to the newest row per
+        symbol from stock_data until it has been filled"""
+        query = text("""
+            SELECT
+                symbol,
+                last_trade_price,
+                change_percentage,
+                date
+            FROM latest_quote
+            WHERE popularity_rank IS NOT NULL
+            ORDER BY popularity_rank
+            LIMIT 6
+        """)
+        rows = await self._query_latest_quote(query)
+        return rows if rows else await self.get_popular_stocks_live()
+
+    async def get_popular_stocks_live(self) -> List[Dict[str, Any]]:
         query = text("""
             SELECT DISTINCT ON (s.symbol)
                 s.symbol,
@@ -89,9 +160,22 @@ class StockRepository(BaseRepository):
             ORDER BY s.symbol, s.date DESC
             LIMIT 6
         """)
-        return self.execute_query(query)
+        return await self.execute_query(query)
+
+    async def get_wishlist(self) -> List[Dict[str, Any]]:
+        query = text("""
+            SELECT
+                q.symbol,
+                q.last_trade_price,
+                q.change_percentage
+            FROM wishlist w
+            JOIN latest_quote q ON q.symbol = w.symbol
+            ORDER BY q.symbol
+        """)
+        rows = await self._query_latest_quote(query)
+        return rows if rows is not None else await self.get_wishlist_live()
 
-    def get_wishlist(self) -> List[Dict[str, Any]]:
+    async def get_wishlist_live(self) -> List[Dict[str, Any]]:
         query = text("""
             SELECT DISTINCT ON (s.symbol)
                 s.symbol,
@@ -101,4 +185,13 @@ class StockRepository(BaseRepository):
             JOIN wishlist w ON s.symbol = w.symbol
             ORDER BY s.symbol, s.date DESC
         """)
-        return self.execute_query(query) 
\ No newline at end of file
+        return await self.execute_query(query)
+
+    async def _query_latest_quote(self, query) -> Optional[List[Any]]:
+        """Rows from a latest_quote query, or None if the table does not exist yet"""
+        try:
+            return await self.execute_query(query)
+        except ProgrammingError:
+            # Table not created yet (ingestion has not run its migrations)
+            await self.db.rollback()
+            return None
@@ -0,0 +1,122 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, NamedTuple, Optional
+
+import orjson
+from sqlalchemy import text
+from app.metrics import CACHE_BYTES, CACHE_REQUESTS
+
+JSON_MEDIA_TYPE = "application/json"
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    etag: str
+    expires_at: float
+    media_type: str = JSON_MEDIA_TYPE
+
+def encode_json(value: Any) -> bytes:
+    # Compact UTF-8 like starlette's JSONResponse; dates become ISO strings
+    return orjson.dumps(value)
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+class ResponseCache:
+    """Pre-encoded JSON responses keyed by service method and arguments.
+
+    Entries expire after ttl seconds and the least recently used ones are
+    evicted once the encoded bodies exceed max_bytes. Every entry is
+    dropped when the ingestion pipeline bumps the data version; the
+    version is polled at most once per poll_interval, so cache hits do
+    not touch the database.
+    """
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, ttl: float = 3600,
+                 poll_interval: float = 5.0,
+                 version_loader: Optional[Callable[[], Awaitable[Optional[int]]]] = None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.poll_interval = poll_interval
+        self.version_loader = version_loader
+        self.entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        self.total_bytes = 0
+        self.data_version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    async def get_or_compute(self, key: Hashable, compute: Callable[[], Awaitable[Any]],
+                             encode: Callable[[Any], bytes] = encode_json,
+                             media_type: str = JSON_MEDIA_TYPE) -> CachedResponse:
+        await self._check_version()
+        now = time.monotonic()
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry.expires_at > now:
+                self.entries.move_to_end(key)
+                CACHE_REQUESTS.labels("hit").inc()
+                return entry
+        CACHE_REQUESTS.labels("miss").inc()
+        version = self.data_version
+        body = encode(await compute())
+        entry = CachedResponse(body, make_etag(body), now + self.ttl, media_type)
+        # A version bump while compute() awaited the database may have cleared
+        # the cache; the result could predate it, so serve it without storing
+        if self.data_version == version:
+            self._store(key, entry)
+        return entry
+
+    def _store(self, key: Hashable, entry: CachedResponse):
+        if len(entry.body) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.total_bytes -= len(previous.body)
+            self.entries[key] = entry
+            self.total_bytes += len(entry.body)
+            while self.total_bytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.total_bytes -= len(evicted.body)
+                CACHE_REQUESTS.labels("evicted").inc()
+            CACHE_BYTES.set(self.total_bytes)
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.total_bytes = 0
+            CACHE_BYTES.set(0)
+
+    async def _check_version(self):
+        if self.version_loader is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if now - self._checked_at < self.poll_interval:
+                return
+            self._checked_at = now
+        version = await self.version_loader()
+        if version is None:
+            return
+        if self.data_version is not None and version != self.data_version:
+            self.clear()
+            CACHE_REQUESTS.labels("invalidated").inc()
+        self.data_version = version
+
+async def load_data_version() -> Optional[int]:
+    """Version bumped by the ingestion pipeline after each run; None if unavailable"""
+    from app.db.async_database import async_engine
+    try:
+        async with async_engine.connect() as connection:
+            result = await connection.execute(text("SELECT version FROM data_version WHERE id = 1"))
+            return result.scalar()
+    except Exception:
+        return None
+
+response_cache = ResponseCache(
+    max_bytes=int(os.getenv("RESPONSE_CACHE_MB", "64")) * 1024 * 1024,
+    ttl=float(os.getenv("RESPONSE_CACHE_TTL", "3600")),
+    poll_interval=float(os.getenv("DATA_VERSION_POLL_SECONDS", "5")),
+    version_loader=load_data_version,
+)
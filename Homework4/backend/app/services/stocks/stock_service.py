@@ -1,20 +1,29 @@
-from typing import List, Dict, Any
-from sqlalchemy.orm import Session
+from typing import Any, Callable, Dict, List, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
 from .repositories.stock_repository import StockRepository
 from .builders.market_data_builder import MarketDataBuilder
 from .builders.stock_data_builder import StockDataBuilder
+from .columnar import STOCK_DATA_COLUMNS
+from .response_cache import JSON_MEDIA_TYPE, CachedResponse, encode_json, response_cache
 
 class StockService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.repository = StockRepository(db)
         self.market_builder = MarketDataBuilder()
         self.stock_builder = StockDataBuilder()
 
-    def get_symbols(self) -> List[str]:
-        return self.repository.get_symbols()
+    async def cached(self, method: str, *args, encode: Callable[[Any], bytes] = encode_json,
+               media_type: str = JSON_MEDIA_TYPE) -> CachedResponse:
+        """Encoded result of a read method, served from the response cache"""
+        return await response_cache.get_or_compute(
+            (method, media_type, *args), lambda: getattr(self, method)(*args), encode, media_type
+        )
 
-    def get_market_overview(self) -> List[Dict[str, Any]]:
-        rows = self.repository.get_market_overview()
+    async def get_symbols(self) -> List[str]:
+        return await self.repository.get_symbols()
+
+    async def get_market_overview(self) -> List[Dict[str, Any]]:
+        rows = await self.repository.get_market_overview()
         return [
             self.market_builder
                 .set_symbol(row[0])
@@ -25,8 +34,8 @@ class StockService:
             for row in rows
         ]
 
-    def get_stock_data(self, symbol: str, start_date: str, end_date: str) -> List[Dict[str, Any]]:
-        rows = self.repository.get_stock_data(symbol, start_date, end_date)
+    async def get_stock_data(self, symbol: str, start_date: str, end_date: str) -> List[Dict[str, Any]]:
+        rows = await self.repository.get_stock_data(symbol, start_date, end_date)
         return [
             self.stock_builder
                 .set_date_price(row[0], row[1])
@@ -35,8 +44,16 @@ class StockService:
                 .build()
             for row in rows
         ]
-    def get_popular_stocks(self) -> List[Dict[str, Any]]:
-        rows = self.repository.get_popular_stocks()
+
+    async def get_stock_data_columns(self, symbol: str, start_date: str, end_date: str) -> Dict[str, Tuple[Any, ...]]:
+        """The same range as get_stock_data, one array per field"""
+        columns = await self.repository.get_stock_data_columns(
+            symbol, start_date, end_date, [column for _, column in STOCK_DATA_COLUMNS]
+        )
+        return {key: columns[column] for key, column in STOCK_DATA_COLUMNS}
+
+    async def get_popular_stocks(self) -> List[Dict[str, Any]]:
+        rows = await self.repository.get_popular_stocks()
         return [{
             "symbol": row[0],
             "companyName": row[0],  # Using symbol as company name for now
@@ -44,8 +61,8 @@ class StockService:
             "changePercentage": float(row[2]) if row[2] is not None else 0.0
         } for row in rows]
 
-    def get_wishlist(self, db: Session) -> List[Dict[str, Any]]:
-        rows = self.repository.get_wishlist()
+    async def get_wishlist(self, db: AsyncSession) -> List[Dict[str, Any]]:
+        rows = await self.repository.get_wishlist()
         return [{
             "symbol": row[0],
             "companyName": row[0],  # Using symbol as company name for now
@@ -0,0 +1,83 @@
+"""Market overview latency: live aggregate vs. the precomputed snapshot.
+
+Run from Homework4/backend against the database in .env / DATABASE_URL,
+after an ingestion run has filled market_overview_snapshot:
+
+    python -m benchmarks.bench_market_overview --clients 100 --requests 20
+
+Each client is a coroutine with its own session that issues the query
+back to back. Reports p50/p99 latency, throughput and, when the pg_stat_statements
+extension is installed, the server-side execution time per query as a
+proxy for DB CPU.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import text
+
+from app.db.async_database import AsyncSessionLocal, async_engine
+from app.services.stocks.repositories.stock_repository import StockRepository
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+async def db_exec_ms():
+    """Total execution time recorded by pg_stat_statements, or None"""
+    try:
+        async with async_engine.connect() as connection:
+            result = await connection.execute(text(
+                "SELECT COALESCE(SUM(total_exec_time), 0) FROM pg_stat_statements"
+            ))
+            return result.scalar()
+    except Exception:
+        return None
+
+async def run(method, clients, requests_per_client):
+    start_event = asyncio.Event()
+
+    async def client():
+        async with AsyncSessionLocal() as db:
+            repository = StockRepository(db)
+            await start_event.wait()
+            latencies = []
+            for _ in range(requests_per_client):
+                start = time.perf_counter()
+                await getattr(repository, method)()
+                latencies.append(time.perf_counter() - start)
+            return latencies
+
+    tasks = [asyncio.create_task(client()) for _ in range(clients)]
+    exec_before = await db_exec_ms()
+    wall_start = time.perf_counter()
+    start_event.set()
+    latencies = [latency for result in await asyncio.gather(*tasks) for latency in result]
+    wall = time.perf_counter() - wall_start
+    exec_after = await db_exec_ms()
+    db_ms = (exec_after - exec_before) / len(latencies) if exec_before is not None else None
+    return latencies, wall, db_ms
+
+async def main():
+    parser = argparse.ArgumentParser(description="Market overview benchmark")
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=20, help="requests per client")
+    args = parser.parse_args()
+
+    async with AsyncSessionLocal() as db:
+        snapshot_rows = len(await StockRepository(db).get_market_overview_snapshot())
+    if not snapshot_rows:
+        print("market_overview_snapshot is empty; run the ingestion pipeline first")
+
+    print(f"\n{'query':>10} {'requests':>9} {'p50 ms':>9} {'p99 ms':>9} {'mean ms':>9} {'req/s':>9} {'db ms/req':>10}")
+    for name, method in (('live', 'get_market_overview_live'), ('snapshot', 'get_market_overview_snapshot')):
+        latencies, wall, db_ms = await run(method, args.clients, args.requests)
+        db_column = f"{db_ms:>10.2f}" if db_ms is not None else f"{'n/a':>10}"
+        print(f"{name:>10} {len(latencies):>9} {percentile(latencies, 50) * 1000:>9.2f} "
+              f"{percentile(latencies, 99) * 1000:>9.2f} {statistics.mean(latencies) * 1000:>9.2f} "
+              f"{len(latencies) / wall:>9.0f} {db_column}")
+    await async_engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,93 @@
+"""/api/stocks/data/{symbol} encoding cost: row objects vs. columnar formats.
+
+Run from Homework4/backend against the database in .env / DATABASE_URL:
+
+    python -m benchmarks.bench_stock_data --symbol ALK --repeat 20
+
+For a 1-year and a 10-year range ending at the symbol's last trade date,
+times each response format from query to encoded body, bypassing the
+response cache:
+
+    rows       builder dicts through FastAPI's encoder (the original path)
+    rows-orjs  the same dicts encoded with orjson
+    columnar   arrays transposed from the cursor, encoded with orjson
+    arrow      the same arrays as an Arrow IPC stream
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import timedelta
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+
+from app.db.async_database import AsyncSessionLocal, async_engine
+from app.services.stocks.columnar import encode_arrow
+from app.services.stocks.response_cache import encode_json
+from app.services.stocks.stock_service import StockService
+
+async def rows_fastapi(service, *args):
+    return JSONResponse(jsonable_encoder(await service.get_stock_data(*args))).body
+
+async def rows_orjson(service, *args):
+    return encode_json(await service.get_stock_data(*args))
+
+async def columnar_orjson(service, *args):
+    return encode_json(await service.get_stock_data_columns(*args))
+
+async def columnar_arrow(service, *args):
+    return encode_arrow(await service.get_stock_data_columns(*args))
+
+FORMATS = {
+    "rows": rows_fastapi,
+    "rows-orjs": rows_orjson,
+    "columnar": columnar_orjson,
+    "arrow": columnar_arrow,
+}
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+async def busiest_symbol(db):
+    result = await db.execute(text(
+        "SELECT symbol FROM stock_data GROUP BY symbol ORDER BY COUNT(*) DESC LIMIT 1"
+    ))
+    return result.scalar()
+
+async def main():
+    parser = argparse.ArgumentParser(description="Stock data response format benchmark")
+    parser.add_argument("--symbol", help="defaults to the symbol with the most rows")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    async with AsyncSessionLocal() as db:
+        symbol = args.symbol or await busiest_symbol(db)
+        result = await db.execute(text("SELECT MAX(date) FROM stock_data WHERE symbol = :symbol"),
+                                  {"symbol": symbol})
+        end = result.scalar()
+        if end is None:
+            print(f"no rows for {symbol!r}; run the ingestion pipeline first")
+            return
+        service = StockService(db)
+
+        print(f"\nsymbol {symbol}, {args.repeat} runs per format")
+        print(f"{'range':>6} {'format':>10} {'rows':>6} {'p50 ms':>9} {'p99 ms':>9} {'mean ms':>9} {'bytes':>10}")
+        for years in (1, 10):
+            start = end - timedelta(days=365 * years)
+            rows = len(await service.repository.get_stock_data(symbol, start.isoformat(), end.isoformat()))
+            for name, encode in FORMATS.items():
+                latencies = []
+                for _ in range(args.repeat):
+                    began = time.perf_counter()
+                    body = await encode(service, symbol, start.isoformat(), end.isoformat())
+                    latencies.append(time.perf_counter() - began)
+                print(f"{f'{years}y':>6} {name:>10} {rows:>6} {percentile(latencies, 50) * 1000:>9.2f} "
+                      f"{percentile(latencies, 99) * 1000:>9.2f} {statistics.mean(latencies) * 1000:>9.2f} "
+                      f"{len(body):>10}")
+    await async_engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
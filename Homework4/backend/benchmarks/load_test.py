@@ -0,0 +1,161 @@
+"""HTTP load test: sync (threadpool + psycopg2) vs. async (asyncpg) stack.
+
+Run from Homework4/backend against the database in .env / DATABASE_URL:
+
+    python -m benchmarks.load_test --concurrency 100 --duration 20
+
+Serves two apps from this module with uvicorn, one at a time, each in its
+own process. They run identical queries and encode identical bodies; the
+only difference is the stack. sync_app uses `def` routes with SessionLocal,
+as the API did before, and async_app uses `async def` routes with
+AsyncSessionLocal, as it does now. The response cache is bypassed, so
+every request reaches Postgres. For each endpoint, `concurrency` clients
+send requests back to back for `duration` seconds. The test reports
+requests/second, p50/p99 latency and errors.
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+
+import httpx
+from fastapi import Depends, FastAPI, Response
+from sqlalchemy import text
+
+from app.db.async_database import get_async_db
+from app.db.database import get_db
+from app.services.stocks.response_cache import encode_json
+
+MARKET_OVERVIEW_SQL = text("""
+    SELECT symbol, current_price, start_price, price_change,
+           total_volume, total_turnover, last_trade_date
+    FROM market_overview_snapshot
+    ORDER BY price_change DESC
+""")
+STOCK_DATA_SQL = text("""
+    SELECT date, last_trade_price, max_price, min_price, avg_price,
+           change_percentage, volume, turnover_best, total_turnover
+    FROM stock_data
+    WHERE symbol = :symbol
+    AND date BETWEEN :start_date AND :end_date
+    ORDER BY date
+""")
+
+def stock_data_params(symbol: str, days: int):
+    end_date = date.today()
+    return {"symbol": symbol, "start_date": end_date - timedelta(days=days), "end_date": end_date}
+
+def json_rows(rows) -> Response:
+    return Response(content=encode_json([tuple(row) for row in rows]), media_type="application/json")
+
+sync_app = FastAPI()
+
+@sync_app.get("/health")
+def sync_health():
+    return {}
+
+@sync_app.get("/market-overview")
+def sync_market_overview(db=Depends(get_db)):
+    return json_rows(db.execute(MARKET_OVERVIEW_SQL).fetchall())
+
+@sync_app.get("/data/{symbol}")
+def sync_stock_data(symbol: str, days: int = 365, db=Depends(get_db)):
+    return json_rows(db.execute(STOCK_DATA_SQL, stock_data_params(symbol, days)).fetchall())
+
+async_app = FastAPI()
+
+@async_app.get("/health")
+async def async_health():
+    return {}
+
+@async_app.get("/market-overview")
+async def async_market_overview(db=Depends(get_async_db)):
+    result = await db.execute(MARKET_OVERVIEW_SQL)
+    return json_rows(result.fetchall())
+
+@async_app.get("/data/{symbol}")
+async def async_stock_data(symbol: str, days: int = 365, db=Depends(get_async_db)):
+    result = await db.execute(STOCK_DATA_SQL, stock_data_params(symbol, days))
+    return json_rows(result.fetchall())
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+def start_server(app_name: str, port: int) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", f"benchmarks.load_test:{app_name}",
+         "--port", str(port), "--log-level", "warning"],
+        env=os.environ.copy()
+    )
+
+async def wait_until_up(client: httpx.AsyncClient, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+async def load(client: httpx.AsyncClient, path: str, concurrency: int, duration: float):
+    """(latencies, errors, wall seconds) for concurrency clients over duration"""
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                response = await client.get(path)
+                failed = response.status_code != 200
+            except httpx.HTTPError:
+                failed = True
+            if failed:
+                errors += 1
+            else:
+                latencies.append(time.perf_counter() - start)
+
+    wall_start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - wall_start
+
+async def main():
+    parser = argparse.ArgumentParser(description="Sync vs. async stack load test")
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per endpoint")
+    parser.add_argument("--symbol", default="ALK")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    paths = ("/market-overview", f"/data/{args.symbol}?days=365", f"/data/{args.symbol}?days=3650")
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    print(f"\n{args.concurrency} clients, {args.duration:.0f}s per endpoint")
+    print(f"{'stack':>6} {'endpoint':>22} {'requests':>9} {'req/s':>8} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for stack in ("sync", "async"):
+        server = start_server(f"{stack}_app", args.port)
+        try:
+            async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}",
+                                         limits=limits, timeout=60.0) as client:
+                await wait_until_up(client)
+                for path in paths:
+                    latencies, errors, wall = await load(client, path, args.concurrency, args.duration)
+                    if not latencies:
+                        print(f"{stack:>6} {path:>22} {'':>9} {'':>8} {'':>9} {'':>9} {errors:>7}")
+                        continue
+                    print(f"{stack:>6} {path:>22} {len(latencies):>9} {len(latencies) / wall:>8.0f} "
+                          f"{percentile(latencies, 50) * 1000:>9.2f} {percentile(latencies, 99) * 1000:>9.2f} "
+                          f"{errors:>7}")
+        finally:
+            server.terminate()
+            server.wait()
+
+if __name__ == "__main__":
+    asyncio.run(main())
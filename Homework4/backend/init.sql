@@ -27,6 +27,46 @@ CREATE TABLE IF NOT EXISTS stock_data (
 -- Create index on stock_data
 CREATE INDEX IF NOT EXISTS idx_symbol_date ON stock_data (symbol, date);
 
+-- Precomputed /api/stocks/market-overview, refreshed by the ingestion pipeline
+CREATE TABLE IF NOT EXISTS market_overview_snapshot (
+    symbol VARCHAR(10) PRIMARY KEY,
+    current_price DOUBLE PRECISION NOT NULL,
+    start_price DOUBLE PRECISION NOT NULL,
+    price_change DOUBLE PRECISION NOT NULL,
+    total_volume BIGINT,
+    total_turnover DOUBLE PRECISION,
+    last_trade_date DATE NOT NULL,
+    window_start DATE NOT NULL,
+    refreshed_at TIMESTAMP NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_market_overview_price_change ON market_overview_snapshot (price_change DESC);
+
+-- Bumped by the ingestion pipeline after each run; the API's response cache polls it
+CREATE TABLE IF NOT EXISTS data_version (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version BIGINT NOT NULL,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO data_version (id, version) VALUES (1, 0) ON CONFLICT (id) DO NOTHING;
+
+-- Newest row per symbol, upserted by the ingestion write path;
+-- popularity_rank orders symbols by 30-day turnover
+CREATE TABLE IF NOT EXISTS latest_quote (
+    symbol VARCHAR(10) PRIMARY KEY,
+    date DATE NOT NULL,
+    last_trade_price DOUBLE PRECISION,
+    change_percentage DOUBLE PRECISION,
+    volume INTEGER,
+    total_turnover DOUBLE PRECISION,
+    turnover_30d DOUBLE PRECISION,
+    popularity_rank INTEGER,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_latest_quote_popularity ON latest_quote (popularity_rank) WHERE popularity_rank IS NOT NULL;
+
 -- Create wishlist table
 CREATE TABLE IF NOT EXISTS wishlist (
     id SERIAL PRIMARY KEY,